@@ -7,25 +7,29 @@ import time
 class PrefixTreeNode:
     """Node in a prefix tree for block-based routing."""
     def __init__(self):
-        self.children: Dict[str, 'PrefixTreeNode'] = {}
+        self.children: Dict[int, 'PrefixTreeNode'] = {}
         self.workers: Set[str] = set()  # Workers that have this prefix
 
 
 class GlobalCacheMap:
     def __init__(self):
         # Map: prefix_hash -> Set[worker_id] (for backward compatibility)
-        self._map: Dict[str, Set[str]] = {}
+        self._map: Dict[int, Set[str]] = {}
         # Map: worker_id -> Set[prefix_hash] (Reverse Index for O(1) sync)
-        self._worker_to_hashes: Dict[str, Set[str]] = {}
+        self._worker_to_hashes: Dict[str, Set[int]] = {}
         # Map: worker_id -> List[block_hash] (ordered block sequences for prefix matching)
-        self._worker_block_sequences: Dict[str, List[str]] = {}
+        self._worker_block_sequences: Dict[str, List[int]] = {}
         # Prefix tree root for longest prefix matching
         self._prefix_tree_root = PrefixTreeNode()
         # Map: worker_id -> last_heartbeat_timestamp
         self._worker_load: Dict[str, int] = {} 
+        # Map: worker_id -> ordered hashes as of the last sync (base for delta syncs)
+        self._worker_synced_sequence: Dict[str, List[int]] = {}
+        # Map: worker_id -> seq of the last applied sync
+        self._worker_sync_seq: Dict[str, int] = {}
         self._lock = threading.RLock()
 
-    def update(self, worker_id: str, prefix_hash: str):
+    def update(self, worker_id: str, prefix_hash: int):
         """Register that a worker has a specific prefix cached."""
         with self._lock:
             if prefix_hash not in self._map:
@@ -39,18 +43,18 @@ class GlobalCacheMap:
             # Update worker "load" or liveness (simplified)
             self._worker_load[worker_id] = self._worker_load.get(worker_id, 0)
     
-    def update_block_sequence(self, worker_id: str, block_hashes: List[str]):
+    def update_block_sequence(self, worker_id: str, block_hashes: List[int]):
         """
         Update the block sequence for a worker. This builds the prefix tree.
         block_hashes should be an ordered list of block hashes.
         """
         with self._lock:
+            # Remove old entries from prefix tree (walks the stored sequence, so before replacing it)
+            self._remove_worker_from_tree(worker_id)
+            
             # Store the full sequence
             self._worker_block_sequences[worker_id] = block_hashes.copy()
             
-            # Remove old entries from prefix tree
-            self._remove_worker_from_tree(worker_id)
-            
             # Add new entries to prefix tree
             node = self._prefix_tree_root
             for block_hash in block_hashes:
@@ -59,7 +63,7 @@ class GlobalCacheMap:
                 node = node.children[block_hash]
                 node.workers.add(worker_id)
 
-    def evict(self, worker_id: str, prefix_hash: str):
+    def evict(self, worker_id: str, prefix_hash: int):
         """Remove a prefix from a worker's cache record."""
         with self._lock:
             if prefix_hash in self._map:
@@ -72,7 +76,56 @@ class GlobalCacheMap:
             
             # Remove from prefix tree
             self._remove_worker_from_tree(worker_id)
-    
+
+    def evict_many(self, evictions: Dict[str, Set[int]]):
+        """evict() for many workers' prefixes at once, under a single lock acquisition."""
+        with self._lock:
+            for worker_id, prefix_hashes in evictions.items():
+                worker_hashes = self._worker_to_hashes.get(worker_id)
+                for prefix_hash in prefix_hashes:
+                    workers = self._map.get(prefix_hash)
+                    if workers is not None:
+                        workers.discard(worker_id)
+                        if not workers:
+                            del self._map[prefix_hash]
+                    if worker_hashes is not None:
+                        worker_hashes.discard(prefix_hash)
+
+                # Remove from prefix tree
+                self._remove_worker_from_tree(worker_id)
+
+    def evict_prefixes(self, worker_id: str, prefixes: List[Tuple[int, int]]) -> List[int]:
+        """
+        Evict everything a worker has cached under each (prefix_hash, depth):
+        if its block sequence has prefix_hash at index depth, the sequence is
+        cut there and every hash from that point on is evicted, while the
+        blocks before it stay matchable. Otherwise (block hashes aren't chained,
+        so the tail may belong to another of the worker's sequences) only
+        prefix_hash itself is evicted and the worker leaves the prefix tree,
+        as with evict_many(). Returns the evicted hashes.
+        """
+        with self._lock:
+            evicted: List[int] = []
+            for prefix_hash, depth in prefixes:
+                sequence = self._worker_block_sequences.get(worker_id, [])
+                if depth < len(sequence) and sequence[depth] == prefix_hash:
+                    removed = sequence[depth:]
+                    self.update_block_sequence(worker_id, sequence[:depth])
+                else:
+                    removed = [prefix_hash]
+                    self._remove_worker_from_tree(worker_id)
+                worker_hashes = self._worker_to_hashes.get(worker_id)
+                for h in removed:
+                    workers = self._map.get(h)
+                    if workers is not None and worker_id in workers:
+                        workers.discard(worker_id)
+                        if not workers:
+                            del self._map[h]
+                        evicted.append(h)
+                    if worker_hashes is not None:
+                        worker_hashes.discard(h)
+            return evicted
+
     def _remove_worker_from_tree(self, worker_id: str):
         """Remove a worker from the prefix tree."""
         if worker_id not in self._worker_block_sequences:
@@ -91,13 +144,20 @@ class GlobalCacheMap:
                     # Can be removed, but we'll leave it for simplicity
                     pass
 
-    def sync_worker_state(self, worker_id: str, active_hashes: List[str]):
+    def sync_worker_state(self, worker_id: str, active_hashes: List[int], seq: Optional[int] = None):
         """
         Reconcile the worker's cache state.
         Replace the router's view of this worker's cache with the provided list.
         active_hashes should be an ordered list of block hashes for prefix matching.
+        seq, if given, is the baseline for following apply_sync_delta calls.
         """
         with self._lock:
+            self._worker_synced_sequence[worker_id] = list(active_hashes)
+            if seq is None:
+                self._worker_sync_seq.pop(worker_id, None)
+            else:
+                self._worker_sync_seq[worker_id] = seq
+
             logger.info(f"[SYNC DEBUG] Starting sync for {worker_id}, active_hashes={len(active_hashes)}")
             
             # 1. Remove worker from all current entries using Reverse Index
@@ -131,12 +191,49 @@ class GlobalCacheMap:
             # Update liveness
             self._worker_load[worker_id] = self._worker_load.get(worker_id, 0)
 
-    def get_workers_for_prefix(self, prefix_hash: str) -> List[str]:
+    def apply_sync_delta(self, worker_id: str, seq: int, added: List[int], removed: List[int]) -> bool:
+        """
+        Apply an incremental sync on top of the worker's last synced state.
+        added is in the worker's prefix order and is appended to the sequence.
+        Returns False (and changes nothing) if seq does not directly follow the
+        last applied sync; the worker must then send a full snapshot.
+        """
+        with self._lock:
+            last_seq = self._worker_sync_seq.get(worker_id)
+            if last_seq is None or seq != last_seq + 1:
+                return False
+            self._worker_sync_seq[worker_id] = seq
+            
+            hashes = self._worker_to_hashes.setdefault(worker_id, set())
+            for h in removed:
+                if h in self._map:
+                    self._map[h].discard(worker_id)
+                    if not self._map[h]:
+                        del self._map[h]
+                hashes.discard(h)
+            for h in added:
+                self._map.setdefault(h, set()).add(worker_id)
+                hashes.add(h)
+            
+            removed_set = set(removed)
+            sequence = [h for h in self._worker_synced_sequence.get(worker_id, []) if h not in removed_set]
+            sequence.extend(added)
+            self._worker_synced_sequence[worker_id] = sequence
+            # Rebuild the prefix-tree path as a full sync would
+            self.update_block_sequence(worker_id, sequence)
+            return True
+
+    def get_workers_for_prefix(self, prefix_hash: int) -> List[str]:
         """Get list of workers that have the prefix cached (backward compatibility)."""
         with self._lock:
             return list(self._map.get(prefix_hash, []))
     
-    def find_longest_prefix_match(self, block_hashes: List[str]) -> Tuple[Optional[str], int]:
+    def get_hashes_for_worker(self, worker_id: str) -> List[int]:
+        """Get a snapshot of the prefix hashes recorded for a worker."""
+        with self._lock:
+            return list(self._worker_to_hashes.get(worker_id, ()))
+    
+    def find_longest_prefix_match(self, block_hashes: List[int]) -> Tuple[Optional[str], int]:
         """
         Find the worker with the longest prefix match for the given block sequence.
         Returns (worker_id, match_length) where match_length is the number of matching blocks.
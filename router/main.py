@@ -1,11 +1,19 @@
-from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, List, Optional, Set, Tuple
 import uvicorn
+import asyncio
 import logging
 import os
 import httpx
+import numpy as np
+import sys
 import threading
+import time
+from array import array
+from collections import Counter, deque
+from contextlib import asynccontextmanager, suppress
+from itertools import islice
 
 from .tokenizer_utils import TokenizerUtils
 from .cache_map import GlobalCacheMap
@@ -22,12 +30,27 @@ PROXY_MODE = os.getenv("PROXY_MODE", "false").lower() == "true"
 ROUTING_STRATEGY = os.getenv("ROUTING_STRATEGY", "cache_aware").lower()  # cache_aware, round_robin, least_loaded
 WORKER_URLS = {}  # Will be populated via heartbeat: {worker_id: base_url}
 
-app = FastAPI(title="Stateful Cache-Aware Router")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the eviction coalescing task for as long as the app is up."""
+    task = asyncio.create_task(coalesce_evictions())
+    yield
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
+app = FastAPI(title="Stateful Cache-Aware Router", lifespan=lifespan)
 
 # Round-robin state
 round_robin_index = 0
 round_robin_lock = threading.Lock()
 
+# Routing statistics served by /internal/stats (updated on the event loop, so no lock)
+ROUTING_LATENCY_WINDOW = 1024  # Recent routing decisions kept for the p95 estimate
+routing_stats = {"hits": 0, "misses": 0, "match_sum": 0}
+worker_counts = Counter()
+routing_latencies = deque(maxlen=ROUTING_LATENCY_WINDOW)
+
 # Global instances
 tokenizer_utils = TokenizerUtils() # Defaults to gpt2 for demo
 cache_map = GlobalCacheMap()
@@ -39,12 +62,15 @@ class InferenceRequest(BaseModel):
 
 class EvictionReport(BaseModel):
     worker_id: str
-    evicted_hashes: List[str]
+    evicted_hashes: List[int]
+    epoch: Optional[int] = None  # Reporter start time (ns); seq restarts with it
+    seq: Optional[int] = None  # Per-reporter report number, reused when a report is retried
 
 class Heartbeat(BaseModel):
     worker_id: str
     current_load: int
     worker_url: Optional[str] = None  # Base URL for proxy mode
+    evicted_hashes: List[int] = []  # Evictions piggybacked on the heartbeat
 
 def route_round_robin() -> Optional[str]:
     """Round-robin routing: cycle through workers."""
@@ -58,11 +84,14 @@ def route_round_robin() -> Optional[str]:
         return worker
 
 @app.post("/v1/completions")
-async def generate(request: InferenceRequest):
+async def generate(request: InferenceRequest, response: Response):
     """
     Simulated inference endpoint.
     Supports multiple routing strategies: cache_aware, round_robin, least_loaded
+    The routing decision is also sent as X-Assigned-Worker / X-Cache-Status /
+    X-Match-Length headers, so clients can read it without parsing the body.
     """
+    start = time.perf_counter()
     # 1. Compute block hashes for the prompt
     block_hashes = tokenizer_utils.compute_block_hashes(request.prompt)
     
@@ -87,7 +116,9 @@ async def generate(request: InferenceRequest):
         logger.info(f"⚖️  Least-Loaded: Routing to {target_worker} (load={cache_map._worker_load.get(target_worker, 0)})")
         
     else:  # cache_aware (default)
-        # 2. Find worker with longest prefix match using prefix tree
+        # 2. Find worker with longest prefix match using prefix tree, after
+        # evictions already reported (a coalescing round may not have run yet)
+        apply_pending_evictions()
         target_worker, match_length = cache_map.find_longest_prefix_match(block_hashes)
         
         if target_worker and match_length > 0:
@@ -112,6 +143,19 @@ async def generate(request: InferenceRequest):
 
     if not target_worker:
         raise HTTPException(status_code=503, detail="No workers available")
+    
+    if cache_status == "HIT":
+        routing_stats["hits"] += 1
+        routing_stats["match_sum"] += match_length
+    else:
+        routing_stats["misses"] += 1
+    worker_counts[target_worker] += 1
+    routing_latencies.append((time.perf_counter() - start) * 1000)
+    if cache_status != "HIT":
+        match_length = 0
+    response.headers["X-Assigned-Worker"] = target_worker
+    response.headers["X-Cache-Status"] = cache_status
+    response.headers["X-Match-Length"] = str(match_length)
 
     # 3. Proxy Request (Mode-dependent)
     if PROXY_MODE and target_worker in WORKER_URLS:
@@ -121,11 +165,11 @@ async def generate(request: InferenceRequest):
         
         async with httpx.AsyncClient(timeout=30.0) as client:
             try:
-                response = await client.post(
+                worker_response = await client.post(
                     f"{worker_url}/v1/completions",
                     json=request.dict()
                 )
-                return response.json()
+                return worker_response.json()
             except Exception as e:
                 logger.error(f"❌ Proxy failed: {e}")
                 raise HTTPException(status_code=502, detail=f"Worker unreachable: {e}")
@@ -135,23 +179,190 @@ async def generate(request: InferenceRequest):
             "assigned_worker": target_worker,
             "status": "forwarded",
             "block_hashes": block_hashes,
-            "match_length": match_length if cache_status == "HIT" else 0,
+            "match_length": match_length,
             "cache_status": cache_status
         }
 
+# Eviction reports waiting for coalesce_evictions(): (worker_id, hashes, epoch, seq)
+EvictionItem = Tuple[str, List[int], Optional[int], Optional[int]]
+invalidation_queue: "asyncio.Queue[EvictionItem]" = asyncio.Queue()
+
+# Sequenced eviction reports seen per worker (only touched on the event loop, so no lock)
+EVICTION_SEQ_WINDOW = 1 << 20  # (hash -> seq) entries remembered per worker
+eviction_epochs: Dict[str, int] = {}  # worker_id -> epoch of its current reporter
+eviction_seqs: Dict[str, Dict[int, int]] = {}  # worker_id -> hash -> seq of the last report that evicted it
+
+def queue_evictions(worker_id: str, evicted_hashes: List[int],
+                    epoch: Optional[int] = None, seq: Optional[int] = None):
+    """Hand a worker's evicted hashes to the coalescing task; the caller can reply straight away."""
+    invalidation_queue.put_nowait((worker_id, evicted_hashes, epoch, seq))
+
+def drop_stale_evictions(worker_id: str, hashes: List[int], epoch: int, seq: int) -> List[int]:
+    """
+    Return the hashes no report with this seq or a later one has evicted yet.
+    A retried report whose first attempt was applied, or one overtaken by a
+    newer report, could otherwise evict a block the worker has cached again.
+    Reports from an older epoch (the worker's reporter has restarted) are dropped.
+    """
+    if epoch < eviction_epochs.get(worker_id, epoch):
+        return []
+    if epoch != eviction_epochs.get(worker_id):
+        eviction_epochs[worker_id] = epoch
+        eviction_seqs[worker_id] = {}
+    last_seqs = eviction_seqs[worker_id]
+    fresh = []
+    for h in hashes:
+        if last_seqs.get(h, -1) >= seq:
+            continue
+        last_seqs.pop(h, None)  # Re-insert at the end so the window keeps the newest
+        last_seqs[h] = seq
+        fresh.append(h)
+    excess = len(last_seqs) - EVICTION_SEQ_WINDOW
+    if excess > 0:
+        eviction_seqs[worker_id] = dict(islice(last_seqs.items(), excess, None))
+    return fresh
+
+def apply_pending_evictions(first: Optional[EvictionItem] = None):
+    """
+    Drain every queued eviction report, merge them per worker and apply
+    the result to the cache map under a single lock acquisition.
+    """
+    merged: Dict[str, Set[int]] = {}
+    item = first
+    while True:
+        if item is not None:
+            worker_id, hashes, epoch, seq = item
+            if seq is not None:
+                hashes = drop_stale_evictions(worker_id, hashes, epoch or 0, seq)
+            if hashes:
+                merged.setdefault(worker_id, set()).update(hashes)
+        try:
+            item = invalidation_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+    if not merged:
+        return
+    cache_map.evict_many(merged)
+    for worker_id, hashes in merged.items():
+        for h in hashes:
+            logger.info(f"🗑️  EVICTION: {h >> 32:08x}... from {worker_id}")
+        logger.info(f"Processed eviction report from {worker_id}: {len(hashes)} hashes")
+
+async def coalesce_evictions():
+    """Background task: apply eviction reports in batches as they arrive."""
+    while True:
+        apply_pending_evictions(await invalidation_queue.get())
+
 @app.post("/internal/eviction")
 async def report_eviction(report: EvictionReport):
     """Endpoint for workers to report evicted blocks."""
-    for h in report.evicted_hashes:
-        cache_map.evict(report.worker_id, h)
-        logger.info(f"🗑️  EVICTION: {h[:8]}... from {report.worker_id}")
-    logger.info(f"Processed eviction report from {report.worker_id}: {len(report.evicted_hashes)} hashes")
+    queue_evictions(report.worker_id, report.evicted_hashes, report.epoch, report.seq)
     return {"status": "ok"}
 
+def unpack_hashes(data: bytes) -> List[int]:
+    """Decode a packed body of little-endian uint64 hashes."""
+    hashes = array("Q", data)
+    if sys.byteorder == "big":
+        hashes.byteswap()
+    return hashes.tolist()
+
+@app.post("/internal/eviction/packed")
+async def report_eviction_packed(worker_id: str, request: Request,
+                                 epoch: Optional[int] = None, seq: Optional[int] = None):
+    """
+    Endpoint for workers to report evicted blocks as a raw body of
+    little-endian uint64 hashes, 8 bytes each instead of ~20 as JSON.
+    epoch and seq are as in EvictionReport.
+    """
+    body = await request.body()
+    if len(body) % 8:
+        raise HTTPException(status_code=400, detail="Body length must be a multiple of 8")
+    queue_evictions(worker_id, unpack_hashes(body), epoch, seq)
+    return {"status": "ok"}
+
+def bloom_matches(hashes: List[int], bloom: bytes, k: int) -> List[int]:
+    """
+    Return the hashes the Bloom filter may contain. Bit i of the filter is
+    bit i % 8 of byte i // 8; a hash sets bits (lo + j * hi) % m for j < k,
+    where lo and hi are its low and high 32 bits and m is the filter size in bits.
+    """
+    if not hashes:
+        return []
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    bits = np.frombuffer(bloom, dtype=np.uint8)
+    m = np.uint64(len(bloom) * 8)
+    lo = values & np.uint64(0xFFFFFFFF)
+    hi = values >> np.uint64(32)
+    hit = np.ones(len(values), dtype=bool)
+    for j in range(k):
+        idx = (lo + np.uint64(j) * hi) % m
+        hit &= (bits[idx >> np.uint64(3)] >> (idx & np.uint64(7)).astype(np.uint8)) & 1 == 1
+    return values[hit].tolist()
+
+@app.post("/internal/eviction/bloom")
+async def report_eviction_bloom(worker_id: str, k: int, count: int, request: Request,
+                                epoch: Optional[int] = None, seq: Optional[int] = None):
+    """
+    Endpoint for mass evictions: the body is a Bloom filter (see bloom_matches)
+    of `count` evicted hashes, so its size doesn't grow with one hash per block.
+    Every hash recorded for the worker that the filter may contain is evicted;
+    a false positive only costs a MISS until the worker caches the block again.
+    """
+    bloom = await request.body()
+    if not bloom or not 0 < k <= 32:
+        raise HTTPException(status_code=400, detail="Expected a non-empty filter and 0 < k <= 32")
+    matches = bloom_matches(cache_map.get_hashes_for_worker(worker_id), bloom, k)
+    queue_evictions(worker_id, matches, epoch, seq)
+    logger.info(f"🌸 BLOOM EVICTION: {worker_id} reported {count} hashes, {len(matches)} matched")
+    return {"status": "ok", "matched": len(matches)}
+
+@app.post("/internal/eviction/prefix")
+async def report_eviction_prefix(worker_id: str, request: Request,
+                                 epoch: Optional[int] = None, seq: Optional[int] = None):
+    """
+    Endpoint for evicting a whole cached sequence tail at once: the body is
+    little-endian uint64 (prefix_hash, depth) pairs, and everything the worker
+    has cached from block `depth` on, where that block is prefix_hash, is
+    evicted (see GlobalCacheMap.evict_prefixes). epoch and seq are as in EvictionReport.
+    """
+    body = await request.body()
+    if len(body) % 16:
+        raise HTTPException(status_code=400, detail="Body length must be a multiple of 16")
+    values = unpack_hashes(body)
+    prefixes = list(zip(values[0::2], values[1::2]))
+    if seq is not None:
+        fresh = set(drop_stale_evictions(worker_id, [p for p, _ in prefixes], epoch or 0, seq))
+        prefixes = [(p, d) for p, d in prefixes if p in fresh]
+    apply_pending_evictions()  # Queued reports came first
+    evicted = cache_map.evict_prefixes(worker_id, prefixes)
+    logger.info(f"✂️  PREFIX EVICTION: {worker_id} cut {len(prefixes)} prefixes, {len(evicted)} hashes")
+    return {"status": "ok", "evicted": len(evicted)}
+
+@app.post("/internal/eviction/stream")
+async def report_eviction_stream(worker_id: str, request: Request):
+    """
+    Long-lived version of /internal/eviction/packed: the worker keeps one
+    chunked upload open and the hashes in each chunk are applied as it
+    arrives. An empty body is answered straight away (capability probe).
+    """
+    leftover = b""
+    applied = 0
+    async for chunk in request.stream():
+        data = leftover + chunk
+        whole = len(data) - len(data) % 8  # A hash can straddle two chunks
+        leftover = data[whole:]
+        if whole:
+            hashes = unpack_hashes(data[:whole])
+            queue_evictions(worker_id, hashes)
+            applied += len(hashes)
+    return {"status": "ok", "applied": applied}
+
 @app.post("/internal/heartbeat")
 async def heartbeat(hb: Heartbeat):
-    """Endpoint for workers to report load."""
+    """Endpoint for workers to report load, plus any evictions since the last heartbeat."""
     cache_map.update_load(hb.worker_id, hb.current_load)
+    if hb.evicted_hashes:
+        queue_evictions(hb.worker_id, hb.evicted_hashes)
     
     # Store worker URL for proxy mode
     if hb.worker_url:
@@ -164,7 +375,14 @@ async def heartbeat(hb: Heartbeat):
 
 class SyncReport(BaseModel):
     worker_id: str
-    active_hashes: List[str]
+    active_hashes: List[int]
+    seq: Optional[int] = None  # Baseline for following delta syncs
+
+class SyncDelta(BaseModel):
+    worker_id: str
+    seq: int
+    added: List[int]
+    removed: List[int]
 
 @app.post("/internal/sync")
 async def sync_state(report: SyncReport):
@@ -172,9 +390,72 @@ async def sync_state(report: SyncReport):
     Endpoint for workers to fully reconcile their cache state.
     This fixes the 'Phantom Cache' problem by removing stale entries.
     """
-    cache_map.sync_worker_state(report.worker_id, report.active_hashes)
+    apply_pending_evictions()  # Older eviction reports must not undo this snapshot
+    cache_map.sync_worker_state(report.worker_id, report.active_hashes, report.seq)
     logger.info(f"🔄 SYNC: {report.worker_id} reported {len(report.active_hashes)} active hashes")
     return {"status": "ok"}
 
+@app.post("/internal/sync_delta")
+async def sync_delta(delta: SyncDelta):
+    """
+    Endpoint for workers to send only the hashes added/removed since their last sync.
+    Replies "resync" if a sync was missed; the worker then sends a full snapshot.
+    """
+    apply_pending_evictions()
+    if not cache_map.apply_sync_delta(delta.worker_id, delta.seq, delta.added, delta.removed):
+        logger.warning(f"⚠️  SYNC DELTA: {delta.worker_id} seq {delta.seq} out of order, requesting full sync")
+        return {"status": "resync"}
+    logger.info(f"🔄 SYNC DELTA: {delta.worker_id} +{len(delta.added)} -{len(delta.removed)} hashes")
+    return {"status": "ok"}
+
+class BatchItem(BaseModel):
+    op: str  # heartbeat, sync, sync_delta, eviction
+    payload: Dict[str, Any]
+
+# Control-plane operations accepted by /internal/batch: op -> (request model, handler)
+BATCH_OPS = {
+    "heartbeat": (Heartbeat, heartbeat),
+    "sync": (SyncReport, sync_state),
+    "sync_delta": (SyncDelta, sync_delta),
+    "eviction": (EvictionReport, report_eviction),
+}
+
+@app.post("/internal/batch")
+async def batch(items: List[BatchItem]):
+    """
+    Endpoint for sending several control-plane calls in one round trip.
+    Every item is validated first, then they run in order through the regular handlers.
+    """
+    calls = []
+    for i, item in enumerate(items):
+        if item.op not in BATCH_OPS:
+            raise HTTPException(status_code=400, detail=f"Item {i}: unknown op '{item.op}'")
+        model, handler = BATCH_OPS[item.op]
+        try:
+            calls.append((handler, model(**item.payload)))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Item {i} ({item.op}): {e}")
+    
+    results = [await handler(request) for handler, request in calls]
+    logger.info(f"📦 BATCH: ran {len(results)} control-plane operations")
+    return {"status": "ok", "results": results}
+
+@app.get("/internal/stats")
+async def get_stats():
+    """
+    Lightweight monitoring endpoint with the router's own routing counters.
+    Lets dashboards observe the cache without sending completions of their own.
+    """
+    total = routing_stats["hits"] + routing_stats["misses"]
+    latencies = sorted(routing_latencies)
+    return {
+        "total_requests": total,
+        "hits": routing_stats["hits"],
+        "misses": routing_stats["misses"],
+        "avg_match": routing_stats["match_sum"] / total if total else 0,
+        "worker_counts": dict(worker_counts),
+        "p95_latency": latencies[int(len(latencies) * 0.95)] if latencies else 0,  # Routing decision time, ms
+    }
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -5,6 +5,11 @@ from typing import List, Tuple, Dict
 # vLLM block configuration
 BLOCK_SIZE = 16  # tokens per block
 
+
+def _hash64(token_ids: tuple) -> int:
+    """SHA-256 of the token IDs truncated to an unsigned 64-bit int, the block/prefix hash used everywhere."""
+    return int.from_bytes(hashlib.sha256(str(token_ids).encode()).digest()[:8], "little")
+
 class TokenizerUtils:
     def __init__(self, model_name: str = "gpt2"):
         # In a real scenario, this would be the actual model path or name
@@ -17,9 +22,9 @@ class TokenizerUtils:
         """Tokenize text and return token IDs."""
         return self.tokenizer.encode(text, add_special_tokens=False)
 
-    def compute_prefix_hash(self, text: str, prefix_len: int = None) -> str:
+    def compute_prefix_hash(self, text: str, prefix_len: int = None) -> int:
         """
-        Computes a SHA-256 hash of the token IDs for the given text.
+        Computes a 64-bit hash of the token IDs for the given text.
         If prefix_len is provided, only hashes the first prefix_len tokens.
         """
         token_ids = self.tokenize(text)
@@ -28,15 +33,18 @@ class TokenizerUtils:
         
         # Create a stable tuple for hashing
         stable_prefix = tuple(token_ids)
-        return hashlib.sha256(str(stable_prefix).encode()).hexdigest()
+        return _hash64(stable_prefix)
     
-    def compute_block_hashes(self, text: str) -> List[str]:
+    def compute_block_hashes(self, text: str) -> List[int]:
         """
         Compute hashes for each block of 16 tokens.
         vLLM caches only full blocks, so we hash each block separately.
         Returns list of block hashes.
         """
-        token_ids = self.tokenize(text)
+        return self.hash_blocks(self.tokenize(text))
+    
+    def hash_blocks(self, token_ids: List[int]) -> List[int]:
+        """Hash each full block of BLOCK_SIZE token IDs; a trailing partial block is dropped."""
         block_hashes = []
         
         # Process in blocks of 16 tokens
@@ -45,12 +53,18 @@ class TokenizerUtils:
             # Only hash full blocks (vLLM doesn't cache partial blocks)
             if len(block_tokens) == BLOCK_SIZE:
                 # Create stable hash for this block
-                block_tuple = tuple(block_tokens)
-                block_hash = hashlib.sha256(str(block_tuple).encode()).hexdigest()
-                block_hashes.append(block_hash)
+                block_hashes.append(_hash64(tuple(block_tokens)))
         
         return block_hashes
     
+    def tokenize_with_offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        """
+        Tokenize text and also return, for each token, the character offset
+        in text where that token ends.
+        """
+        encoding = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return encoding["input_ids"], [end for _, end in encoding["offset_mapping"]]
+    
     def get_num_blocks(self, text: str) -> int:
         """Get the number of full blocks for a given text."""
         token_ids = self.tokenize(text)
@@ -0,0 +1,208 @@
+"""
+Shared aiohttp client for the scripts that talk to the router.
+
+A single pooled ClientSession is created lazily and reused for every request,
+so connections to the router stay open between calls instead of paying TCP
+setup per request. Call close_session() once before the event loop exits.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from time import perf_counter_ns
+from typing import Optional, Union
+
+import aiohttp
+from yarl import URL
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # Not available on Windows
+
+ROUTER_URL = "http://localhost:8000"
+# Endpoints parsed once up front; aiohttp uses a yarl.URL as-is instead of re-parsing a string
+_ROUTER = URL(ROUTER_URL)
+COMPLETIONS_URL = _ROUTER / "v1" / "completions"
+DOCS_URL = _ROUTER / "docs"
+HEARTBEAT_URL = _ROUTER / "internal" / "heartbeat"
+SYNC_URL = _ROUTER / "internal" / "sync"
+SYNC_DELTA_URL = _ROUTER / "internal" / "sync_delta"
+EVICTION_URL = _ROUTER / "internal" / "eviction"
+BATCH_URL = _ROUTER / "internal" / "batch"
+STATS_URL = _ROUTER / "internal" / "stats"
+
+POOL_LIMIT = 200  # Max pooled keep-alive connections overall
+POOL_LIMIT_PER_HOST = 64  # All traffic goes to one router, so this is the real ceiling
+HEALTH_CHECK_TIMEOUT = aiohttp.ClientTimeout(total=2)
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+_session: Optional[aiohttp.ClientSession] = None
+_stdin_pending = b""  # Bytes read past the last line returned by ainput()
+
+
+def dump_json(payload) -> bytes:
+    """Serialize a request body to JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+
+def dumps_json(payload) -> str:
+    """dump_json() as str, for aiohttp's json_serialize hook behind session.post(json=...)."""
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload)
+
+
+def load_json(body: bytes):
+    """Parse a JSON response body, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def write_json_file(filename: str, data):
+    """Write data to filename as indented JSON, using orjson when available."""
+    if orjson is not None:
+        with open(filename, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(filename, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+def write_ndjson_file(filename: str, records):
+    """Write one compact JSON document per line, streaming records to disk."""
+    with open(filename, "wb") as f:
+        f.writelines(dump_json(record) + b"\n" for record in records)
+
+
+async def send_completion(session: aiohttp.ClientSession, prompt: Union[str, bytes],
+                          max_tokens: int = 50, routing_only: bool = False) -> dict:
+    """
+    POST one completion request to the router and return the parsed response.
+    `prompt` may also be a request body already encoded with dump_json(), for callers
+    that resend the same payloads. The round-trip time is added as "_latency_ms".
+    With routing_only, only assigned_worker/cache_status/match_length are returned,
+    taken from the router's X-* headers when present so the body isn't parsed.
+    Raises aiohttp.ClientResponseError on a non-2xx status.
+    """
+    body = prompt if isinstance(prompt, bytes) else dump_json({"prompt": prompt, "max_tokens": max_tokens})
+    start = perf_counter_ns()
+    async with session.post(COMPLETIONS_URL, data=body, headers=JSON_HEADERS) as resp:
+        resp.raise_for_status()
+        raw = await resp.read()  # Read even when unused so the connection goes back to the pool
+        headers = resp.headers
+        if routing_only and "X-Cache-Status" in headers:
+            data = {
+                "assigned_worker": headers.get("X-Assigned-Worker", "UNKNOWN"),
+                "cache_status": headers["X-Cache-Status"],
+                "match_length": int(headers.get("X-Match-Length", 0)),
+            }
+        else:
+            data = load_json(raw)
+    data["_latency_ms"] = (perf_counter_ns() - start) / 1_000_000
+    return data
+
+
+async def check_router(session: aiohttp.ClientSession,
+                       timeout: aiohttp.ClientTimeout = HEALTH_CHECK_TIMEOUT) -> bool:
+    """
+    Return True if the router answers HEAD /docs with 200.
+    The connection it opens stays in the session's pool for the requests that follow.
+    """
+    try:
+        async with session.head(DOCS_URL, timeout=timeout) as resp:
+            return resp.status == 200
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return False
+
+
+def install_uvloop():
+    """Make asyncio.run() use uvloop's faster event loop when it is installed."""
+    if uvloop is not None:
+        uvloop.install()
+
+
+async def get_session(limit: int = POOL_LIMIT, limit_per_host: int = POOL_LIMIT_PER_HOST) -> aiohttp.ClientSession:
+    """
+    Return the shared session, creating it on first use.
+    The pool sizes only take effect when this call creates the session.
+    """
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=limit_per_host,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+                force_close=False,
+                keepalive_timeout=75,
+            ),
+            timeout=aiohttp.ClientTimeout(total=10, connect=2, sock_read=8),
+            json_serialize=dumps_json,
+        )
+    return _session
+
+
+async def close_session():
+    """Close the shared session if one was created."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def _read_stdin_line() -> str:
+    """Read one line from stdin with os.read, so a blocked read holds no interpreter locks."""
+    global _stdin_pending
+    fd = sys.stdin.fileno()
+    while b"\n" not in _stdin_pending:
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            if not _stdin_pending:
+                raise EOFError
+            break
+        _stdin_pending += chunk
+    line, _, _stdin_pending = _stdin_pending.partition(b"\n")
+    return line.decode().rstrip("\r")
+
+
+async def ainput(prompt: str = "") -> str:
+    """
+    input() that doesn't block the event loop.
+    The read runs on a daemon thread rather than the default executor, so Ctrl+C at a
+    prompt still exits instead of waiting for a line that will never be entered.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def resolve(result, error):
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
+    def read():
+        try:
+            result, error = _read_stdin_line(), None
+        except BaseException as e:  # EOFError belongs to the awaiting task
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(resolve, result, error)
+        except RuntimeError:
+            pass  # Loop already closed
+    
+    print(prompt, end="", flush=True)
+    threading.Thread(target=read, daemon=True).start()
+    return await future
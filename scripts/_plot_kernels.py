@@ -0,0 +1,56 @@
+"""
+Numeric kernels shared by the plotting scripts.
+
+Uses numba when it is installed; otherwise falls back to plain NumPy so the
+plotting scripts keep working without the JIT dependency.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange, get_num_threads
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _tally_numba(is_hit, widx, hits, misses):
+        # Each chunk accumulates into its own row so parallel iterations never
+        # write the same counter; rows are merged after the parallel loop.
+        n = is_hit.shape[0]
+        num_chunks = get_num_threads()
+        chunk = (n + num_chunks - 1) // num_chunks
+        local_hits = np.zeros((num_chunks, hits.shape[0]), dtype=np.int64)
+        local_misses = np.zeros((num_chunks, misses.shape[0]), dtype=np.int64)
+        for c in prange(num_chunks):
+            for i in range(c * chunk, min(n, (c + 1) * chunk)):
+                w = widx[i]
+                if is_hit[i]:
+                    local_hits[c, w] += 1
+                else:
+                    local_misses[c, w] += 1
+        for c in range(num_chunks):
+            for w in range(hits.shape[0]):
+                hits[w] += local_hits[c, w]
+                misses[w] += local_misses[c, w]
+
+
+def tally_hits_by_worker(is_hit, widx, num_workers):
+    """
+    Count cache hits and misses per worker.
+    is_hit is a bool array and widx an int32 array of worker indices, one
+    entry per request. Returns (hits, misses) as int64 arrays of num_workers.
+    """
+    is_hit = np.ascontiguousarray(is_hit, dtype=np.bool_)
+    widx = np.ascontiguousarray(widx, dtype=np.int32)
+    hits = np.zeros(num_workers, dtype=np.int64)
+    misses = np.zeros(num_workers, dtype=np.int64)
+
+    if njit is not None:
+        _tally_numba(is_hit, widx, hits, misses)
+    else:
+        np.add.at(hits, widx[is_hit], 1)
+        np.add.at(misses, widx[~is_hit], 1)
+
+    return hits, misses
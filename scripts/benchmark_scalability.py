@@ -43,11 +43,11 @@ async def send_request(session: aiohttp.ClientSession, request_id: int) -> float
     prompt = f"Request {request_id}: The quick brown fox jumps over the lazy dog."
     payload = {"prompt": prompt, "prefix_len": 10}
     
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     try:
         async with session.post(f"{ROUTER_URL}/v1/completions", json=payload) as resp:
             await resp.json()
-            latency = (time.time() - start_time) * 1000  # Convert to ms
+            latency = (time.perf_counter_ns() - start_time) / 1_000_000  # Convert to ms
             return latency
     except Exception as e:
         logger.error(f"Request {request_id} failed: {e}")
@@ -56,7 +56,7 @@ class StaleCacheSimulator:
         await session.post(f"{ROUTER_URL}/internal/heartbeat", json=payload)
         logger.info(f"[OK] Registered {WORKER_ID}")
     
-    async def cache_prefix(self, session: aiohttp.ClientSession, prompt: str, prefix_len: int) -> str:
+    async def cache_prefix(self, session: aiohttp.ClientSession, prompt: str, prefix_len: int) -> int:
         """Simulate caching a prefix and return its hash."""
         prefix_hash = self.tokenizer.compute_prefix_hash(prompt, prefix_len)
         self.active_hashes.add(prefix_hash)
@@ -65,10 +65,10 @@ class StaleCacheSimulator:
         payload = {"prompt": prompt, "prefix_len": prefix_len}
         await session.post(f"{ROUTER_URL}/v1/completions", json=payload)
         
-        logger.info(f"[CACHE] Cached prefix: {prefix_hash[:8]}...")
+        logger.info(f"[CACHE] Cached prefix: {prefix_hash >> 32:08x}...")
         return prefix_hash
     
-    async def evict_prefix(self, session: aiohttp.ClientSession, prefix_hash: str, send_report: bool = True):
+    async def evict_prefix(self, session: aiohttp.ClientSession, prefix_hash: int, send_report: bool = True):
         """Evict a prefix (optionally without reporting)."""
         self.active_hashes.discard(prefix_hash)
         
@@ -76,12 +76,12 @@ class StaleCacheSimulator:
             # Normal eviction: send report
             payload = {"worker_id": WORKER_ID, "evicted_hashes": [prefix_hash]}
             await session.post(f"{ROUTER_URL}/internal/eviction", json=payload)
-            logger.info(f"[EVICT] Evicted {prefix_hash[:8]}... (reported)")
+            logger.info(f"[EVICT] Evicted {prefix_hash >> 32:08x}... (reported)")
         else:
             # Crash simulation: evict locally but don't report
-            logger.warning(f"[CRASH] Evicted {prefix_hash[:8]}... (NOT reported)")
+            logger.warning(f"[CRASH] Evicted {prefix_hash >> 32:08x}... (NOT reported)")
     
-    async def check_routing(self, session: aiohttp.ClientSession, prompt: str, prefix_len: int) -> str:
+    async def check_routing(self, session: aiohttp.ClientSession, prompt: str, prefix_len: int) -> int:
         """Send request and check which worker was assigned."""
         payload = {"prompt": prompt, "prefix_len": prefix_len}
         async with session.post(f"{ROUTER_URL}/v1/completions", json=payload) as resp:
@@ -121,13 +121,13 @@ async def run_benchmark():
         # Phase 4: Measure false hit window
         logger.info("\n--- Phase 3: Measure False Hit Window ---")
         false_hits = 0
-        start_time = time.time()
+        start_time = time.perf_counter()
         recovery_time = None
         
         for i in range(15):  # Check for 15 seconds (3x sync interval)
             await asyncio.sleep(1)
             worker, status = await simulator.check_routing(session, prompt, prefix_len)
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             
             if status == "HIT":
                 false_hits += 1
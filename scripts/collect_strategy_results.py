@@ -5,18 +5,21 @@ Run this after starting the router with a specific strategy.
 import asyncio
 import aiohttp
 import logging
-import json
 import time
 from typing import Dict
-from collections import defaultdict
+from collections import Counter
 import os
 import sys
+import numpy as np
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-ROUTER_URL = "http://localhost:8000"
+from _client import (
+    COMPLETIONS_URL, check_router, ainput, load_json, get_session, close_session, install_uvloop,
+    write_json_file,
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("CollectResults")
@@ -31,23 +34,23 @@ async def detect_strategy() -> str:
     
     # Try to infer from router response
     try:
-        async with aiohttp.ClientSession() as session:
-            # Send a test request
-            async with session.post(
-                f"{ROUTER_URL}/v1/completions",
-                json={"prompt": "test", "max_tokens": 5},
-                timeout=aiohttp.ClientTimeout(total=5)
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    cache_status = data.get("cache_status", "")
-                    match_length = data.get("match_length", 0)
-                    
-                    # If it reports cache hits, it's cache_aware
-                    if cache_status == "HIT" or (cache_status == "MISS" and match_length == 0):
-                        # Can't distinguish round_robin from least_loaded from one request
-                        # Default to asking user
-                        return None
+        session = await get_session()
+        # Send a test request
+        async with session.post(
+            COMPLETIONS_URL,
+            json={"prompt": "test", "max_tokens": 5},
+            timeout=aiohttp.ClientTimeout(total=5)
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json(loads=load_json)
+                cache_status = data.get("cache_status", "")
+                match_length = data.get("match_length", 0)
+                
+                # If it reports cache hits, it's cache_aware
+                if cache_status == "HIT" or (cache_status == "MISS" and match_length == 0):
+                    # Can't distinguish round_robin from least_loaded from one request
+                    # Default to asking user
+                    return None
     except:
         pass
     
@@ -68,7 +71,7 @@ async def collect_results(strategy_name: str, num_requests: int = 50, warmup: in
         "latencies": [],
         "hit_latencies": [],
         "miss_latencies": [],
-        "worker_distribution": defaultdict(int),
+        "worker_distribution": Counter(),
         "match_lengths": [],
     }
     
@@ -86,87 +89,86 @@ async def collect_results(strategy_name: str, num_requests: int = 50, warmup: in
         "Explain the methodology.",
     ]
     
-    async with aiohttp.ClientSession() as session:
-        # Check if router is running
+    session = await get_session()
+    # Check if router is running
+    if not await check_router(session):
+        logger.error("Router is not responding. Make sure it's running on port 8000.")
+        logger.error("Make sure router is running: python -m router.main")
+        return None
+    
+    # Warmup phase (to populate cache for cache-aware strategy)
+    logger.info(f"Warmup phase ({warmup} requests)...")
+    for i in range(warmup):
+        prompt = shared_contexts[i % len(shared_contexts)] + user_queries[i % len(user_queries)]
         try:
-            async with session.get(f"{ROUTER_URL}/docs", timeout=aiohttp.ClientTimeout(total=2)) as resp:
-                if resp.status != 200:
-                    logger.error("Router is not responding. Make sure it's running on port 8000.")
-                    return None
-        except Exception as e:
-            logger.error(f"Cannot connect to router: {e}")
-            logger.error("Make sure router is running: python -m router.main")
-            return None
-        
-        # Warmup phase (to populate cache for cache-aware strategy)
-        logger.info(f"Warmup phase ({warmup} requests)...")
-        for i in range(warmup):
+            async with session.post(
+                COMPLETIONS_URL,
+                json={"prompt": prompt, "max_tokens": 30},
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as resp:
+                await resp.json(loads=load_json)
+        except:
+            pass
+        await asyncio.sleep(0.1)
+    
+    logger.info(f"Main collection phase ({num_requests} requests)...")
+    # Main collection phase
+    for i in range(num_requests):
+        # Mix: 70% shared prefix (for cache hits), 30% unique
+        if i % 3 != 0:  # 2 out of 3 use shared context
             prompt = shared_contexts[i % len(shared_contexts)] + user_queries[i % len(user_queries)]
-            try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": prompt, "max_tokens": 30},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    await resp.json()
-            except:
-                pass
-            await asyncio.sleep(0.1)
+        else:
+            prompt = f"Unique document {i}. " * 5 + user_queries[i % len(user_queries)]
         
-        logger.info(f"Main collection phase ({num_requests} requests)...")
-        # Main collection phase
-        for i in range(num_requests):
-            # Mix: 70% shared prefix (for cache hits), 30% unique
-            if i % 3 != 0:  # 2 out of 3 use shared context
-                prompt = shared_contexts[i % len(shared_contexts)] + user_queries[i % len(user_queries)]
-            else:
-                prompt = f"Unique document {i}. " * 5 + user_queries[i % len(user_queries)]
-            
-            start = time.time()
-            try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": prompt, "max_tokens": 30},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        latency = (time.time() - start) * 1000
-                        
-                        cache_status = data.get("cache_status", "UNKNOWN")
-                        match_length = data.get("match_length", 0)
-                        worker = data.get("assigned_worker", "UNKNOWN")
-                        
-                        results["latencies"].append(latency)
-                        results["match_lengths"].append(match_length)
-                        results["worker_distribution"][worker] += 1
-                        
-                        if cache_status == "HIT":
-                            results["cache_hits"] += 1
-                            results["hit_latencies"].append(latency)
-                        else:
-                            results["cache_misses"] += 1
-                            results["miss_latencies"].append(latency)
-                        
-                        if (i + 1) % 10 == 0:
-                            logger.info(f"  Progress: {i+1}/{num_requests} requests")
+        start = time.perf_counter_ns()
+        try:
+            async with session.post(
+                COMPLETIONS_URL,
+                json={"prompt": prompt, "max_tokens": 30},
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(loads=load_json)
+                    latency = (time.perf_counter_ns() - start) / 1_000_000
+                    
+                    cache_status = data.get("cache_status", "UNKNOWN")
+                    match_length = data.get("match_length", 0)
+                    worker = data.get("assigned_worker", "UNKNOWN")
+                    
+                    results["latencies"].append(latency)
+                    results["match_lengths"].append(match_length)
+                    results["worker_distribution"][worker] += 1
+                    
+                    if cache_status == "HIT":
+                        results["cache_hits"] += 1
+                        results["hit_latencies"].append(latency)
                     else:
-                        logger.warning(f"Request {i} failed: {resp.status}")
-            except Exception as e:
-                logger.warning(f"Request {i} error: {e}")
-            
-            await asyncio.sleep(0.1)
+                        results["cache_misses"] += 1
+                        results["miss_latencies"].append(latency)
+                    
+                    if (i + 1) % 10 == 0:
+                        logger.info(f"  Progress: {i+1}/{num_requests} requests")
+                else:
+                    logger.warning(f"Request {i} failed: {resp.status}")
+        except Exception as e:
+            logger.warning(f"Request {i} error: {e}")
+        
+        await asyncio.sleep(0.1)
     
     # Calculate statistics
     if results["latencies"]:
-        results["avg_latency"] = sum(results["latencies"]) / len(results["latencies"])
-        results["min_latency"] = min(results["latencies"])
-        results["max_latency"] = max(results["latencies"])
-        sorted_lat = sorted(results["latencies"])
-        results["p50_latency"] = sorted_lat[len(sorted_lat)//2]
-        if len(sorted_lat) > 10:
-            results["p95_latency"] = sorted_lat[int(len(sorted_lat)*0.95)]
-            results["p99_latency"] = sorted_lat[int(len(sorted_lat)*0.99)]
+        lat = np.asarray(results["latencies"], dtype=np.float64)
+        n = len(lat)
+        # One np.partition places min, p50, p95, p99 and max together
+        ranks = [0, n // 2, int(n * 0.95), int(n * 0.99), n - 1]
+        lo, p50, p95, p99, hi = np.partition(lat, ranks)[ranks]
+        results["avg_latency"] = float(lat.mean())
+        results["min_latency"] = float(lo)
+        results["max_latency"] = float(hi)
+        results["p50_latency"] = float(p50)
+        if n > 10:
+            results["p95_latency"] = float(p95)
+            results["p99_latency"] = float(p99)
     
     if results["hit_latencies"]:
         results["avg_hit_latency"] = sum(results["hit_latencies"]) / len(results["hit_latencies"])
@@ -176,13 +178,13 @@ async def collect_results(strategy_name: str, num_requests: int = 50, warmup: in
     results["hit_rate"] = (results["cache_hits"] / num_requests * 100) if num_requests > 0 else 0
     results["avg_match_length"] = sum(results["match_lengths"]) / len(results["match_lengths"]) if results["match_lengths"] else 0
     
-    # Convert defaultdict to dict for JSON
-    results["worker_distribution"] = dict(results["worker_distribution"])
+    # Plain dict for JSON, busiest worker first
+    results["worker_distribution"] = dict(results["worker_distribution"].most_common())
     
     return results
 
 
-async def main():
+async def run_collection():
     """Main collection function."""
     logger.info("""
 ╔══════════════════════════════════════════════════════════════════════════════╗
@@ -204,23 +206,23 @@ Make sure:
         logger.info("  1. cache_aware")
         logger.info("  2. round_robin")
         logger.info("  3. least_loaded")
-        strategy = input("\nEnter strategy name: ").strip().lower()
+        strategy = (await ainput("\nEnter strategy name: ")).strip().lower()
         
         if strategy not in ["cache_aware", "round_robin", "least_loaded"]:
             logger.error(f"Invalid strategy: {strategy}")
             return
     else:
         logger.info(f"\nDetected strategy: {strategy}")
-        confirm = input("Is this correct? (y/n): ").strip().lower()
+        confirm = (await ainput("Is this correct? (y/n): ")).strip().lower()
         if confirm != 'y':
             logger.info("  1. cache_aware")
             logger.info("  2. round_robin")
             logger.info("  3. least_loaded")
-            strategy = input("\nEnter strategy name: ").strip().lower()
+            strategy = (await ainput("\nEnter strategy name: ")).strip().lower()
     
     # Get number of requests
     try:
-        num_req = input("\nNumber of requests to collect (default 50): ").strip()
+        num_req = (await ainput("\nNumber of requests to collect (default 50): ")).strip()
         num_requests = int(num_req) if num_req else 50
     except:
         num_requests = 50
@@ -229,37 +231,37 @@ Make sure:
     
     # Verify workers are registered
     logger.info("Checking for registered workers...")
-    async with aiohttp.ClientSession() as session:
-        workers_found = False
-        for attempt in range(5):  # Try up to 5 times
-            try:
-                # Send a test request to see if workers are registered
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": "test", "max_tokens": 1},
-                    timeout=aiohttp.ClientTimeout(total=3)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        worker = data.get("assigned_worker")
-                        if worker and worker != "UNKNOWN":
-                            workers_found = True
-                            logger.info(f"✅ Workers registered! Found worker: {worker}")
-                            break
-            except:
-                pass
-            
-            if not workers_found:
-                logger.info(f"   Waiting for workers... (attempt {attempt + 1}/5)")
-                await asyncio.sleep(1)
+    session = await get_session()
+    workers_found = False
+    for attempt in range(5):  # Try up to 5 times
+        try:
+            # Send a test request to see if workers are registered
+            async with session.post(
+                COMPLETIONS_URL,
+                json={"prompt": "test", "max_tokens": 1},
+                timeout=aiohttp.ClientTimeout(total=3)
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(loads=load_json)
+                    worker = data.get("assigned_worker")
+                    if worker and worker != "UNKNOWN":
+                        workers_found = True
+                        logger.info(f"✅ Workers registered! Found worker: {worker}")
+                        break
+        except:
+            pass
         
         if not workers_found:
-            logger.warning("⚠️  No workers detected. They may still be registering.")
-            logger.warning("   If collection fails, wait a bit longer and try again.")
-            response = input("\nContinue anyway? (y/n): ").strip().lower()
-            if response != 'y':
-                logger.info("Collection cancelled.")
-                return
+            logger.info(f"   Waiting for workers... (attempt {attempt + 1}/5)")
+            await asyncio.sleep(1)
+    
+    if not workers_found:
+        logger.warning("⚠️  No workers detected. They may still be registering.")
+        logger.warning("   If collection fails, wait a bit longer and try again.")
+        response = (await ainput("\nContinue anyway? (y/n): ")).strip().lower()
+        if response != 'y':
+            logger.info("Collection cancelled.")
+            return
     
     # Collect results
     results = await collect_results(strategy, num_requests=num_requests, warmup=10)
@@ -270,8 +272,7 @@ Make sure:
     
     # Save results
     output_file = f"results_{strategy}.json"
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2)
+    write_json_file(output_file, results)
     
     # Display summary
     logger.info(f"\n{'='*70}")
@@ -301,7 +302,15 @@ Make sure:
     logger.info("="*70)
 
 
+async def main():
+    try:
+        await run_collection()
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
+    install_uvloop()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
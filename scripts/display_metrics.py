@@ -5,17 +5,17 @@ Displays current system state, performance metrics, and cache statistics.
 import asyncio
 import aiohttp
 import time
-import json
 from collections import defaultdict
 from typing import Dict, List
 import os
 import sys
+import numpy as np
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-ROUTER_URL = "http://localhost:8000"
+from _client import COMPLETIONS_URL, ainput, load_json, install_uvloop, write_json_file
 
 
 class MetricsCollector:
@@ -40,16 +40,16 @@ class MetricsCollector:
     async def send_test_request(self, prompt: str) -> Dict:
         """Send a test request and collect metrics."""
         async with aiohttp.ClientSession() as session:
-            start = time.time()
+            start = time.perf_counter_ns()
             try:
                 async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
+                    COMPLETIONS_URL,
                     json={"prompt": prompt, "max_tokens": 50},
                     timeout=aiohttp.ClientTimeout(total=10)
                 ) as resp:
                     if resp.status == 200:
-                        data = await resp.json()
-                        latency = (time.time() - start) * 1000
+                        data = await resp.json(loads=load_json)
+                        latency = (time.perf_counter_ns() - start) / 1_000_000
                         
                         result = {
                             "timestamp": time.time(),
@@ -84,18 +84,20 @@ class MetricsCollector:
         
         # Request statistics
         if self.request_history:
-            latencies = [r["latency_ms"] for r in self.request_history if "latency_ms" in r]
-            if latencies:
+            latencies = np.fromiter(
+                (r["latency_ms"] for r in self.request_history if "latency_ms" in r), dtype=np.float64
+            )
+            n = len(latencies)
+            if n:
+                # One np.partition places min, p50, p95, p99 and max together
+                ranks = [0, n // 2, int(n * 0.95), int(n * 0.99), n - 1]
+                lo, p50, p95, p99, hi = np.partition(latencies, ranks)[ranks]
                 print(f"\n📊 Request Statistics:")
                 print(f"   Total Requests:    {len(self.request_history)}")
-                print(f"   Average Latency:   {sum(latencies)/len(latencies):.2f} ms")
-                print(f"   Min Latency:       {min(latencies):.2f} ms")
-                print(f"   Max Latency:       {max(latencies):.2f} ms")
-                if len(latencies) > 1:
-                    sorted_lat = sorted(latencies)
-                    p50 = sorted_lat[len(sorted_lat)//2]
-                    p95 = sorted_lat[int(len(sorted_lat)*0.95)]
-                    p99 = sorted_lat[int(len(sorted_lat)*0.99)]
+                print(f"   Average Latency:   {latencies.mean():.2f} ms")
+                print(f"   Min Latency:       {lo:.2f} ms")
+                print(f"   Max Latency:       {hi:.2f} ms")
+                if n > 1:
                     print(f"   p50 Latency:       {p50:.2f} ms")
                     print(f"   p95 Latency:       {p95:.2f} ms")
                     print(f"   p99 Latency:       {p99:.2f} ms")
@@ -132,8 +134,7 @@ class MetricsCollector:
             "recent_requests": self.request_history[-10:],  # Last 10
         }
         
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+        write_json_file(filename, data)
         
         print(f"\n💾 Metrics exported to {filename}")
 
@@ -155,7 +156,7 @@ Commands:
 
 Press Enter to start...
     """)
-    input()
+    await ainput()
     
     test_prompts = [
         "The quick brown fox jumps over the lazy dog.",
@@ -165,12 +166,12 @@ Press Enter to start...
     
     while True:
         try:
-            cmd = input("\n> ").strip().lower()
+            cmd = (await ainput("\n> ")).strip().lower()
             
             if cmd == "q" or cmd == "quit":
                 break
             elif cmd == "s" or cmd == "send":
-                prompt = input("Enter prompt (or press Enter for random): ").strip()
+                prompt = (await ainput("Enter prompt (or press Enter for random): ")).strip()
                 if not prompt:
                     import random
                     prompt = random.choice(test_prompts)
@@ -227,5 +228,6 @@ Press Enter to start...
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(interactive_metrics())
 
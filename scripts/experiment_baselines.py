@@ -6,17 +6,19 @@ import asyncio
 import aiohttp
 import logging
 import time
-import json
 import random
 from typing import List, Dict
-from collections import defaultdict
+from collections import Counter
 import os
 import sys
+import numpy as np
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from _client import write_json_file
+
 ROUTER_URL = "http://localhost:8000"
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -85,7 +87,7 @@ async def run_baseline_experiment(strategy: str, num_requests: int = 100):
         "cache_hits": 0,
         "cache_misses": 0,
         "latencies": [],
-        "worker_distribution": defaultdict(int),
+        "worker_distribution": Counter(),
     }
     
     # Test prompts with shared prefixes (simulating RAG)
@@ -103,7 +105,7 @@ async def run_baseline_experiment(strategy: str, num_requests: int = 100):
             else:
                 prompt = f"Unique prompt {i}. " * 2
             
-            start = time.time()
+            start = time.perf_counter_ns()
             try:
                 async with session.post(
                     f"{ROUTER_URL}/v1/completions",
@@ -112,7 +114,7 @@ async def run_baseline_experiment(strategy: str, num_requests: int = 100):
                 ) as resp:
                     if resp.status == 200:
                         data = await resp.json()
-                        latency = (time.time() - start) * 1000
+                        latency = (time.perf_counter_ns() - start) / 1_000_000
                         
                         request_result = {
                             "request_id": i,
@@ -141,14 +143,18 @@ async def run_baseline_experiment(strategy: str, num_requests: int = 100):
     
     # Calculate statistics
     if results["latencies"]:
-        results["avg_latency"] = sum(results["latencies"]) / len(results["latencies"])
-        results["min_latency"] = min(results["latencies"])
-        results["max_latency"] = max(results["latencies"])
-        sorted_lat = sorted(results["latencies"])
-        results["p50_latency"] = sorted_lat[len(sorted_lat)//2]
-        if len(sorted_lat) > 10:
-            results["p95_latency"] = sorted_lat[int(len(sorted_lat)*0.95)]
-            results["p99_latency"] = sorted_lat[int(len(sorted_lat)*0.99)]
+        lat = np.asarray(results["latencies"], dtype=np.float64)
+        n = len(lat)
+        # One np.partition places min, p50, p95, p99 and max together
+        ranks = [0, n // 2, int(n * 0.95), int(n * 0.99), n - 1]
+        lo, p50, p95, p99, hi = np.partition(lat, ranks)[ranks]
+        results["avg_latency"] = float(lat.mean())
+        results["min_latency"] = float(lo)
+        results["max_latency"] = float(hi)
+        results["p50_latency"] = float(p50)
+        if n > 10:
+            results["p95_latency"] = float(p95)
+            results["p99_latency"] = float(p99)
     
     results["hit_rate"] = (results["cache_hits"] / len(results["requests"]) * 100) if results["requests"] else 0
     
@@ -175,11 +181,10 @@ For now, we'll run Cache-Aware and document the comparison framework.
     cache_aware_results = await run_baseline_experiment("cache_aware", num_requests=100)
     
     # Save results
-    with open("baseline_results.json", "w") as f:
-        json.dump({
-            "cache_aware": cache_aware_results,
-            "note": "Round-robin and least-loaded baselines require router modifications"
-        }, f, indent=2)
+    write_json_file("baseline_results.json", {
+        "cache_aware": cache_aware_results,
+        "note": "Round-robin and least-loaded baselines require router modifications"
+    })
     
     # Display comparison
     logger.info("\n" + "="*60)
@@ -6,7 +6,6 @@ import asyncio
 import aiohttp
 import logging
 import time
-import json
 from typing import List, Dict
 from collections import defaultdict
 import os
@@ -16,6 +15,8 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from _client import write_json_file
+
 ROUTER_URL = "http://localhost:8000"
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -51,7 +52,7 @@ async def test_prefix_length(prefix_length_tokens: int, num_requests: int = 50):
             else:  # Odd: unique
                 prompt = f"Unique document {i}. " * 3 + random.choice(user_queries)
             
-            start = time.time()
+            start = time.perf_counter_ns()
             try:
                 # Note: router currently uses block-based hashing, not prefix_len
                 # This experiment would require router modification to support prefix_len parameter
@@ -62,7 +63,7 @@ async def test_prefix_length(prefix_length_tokens: int, num_requests: int = 50):
                 ) as resp:
                     if resp.status == 200:
                         data = await resp.json()
-                        latency = (time.time() - start) * 1000
+                        latency = (time.perf_counter_ns() - start) / 1_000_000
                         
                         results["latencies"].append(latency)
                         results["match_lengths"].append(data.get("match_length", 0))
@@ -112,8 +113,7 @@ This experiment tests the concept of prefix length tuning.
                    f"Avg Latency: {results.get('avg_latency', 0):.2f}ms")
     
     # Save results
-    with open("prefix_length_results.json", "w") as f:
-        json.dump(all_results, f, indent=2)
+    write_json_file("prefix_length_results.json", all_results)
     
     # Display summary
     logger.info("\n" + "="*60)
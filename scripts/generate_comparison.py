@@ -14,6 +14,8 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from _client import write_json_file
+
 
 def load_results() -> Dict[str, Dict]:
     """Load all result files."""
@@ -223,8 +225,7 @@ def main():
     
     # Save combined results
     output_file = "strategy_comparison_summary.json"
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    write_json_file(output_file, results)
     print(f"\n💾 Combined results saved to {output_file}")
     
     print("\n" + "="*80)
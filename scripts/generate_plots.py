@@ -7,49 +7,94 @@ Creates visual representations of:
 - Cache hit rate over time
 """
 
-import matplotlib.pyplot as plt
+import matplotlib.font_manager
+import matplotlib.image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 import os
+import re
 import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from _plot_kernels import tally_hits_by_worker
+
+# Encoded cache_status values in the request arrays
+STATUS_OTHER, STATUS_HIT, STATUS_MISS = 0, 1, 2
+_ARRAY_FIELDS = ("lat", "status", "mlen", "worker", "worker_names")
+
+# Time series longer than this are downsampled before plotting
+MAX_PLOT_POINTS = 2000
+
+# Fields of the plain-text benchmark result files
+_P50_RE = re.compile(r"^p50:\s*([\d.]+)", re.M)
+_P95_RE = re.compile(r"^p95:\s*([\d.]+)", re.M)
+_P99_RE = re.compile(r"^p99:\s*([\d.]+)", re.M)
+_FALSE_HITS_RE = re.compile(r"^False Hits:\s*(\d+)", re.M)
+_RECOVERY_RE = re.compile(r"^Recovery Time:\s*(.+)$", re.M)
+
+# A single Figure is reused across plots; each plot clears it instead of
+# building a new pyplot figure.
+_figure = None
+
+def _new_axes(figsize=(10, 6)):
+    """Clear the shared figure, resize it, and return (fig, ax)."""
+    global _figure
+    if _figure is None:
+        _figure = Figure(figsize=figsize)
+        FigureCanvasAgg(_figure)
+    _figure.clear()
+    _figure.set_size_inches(*figsize)
+    return _figure, _figure.add_subplot(111)
 
 def plot_latency_distribution(latencies, output_file="latency_distribution.png", title_suffix=""):
     """Generate histogram of router latencies."""
-    plt.figure(figsize=(10, 6))
+    if latencies is None or len(latencies) < 2:
+        print("   ⚠️  Not enough latency data, skipping latency distribution")
+        return
+    
+    latencies = np.asarray(latencies, dtype=np.float64)
+    fig, ax = _new_axes(figsize=(10, 6))
     
-    # Create histogram
+    # Create histogram (precomputed counts drawn as a single bar container)
     bins = min(50, len(latencies) // 2) if len(latencies) > 10 else 20
-    plt.hist(latencies, bins=bins, color='skyblue', edgecolor='black', alpha=0.7)
+    counts, edges = np.histogram(latencies, bins=bins)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+           color='skyblue', edgecolor='black', alpha=0.7)
     
     # Add statistics lines
     median = np.median(latencies)
-    p95 = np.percentile(latencies, 95) if len(latencies) > 20 else max(latencies)
-    p99 = np.percentile(latencies, 99) if len(latencies) > 100 else max(latencies)
-    avg = np.mean(latencies)
+    avg = latencies.mean()
     
-    plt.axvline(median, color='green', linestyle='--', linewidth=2, label=f'Median: {median:.2f}ms')
-    plt.axvline(avg, color='blue', linestyle=':', linewidth=2, label=f'Average: {avg:.2f}ms')
+    ax.axvline(median, color='green', linestyle='--', linewidth=2, label=f'Median: {median:.2f}ms')
+    ax.axvline(avg, color='blue', linestyle=':', linewidth=2, label=f'Average: {avg:.2f}ms')
     if len(latencies) > 20:
-        plt.axvline(p95, color='orange', linestyle='--', linewidth=2, label=f'p95: {p95:.2f}ms')
-    if len(latencies) > 100:
-        plt.axvline(p99, color='red', linestyle='--', linewidth=2, label=f'p99: {p99:.2f}ms')
+        p95, p99 = np.percentile(latencies, [95, 99])
+        ax.axvline(p95, color='orange', linestyle='--', linewidth=2, label=f'p95: {p95:.2f}ms')
+        if len(latencies) > 100:
+            ax.axvline(p99, color='red', linestyle='--', linewidth=2, label=f'p99: {p99:.2f}ms')
     
-    plt.xlabel('Latency (ms)', fontsize=12)
-    plt.ylabel('Frequency', fontsize=12)
+    ax.set_xlabel('Latency (ms)', fontsize=12)
+    ax.set_ylabel('Frequency', fontsize=12)
     title = f'Router Latency Distribution ({len(latencies)} Requests)'
     if title_suffix:
         title += f" - {title_suffix}"
-    plt.title(title, fontsize=14, fontweight='bold')
-    plt.legend(fontsize=10)
-    plt.grid(axis='y', alpha=0.3)
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.legend(fontsize=10)
+    ax.grid(axis='y', alpha=0.3)
     
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=300)
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300)
     print(f"✅ Saved latency distribution to {output_file}")
-    plt.close()
 
 def plot_recovery_timeline(false_hits, recovery_time, sync_interval=5, output_file="recovery_timeline.png"):
     """Generate timeline showing false hit recovery."""
-    plt.figure(figsize=(12, 6))
+    fig, ax = _new_axes(figsize=(12, 6))
     
     # Simulate timeline data (15 seconds, 1 check per second)
     timeline = list(range(15))
@@ -57,36 +102,36 @@ def plot_recovery_timeline(false_hits, recovery_time, sync_interval=5, output_fi
     colors = ['red' if s == 'FALSE HIT' else 'green' for s in status]
     
     # Create bar chart
-    plt.bar(timeline, [1]*len(timeline), color=colors, alpha=0.7, edgecolor='black')
+    ax.bar(timeline, [1]*len(timeline), color=colors, alpha=0.7, edgecolor='black')
     
     # Add recovery marker
     if recovery_time < 15:
-        plt.axvline(recovery_time, color='blue', linestyle='--', linewidth=2, 
+        ax.axvline(recovery_time, color='blue', linestyle='--', linewidth=2, 
                    label=f'Recovery at {recovery_time:.1f}s')
     
     # Add sync interval marker
-    plt.axvline(sync_interval, color='purple', linestyle=':', linewidth=2, 
+    ax.axvline(sync_interval, color='purple', linestyle=':', linewidth=2, 
                label=f'Expected Recovery ({sync_interval}s)')
     
-    plt.xlabel('Time (seconds)', fontsize=12)
-    plt.ylabel('Routing Status', fontsize=12)
-    plt.title('Stale Cache Recovery Timeline', fontsize=14, fontweight='bold')
-    plt.yticks([0.5], ['Status'])
-    plt.legend(fontsize=10)
-    plt.grid(axis='x', alpha=0.3)
+    ax.set_xlabel('Time (seconds)', fontsize=12)
+    ax.set_ylabel('Routing Status', fontsize=12)
+    ax.set_title('Stale Cache Recovery Timeline', fontsize=14, fontweight='bold')
+    ax.set_yticks([0.5])
+    ax.set_yticklabels(['Status'])
+    ax.legend(fontsize=10)
+    ax.grid(axis='x', alpha=0.3)
     
     # Add text annotation
-    plt.text(0.5, 0.5, f'False Hits: {false_hits}', fontsize=10, 
-             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+    ax.text(0.5, 0.5, f'False Hits: {false_hits}', fontsize=10, 
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
     
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=300)
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300)
     print(f"✅ Saved recovery timeline to {output_file}")
-    plt.close()
 
 def plot_worker_load_distribution(workers_data, output_file="worker_load_distribution.png"):
     """Generate bar chart showing request distribution across workers."""
-    plt.figure(figsize=(10, 6))
+    fig, ax = _new_axes(figsize=(10, 6))
     
     worker_ids = []
     request_counts = []
@@ -103,139 +148,320 @@ def plot_worker_load_distribution(workers_data, output_file="worker_load_distrib
     width = 0.35
     
     # Create stacked bar chart
-    plt.bar(x, hit_counts, width, label='Cache Hits', color='green', alpha=0.7)
-    plt.bar(x, miss_counts, width, bottom=hit_counts, label='Cache Misses', color='red', alpha=0.7)
+    ax.bar(x, hit_counts, width, label='Cache Hits', color='green', alpha=0.7)
+    ax.bar(x, miss_counts, width, bottom=hit_counts, label='Cache Misses', color='red', alpha=0.7)
     
-    plt.xlabel('Worker ID', fontsize=12)
-    plt.ylabel('Number of Requests', fontsize=12)
-    plt.title('Request Distribution Across Workers', fontsize=14, fontweight='bold')
-    plt.xticks(x, worker_ids, rotation=45, ha='right')
-    plt.legend(fontsize=10)
-    plt.grid(axis='y', alpha=0.3)
+    ax.set_xlabel('Worker ID', fontsize=12)
+    ax.set_ylabel('Number of Requests', fontsize=12)
+    ax.set_title('Request Distribution Across Workers', fontsize=14, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(worker_ids, rotation=45, ha='right')
+    ax.legend(fontsize=10)
+    ax.grid(axis='y', alpha=0.3)
     
     # Add request count labels on bars
     for i, (hits, misses, total) in enumerate(zip(hit_counts, miss_counts, request_counts)):
-        plt.text(i, total + 1, str(total), ha='center', va='bottom', fontsize=9)
+        ax.text(i, total + 1, str(total), ha='center', va='bottom', fontsize=9)
     
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=300)
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300)
     print(f"✅ Saved worker load distribution to {output_file}")
-    plt.close()
 
-def plot_latency_by_cache_status(requests_data, output_file="latency_by_cache_status.png"):
+def plot_latency_by_cache_status(latencies, status, output_file="latency_by_cache_status.png"):
     """Generate box plot comparing latency for HIT vs MISS."""
-    if not requests_data:
+    if latencies is None or len(latencies) < 2:
         return
     
-    hit_latencies = [r["latency_ms"] for r in requests_data if r.get("cache_status") == "HIT" and "latency_ms" in r]
-    miss_latencies = [r["latency_ms"] for r in requests_data if r.get("cache_status") == "MISS" and "latency_ms" in r]
+    has_latency = ~np.isnan(latencies)
+    hit_latencies = latencies[has_latency & (status == STATUS_HIT)]
+    miss_latencies = latencies[has_latency & (status == STATUS_MISS)]
     
-    if not hit_latencies or not miss_latencies:
+    if not len(hit_latencies) or not len(miss_latencies):
         print("   ⚠️  Need both HIT and MISS data for comparison")
         return
     
-    plt.figure(figsize=(10, 6))
+    fig, ax = _new_axes(figsize=(10, 6))
     
     data = [hit_latencies, miss_latencies]
     labels = ['Cache HIT', 'Cache MISS']
     colors = ['green', 'red']
     
-    bp = plt.boxplot(data, labels=labels, patch_artist=True, widths=0.6)
+    bp = ax.boxplot(data, labels=labels, patch_artist=True, widths=0.6)
     for patch, color in zip(bp['boxes'], colors):
         patch.set_facecolor(color)
         patch.set_alpha(0.7)
     
     # Add statistics text
-    hit_avg = np.mean(hit_latencies)
-    miss_avg = np.mean(miss_latencies)
+    hit_avg = hit_latencies.mean()
+    miss_avg = miss_latencies.mean()
     improvement = ((miss_avg - hit_avg) / miss_avg) * 100
     
-    plt.text(0.5, 0.95, f'Avg HIT: {hit_avg:.1f}ms\nAvg MISS: {miss_avg:.1f}ms\nImprovement: {improvement:.1f}%',
-             transform=plt.gca().transAxes, fontsize=10,
-             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
-             verticalalignment='top')
+    ax.text(0.5, 0.95, f'Avg HIT: {hit_avg:.1f}ms\nAvg MISS: {miss_avg:.1f}ms\nImprovement: {improvement:.1f}%',
+            transform=ax.transAxes, fontsize=10,
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+            verticalalignment='top')
     
-    plt.ylabel('Latency (ms)', fontsize=12)
-    plt.title('Latency Comparison: Cache HIT vs MISS', fontsize=14, fontweight='bold')
-    plt.grid(axis='y', alpha=0.3)
+    ax.set_ylabel('Latency (ms)', fontsize=12)
+    ax.set_title('Latency Comparison: Cache HIT vs MISS', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
     
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=300)
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300)
     print(f"✅ Saved latency comparison to {output_file}")
-    plt.close()
 
-def plot_match_length_distribution(requests_data, output_file="match_length_distribution.png"):
+def plot_match_length_distribution(match_lengths, output_file="match_length_distribution.png"):
     """Generate histogram of prefix match lengths."""
-    if not requests_data:
+    if match_lengths is None:
         return
     
-    match_lengths = [r.get("match_length", 0) for r in requests_data if "match_length" in r]
-    
-    if not match_lengths:
+    if len(match_lengths) < 2:
+        print("   ⚠️  Not enough match length data, skipping match length distribution")
         return
     
-    plt.figure(figsize=(10, 6))
+    fig, ax = _new_axes(figsize=(10, 6))
     
-    # Create histogram
-    bins = max(10, max(match_lengths) + 1) if max(match_lengths) > 0 else 10
-    plt.hist(match_lengths, bins=bins, color='purple', edgecolor='black', alpha=0.7)
+    # Statistics as single reductions over the array
+    avg_match = match_lengths.mean()
+    max_match = int(match_lengths.max())
+    hits = int((match_lengths > 0).sum())
     
-    # Add statistics
-    avg_match = np.mean(match_lengths)
-    max_match = max(match_lengths)
-    hits = sum(1 for m in match_lengths if m > 0)
+    # Create histogram (precomputed counts drawn as a single bar container)
+    bins = max(10, max_match + 1) if max_match > 0 else 10
+    counts, edges = np.histogram(match_lengths, bins=bins)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+           color='purple', edgecolor='black', alpha=0.7)
     
-    plt.axvline(avg_match, color='orange', linestyle='--', linewidth=2, 
-                label=f'Average: {avg_match:.2f} blocks')
+    ax.axvline(avg_match, color='orange', linestyle='--', linewidth=2, 
+               label=f'Average: {avg_match:.2f} blocks')
     
-    plt.xlabel('Prefix Match Length (blocks)', fontsize=12)
-    plt.ylabel('Frequency', fontsize=12)
-    plt.title(f'Prefix Match Length Distribution (Hits: {hits}/{len(match_lengths)})', 
-              fontsize=14, fontweight='bold')
-    plt.legend(fontsize=10)
-    plt.grid(axis='y', alpha=0.3)
+    ax.set_xlabel('Prefix Match Length (blocks)', fontsize=12)
+    ax.set_ylabel('Frequency', fontsize=12)
+    ax.set_title(f'Prefix Match Length Distribution (Hits: {hits}/{len(match_lengths)})', 
+                 fontsize=14, fontweight='bold')
+    ax.legend(fontsize=10)
+    ax.grid(axis='y', alpha=0.3)
     
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=300)
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300)
     print(f"✅ Saved match length distribution to {output_file}")
-    plt.close()
 
-def plot_cache_hit_rate(requests_data=None, output_file="cache_hit_rate.png"):
+def plot_cache_hit_rate(is_hit=None, output_file="cache_hit_rate.png"):
     """Generate cache hit rate over time from actual data or simulation."""
-    plt.figure(figsize=(10, 6))
+    if is_hit is not None and 0 < len(is_hit) < 2:
+        print("   ⚠️  Not enough request data, skipping cache hit rate")
+        return
+    
+    fig, ax = _new_axes(figsize=(10, 6))
     
-    if requests_data:
+    if is_hit is not None and len(is_hit):
         # Use actual data from dashboard
-        requests = list(range(1, len(requests_data) + 1))
-        hits = 0
-        hit_rates = []
-        for i, req in enumerate(requests_data):
-            if req.get("cache_status") == "HIT":
-                hits += 1
-            hit_rate = hits / (i + 1)
-            hit_rates.append(hit_rate)
+        num_requests = len(is_hit)
+        requests = np.arange(1, num_requests + 1)
+        hit_rates = np.cumsum(is_hit) / requests
         
-        plt.plot(requests, hit_rates, color='blue', linewidth=2, marker='o', markersize=3)
-        plt.fill_between(requests, hit_rates, alpha=0.3, color='blue')
-        title = f'Cache Hit Rate Over Time (Actual Data: {len(requests_data)} requests)'
+        # Long runs are strided down before plotting; per-point markers are
+        # only drawn when the curve is short enough for them to be visible
+        if len(requests) > MAX_PLOT_POINTS:
+            stride = len(requests) // MAX_PLOT_POINTS
+            requests = requests[::stride]
+            hit_rates = hit_rates[::stride]
+            ax.plot(requests, hit_rates, color='blue', linewidth=2)
+        else:
+            ax.plot(requests, hit_rates, color='blue', linewidth=2, marker='o', markersize=3)
+        ax.fill_between(requests, hit_rates, alpha=0.3, color='blue')
+        title = f'Cache Hit Rate Over Time (Actual Data: {num_requests} requests)'
     else:
         # Simulate data: cache warms up over time
         requests = list(range(1, 101))
         hit_rate = [min(0.05 + (i * 0.8 / 100), 0.85) for i in requests]  # Warm-up curve
-        plt.plot(requests, hit_rate, color='blue', linewidth=2, marker='o', markersize=3)
-        plt.fill_between(requests, hit_rate, alpha=0.3, color='blue')
+        ax.plot(requests, hit_rate, color='blue', linewidth=2, marker='o', markersize=3)
+        ax.fill_between(requests, hit_rate, alpha=0.3, color='blue')
         title = 'Cache Hit Rate Over Time (Simulated)'
     
-    plt.xlabel('Request Number', fontsize=12)
-    plt.ylabel('Cache Hit Rate', fontsize=12)
-    plt.title(title, fontsize=14, fontweight='bold')
-    plt.ylim(0, 1)
-    plt.grid(alpha=0.3)
+    ax.set_xlabel('Request Number', fontsize=12)
+    ax.set_ylabel('Cache Hit Rate', fontsize=12)
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.set_ylim(0, 1)
+    ax.grid(alpha=0.3)
     
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=300)
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300)
     print(f"✅ Saved cache hit rate to {output_file}")
-    plt.close()
+
+def load_dashboard_results(path="dashboard_results.json"):
+    """Load the dashboard results JSON, using orjson when available."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
+
+def build_request_arrays(requests_data):
+    """
+    Convert the per-request records into column arrays (SoA).
+    Missing latencies are NaN, missing match lengths and workers are -1.
+    """
+    n = len(requests_data)
+    worker_ids = {}
+    lat = np.full(n, np.nan, dtype=np.float64)
+    status = np.zeros(n, dtype=np.uint8)
+    mlen = np.full(n, -1, dtype=np.int32)
+    worker = np.full(n, -1, dtype=np.int32)
+    
+    for i, r in enumerate(requests_data):
+        if "latency_ms" in r:
+            lat[i] = r["latency_ms"]
+        cache_status = r.get("cache_status")
+        if cache_status == "HIT":
+            status[i] = STATUS_HIT
+        elif cache_status == "MISS":
+            status[i] = STATUS_MISS
+        if "match_length" in r:
+            mlen[i] = r["match_length"]
+        worker_id = r.get("worker")
+        if worker_id is not None:
+            worker[i] = worker_ids.setdefault(worker_id, len(worker_ids))
+    
+    return {
+        "lat": lat,
+        "status": status,
+        "mlen": mlen,
+        "worker": worker,
+        "worker_names": np.array(list(worker_ids), dtype=str),
+    }
+
+def requests_path(path="dashboard_results.json"):
+    """Path of the per-request NDJSON file written next to a dashboard results file."""
+    return os.path.splitext(path)[0] + ".ndjson"
+
+def load_request_records(path):
+    """Read per-request records from an NDJSON file, one JSON document per line."""
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(path, "rb") as f:
+        return [loads(line) for line in f if line.strip()]
+
+def _file_stamp(path):
+    """(mtime, size) of path, or (0, -1) if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0.0, -1.0
+    return st.st_mtime, st.st_size
+
+def load_request_arrays(path="dashboard_results.json", cache_path="_cache.npz"):
+    """
+    Load dashboard results as (summary, arrays).
+    summary is the results JSON; arrays is the output of build_request_arrays
+    for the per-request records in the sibling .ndjson file (see
+    results_dashboard.export_results). Exports from before the split keep the
+    records in the JSON's all_requests instead, which is used when there is
+    no .ndjson file. Both are cached in cache_path and reused as long as the
+    mtime and size of both files are unchanged.
+    """
+    records_path = requests_path(path)
+    key = np.array([*_file_stamp(path), *_file_stamp(records_path)], dtype=np.float64)
+    
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as cached:
+                if np.array_equal(cached["key"], key):
+                    summary = json.loads(str(cached["summary"]))
+                    arrays = {name: cached[name] for name in _ARRAY_FIELDS}
+                    return summary, arrays
+        except Exception as e:
+            print(f"   ⚠️  Ignoring unreadable {cache_path}: {e}")
+    
+    summary = load_dashboard_results(path)
+    records = summary.pop("all_requests", None) or []
+    if os.path.exists(records_path):
+        records = load_request_records(records_path)
+    arrays = build_request_arrays(records)
+    np.savez(cache_path, key=key, summary=np.array(json.dumps(summary)), **arrays)
+    return summary, arrays
+
+class LivePlotter:
+    """
+    Redraws the latency histogram repeatedly for watch mode.
+    Axes, labels and title are rendered once and cached as a background;
+    later updates restore that background and redraw only the bars.
+    """
+    def __init__(self, output_file="latency_distribution.png", bins=50):
+        self.output_file = output_file
+        self.bins = bins
+        self.fig = Figure(figsize=(10, 6), dpi=100)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = None
+        self._background = None
+        self._bars = None
+        self._range = None
+        self._ymax = 0
+    
+    def _full_redraw(self, counts, edges):
+        """Draw the static parts of the plot and cache them as background."""
+        self.fig.clear()
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_xlim(edges[0], edges[-1])
+        self._ymax = max(1, int(counts.max() * 2))
+        self.ax.set_ylim(0, self._ymax)
+        self.ax.set_xlabel('Latency (ms)', fontsize=12)
+        self.ax.set_ylabel('Frequency', fontsize=12)
+        self.ax.set_title('Router Latency Distribution (Live)', fontsize=14, fontweight='bold')
+        self.ax.grid(axis='y', alpha=0.3)
+        self._bars = self.ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+                                 color='skyblue', edgecolor='black', alpha=0.7,
+                                 animated=True)
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+    
+    def update(self, latencies):
+        """Redraw the histogram for the given latencies and write the PNG."""
+        latencies = np.asarray(latencies, dtype=np.float64)
+        if len(latencies) < 2:
+            return
+        
+        # Fall back to a full redraw when the data outgrow the cached axes
+        if (self._background is None or latencies.min() < self._range[0]
+                or latencies.max() > self._range[1]):
+            self._range = (0.0, float(latencies.max()) * 1.5)
+            self._background = None
+        counts, edges = np.histogram(latencies, bins=self.bins, range=self._range)
+        if self._background is None or counts.max() > self._ymax:
+            self._full_redraw(counts, edges)
+        else:
+            self.canvas.restore_region(self._background)
+            for rect, count in zip(self._bars, counts):
+                rect.set_height(count)
+        
+        for rect in self._bars:
+            self.ax.draw_artist(rect)
+        self.canvas.blit(self.ax.bbox)
+        matplotlib.image.imsave(self.output_file, np.asarray(self.canvas.buffer_rgba()))
+
+def watch_plots(interval=5.0, path="dashboard_results.json"):
+    """Regenerate the latency histogram whenever the dashboard results change."""
+    import time
+    
+    print(f"👀 Watching {path} (refresh every {interval}s, Ctrl+C to stop)")
+    plotter = LivePlotter()
+    last_stamp = None
+    try:
+        while True:
+            if os.path.exists(path):
+                # The .ndjson is written after the JSON, so watch both
+                stamp = (_file_stamp(path), _file_stamp(requests_path(path)))
+                if stamp != last_stamp:
+                    last_stamp = stamp
+                    try:
+                        _, arrays = load_request_arrays(path)
+                    except Exception as e:
+                        print(f"   ⚠️  Error reading {path}: {e}")
+                    else:
+                        latencies = arrays["lat"][~np.isnan(arrays["lat"])]
+                        plotter.update(latencies)
+                        print(f"✅ Updated {plotter.output_file} ({len(latencies)} requests)")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
 
 def generate_all_plots():
     """Generate all visualization plots."""
@@ -243,129 +469,153 @@ def generate_all_plots():
     print("GENERATING BENCHMARK VISUALIZATIONS")
     print("=" * 60)
     
+    # Warm the font cache once up front instead of inside the first plot
+    matplotlib.font_manager.findfont("DejaVu Sans")
+    
     # Check for dashboard_results.json first (new format)
-    dashboard_exists = os.path.exists("dashboard_results.json")
-    scalability_exists = os.path.exists("scalability_results.txt")
-    stale_cache_exists = os.path.exists("stale_cache_results.txt")
+    present = {entry.name for entry in os.scandir(".")}
+    dashboard_exists = "dashboard_results.json" in present
+    scalability_exists = "scalability_results.txt" in present
+    stale_cache_exists = "stale_cache_results.txt" in present
     
     latencies = None
-    requests_data = None
+    arrays = None
     dashboard_data = None
     
     # Try to load from dashboard_results.json
     if dashboard_exists:
         print("\n📊 Loading data from dashboard_results.json...")
         try:
-            with open("dashboard_results.json", "r") as f:
-                dashboard_data = json.load(f)
+            dashboard_data, arrays = load_request_arrays()
             
             # Extract latencies from all requests
-            if "all_requests" in dashboard_data and dashboard_data["all_requests"]:
-                requests_data = dashboard_data["all_requests"]
-                latencies = [r["latency_ms"] for r in requests_data if "latency_ms" in r]
+            if len(arrays["lat"]):
+                latencies = arrays["lat"][~np.isnan(arrays["lat"])]
                 print(f"   Found {len(latencies)} latency measurements")
                 print(f"   Cache stats: {dashboard_data.get('cache_stats', {})}")
+            else:
+                arrays = None
             
             # Generate latency distribution from actual data
-            if latencies:
+            if latencies is not None and len(latencies):
                 print("\n📊 Generating latency distribution from actual data...")
                 cache_stats = dashboard_data.get('cache_stats', {})
                 hit_rate = cache_stats.get('hit_rate_percent', 0)
                 plot_latency_distribution(latencies, title_suffix=f"Hit Rate: {hit_rate:.1f}%")
             else:
+                latencies = None
                 print("   ⚠️  No latency data found in dashboard_results.json")
         
         except Exception as e:
             print(f"   ⚠️  Error reading dashboard_results.json: {e}")
     
     # Fallback to old scalability_results.txt format
-    if not latencies and scalability_exists:
+    if latencies is None and scalability_exists:
         print("\n📊 Generating latency distribution from scalability_results.txt...")
         # Parse scalability results
-        with open("scalability_results.txt", "r") as f:
-            lines = f.readlines()
-            # For demo, generate synthetic data based on results
-            # In real scenario, you'd save raw latency data
-            p50 = float([l for l in lines if "p50:" in l][0].split(":")[1].strip().replace(" ms", ""))
-            p95 = float([l for l in lines if "p95:" in l][0].split(":")[1].strip().replace(" ms", ""))
-            p99 = float([l for l in lines if "p99:" in l][0].split(":")[1].strip().replace(" ms", ""))
-            
-            # Generate synthetic latency distribution
-            latencies = np.concatenate([
-                np.random.normal(p50, p50*0.2, 500),
-                np.random.normal(p95, p95*0.1, 400),
-                np.random.normal(p99, p99*0.05, 100)
-            ])
-            latencies = np.clip(latencies, 0, None)  # No negative latencies
-            
-            plot_latency_distribution(latencies)
-    elif not latencies:
+        text = Path("scalability_results.txt").read_text()
+        # For demo, generate synthetic data based on results
+        # In real scenario, you'd save raw latency data
+        p50 = float(_P50_RE.search(text).group(1))
+        p95 = float(_P95_RE.search(text).group(1))
+        p99 = float(_P99_RE.search(text).group(1))
+        
+        # Generate synthetic latency distribution
+        latencies = np.concatenate([
+            np.random.normal(p50, p50*0.2, 500),
+            np.random.normal(p95, p95*0.1, 400),
+            np.random.normal(p99, p99*0.05, 100)
+        ])
+        latencies = np.clip(latencies, 0, None)  # No negative latencies
+        
+        plot_latency_distribution(latencies)
+    elif latencies is None:
         print("\n⚠️  No latency data found. Run results_dashboard.py or benchmark_scalability.py first.")
     
     # Recovery timeline (only from old format for now)
     if stale_cache_exists:
         print("\n📊 Generating recovery timeline...")
         # Parse stale cache results
-        with open("stale_cache_results.txt", "r") as f:
-            lines = f.readlines()
-            false_hits = int([l for l in lines if "False Hits:" in l][0].split(":")[1].strip())
-            recovery_line = [l for l in lines if "Recovery Time:" in l][0].split(":")[1].strip()
-            
-            # Handle NOT RECOVERED case
-            if "NOT RECOVERED" in recovery_line:
-                recovery_time = 15.0  # Use max test duration
-            else:
-                recovery_time = float(recovery_line.replace("s", ""))
-            
-            plot_recovery_timeline(false_hits, recovery_time)
+        text = Path("stale_cache_results.txt").read_text()
+        false_hits = int(_FALSE_HITS_RE.search(text).group(1))
+        recovery_line = _RECOVERY_RE.search(text).group(1).strip()
+        
+        # Handle NOT RECOVERED case
+        if "NOT RECOVERED" in recovery_line:
+            recovery_time = 15.0  # Use max test duration
+        else:
+            recovery_time = float(recovery_line.replace("s", ""))
+        
+        plot_recovery_timeline(false_hits, recovery_time)
     else:
         print("\n⚠️  stale_cache_results.txt not found. Run benchmark_stale_cache.py for recovery timeline.")
     
     # Cache hit rate - use actual data if available
     print("\n📊 Generating cache hit rate...")
-    if requests_data:
-        plot_cache_hit_rate(requests_data=requests_data)
+    if arrays is not None:
+        plot_cache_hit_rate(is_hit=arrays["status"] == STATUS_HIT)
     else:
         plot_cache_hit_rate()  # Use simulation
     
     # Additional plots from dashboard data
-    if dashboard_exists and requests_data and dashboard_data:
+    if dashboard_exists and arrays is not None and dashboard_data:
         print("\n📊 Generating additional visualizations...")
         
         # Worker load distribution
         workers_data = dashboard_data.get("workers", {})
         if workers_data:
-            # Calculate hits/misses per worker
-            for worker_id in workers_data:
-                workers_data[worker_id]["cache_hits"] = sum(
-                    1 for r in requests_data 
-                    if r.get("worker") == worker_id and r.get("cache_status") == "HIT"
-                )
-                workers_data[worker_id]["cache_misses"] = sum(
-                    1 for r in requests_data 
-                    if r.get("worker") == worker_id and r.get("cache_status") == "MISS"
-                )
+            # Calculate hits/misses per worker from the worker/status columns
+            names = arrays["worker_names"]
+            classified = (arrays["worker"] >= 0) & (arrays["status"] != STATUS_OTHER)
+            is_hit = arrays["status"][classified] == STATUS_HIT
+            widx = arrays["worker"][classified]
+            hits, misses = tally_hits_by_worker(is_hit, widx, len(names))
+            for i, worker_id in enumerate(names):
+                if worker_id in workers_data:
+                    workers_data[worker_id]["cache_hits"] = int(hits[i])
+                    workers_data[worker_id]["cache_misses"] = int(misses[i])
+            for stats in workers_data.values():
+                stats.setdefault("cache_hits", 0)
+                stats.setdefault("cache_misses", 0)
             plot_worker_load_distribution(workers_data)
         
         # Latency by cache status
-        plot_latency_by_cache_status(requests_data)
+        plot_latency_by_cache_status(arrays["lat"], arrays["status"])
         
         # Match length distribution
-        plot_match_length_distribution(requests_data)
+        plot_match_length_distribution(arrays["mlen"][arrays["mlen"] >= 0])
     
     print("\n" + "=" * 60)
     print("✅ VISUALIZATION COMPLETE")
     print("=" * 60)
     print("\nGenerated files:")
-    if latencies:
+    if latencies is not None:
         print("  - latency_distribution.png (from actual data)")
     if stale_cache_exists:
         print("  - recovery_timeline.png")
     print("  - cache_hit_rate.png")
-    if dashboard_exists and requests_data:
+    if dashboard_exists and arrays is not None:
         print("  - worker_load_distribution.png")
         print("  - latency_by_cache_status.png")
         print("  - match_length_distribution.png")
 
 if __name__ == "__main__":
-    generate_all_plots()
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate benchmark visualizations")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and redraw the latency histogram when dashboard_results.json changes"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="Polling interval in seconds for --watch (default: 5)"
+    )
+    args = parser.parse_args()
+    
+    if args.watch:
+        watch_plots(args.interval)
+    else:
+        generate_all_plots()
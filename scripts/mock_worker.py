@@ -1,9 +1,13 @@
 import asyncio
 import aiohttp
+from yarl import URL
+import json
 import logging
 import random
 import time
-import heapq
+import numpy as np
+import itertools
+from abc import ABC, abstractmethod
 from collections import defaultdict, OrderedDict
 from typing import Dict, Set, List, Tuple, Optional
 from dataclasses import dataclass, field
@@ -16,6 +20,16 @@ if PROJECT_ROOT not in sys.path:
 
 from router.tokenizer_utils import TokenizerUtils, BLOCK_SIZE
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 # Try to import lightweight model for token generation
 try:
     import torch
@@ -27,6 +41,11 @@ except ImportError:
     logging.warning("transformers/torch not available, using dummy token generation")
 
 ROUTER_URL = "http://localhost:8000"
+# Parsed once; aiohttp uses a yarl.URL as-is instead of re-parsing a string every tick
+HEARTBEAT_URL = URL(ROUTER_URL) / "internal" / "heartbeat"
+SYNC_URL = URL(ROUTER_URL) / "internal" / "sync"
+SYNC_DELTA_URL = URL(ROUTER_URL) / "internal" / "sync_delta"
+JSON_HEADERS = {"Content-Type": "application/json"}
 WORKER_ID = f"worker-{random.randint(1000, 9999)}"
 
 # Model configuration: Llama 2 13B on A100 40GB
@@ -45,19 +64,56 @@ PREFILL_PER_BLOCK_MS = 2.5  # ms per block for prefill computation
 # Decode latency: per token
 DECODE_PER_TOKEN_MS = 15.0  # ms per token for decode (realistic for A100)
 
+# Task stage codes for WorkerState's task arrays
+STAGE_PREFILL = 0
+STAGE_DECODE = 1
+SLOT_FREE = 255
+TASK_ARRAY_CAPACITY = 64  # Initial slots; doubled when exhausted
+
+# Block eviction tiers: higher numbers are evicted first, PRIORITY_SYSTEM never
+PRIORITY_SYSTEM = 0  # Shared system-prompt blocks, pinned while cached
+PRIORITY_DEFAULT = 3
+EVICTABLE_PRIORITIES = (3, 2, 1)  # Drain order
+MAX_PINNED_FRACTION = 0.25  # Share of a BlockCache that PRIORITY_SYSTEM blocks may take
+SHARED_SYSTEM_PROMPT = False  # fake_request_loop: open every prompt with one system prompt and pin its blocks
+
+FULL_SYNC_EVERY = 12  # Sync ticks between full snapshots; deltas in between
+
+TOKENIZER_CACHE_SIZE = 1024  # Prompts whose block hashes are kept (LRU)
+PREFIX_HEAD_CHARS = 64  # Leading characters used to find a cached prompt to extend
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MockWorker")
 
 
+def dump_json(payload) -> bytes:
+    """Serialize a request body to JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+
+def prompt_key(prompt: str):
+    """Key for the tokenizer cache: a 64-bit xxh3 digest if xxhash is installed, else the prompt itself."""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(prompt.encode())
+    return prompt
+
+
+def _worker_envelope(worker_id: str, field_name: str) -> bytes:
+    """Pre-encode '{"worker_id": worker_id,"<field_name>":' so only the value is serialized per tick."""
+    return dump_json({"worker_id": worker_id})[:-1] + b',"' + field_name.encode() + b'":'
+
+
 @dataclass
 class BlockInfo:
     """Represents a cached block with reference counting."""
-    block_hash: str
+    block_hash: int
     ref_count: int = 0
-    last_used: float = field(default_factory=time.time)
+    last_used: int = 0  # BlockCache tick of the last allocation touching this block
     evictable: bool = False
     sequence_id: Optional[str] = None  # Which request sequence this block belongs to
-    block_index: int = 0  # Position in sequence (for tie-breaking)
+    priority: int = PRIORITY_DEFAULT  # Eviction tier, see BlockCache.pin
 
 
 @dataclass
@@ -66,8 +122,8 @@ class Task:
     request_id: str
     prompt: str
     max_tokens: int
-    block_hashes: List[str]  # All block hashes for this request
-    cached_blocks: Set[str]  # Which blocks are already cached
+    block_hashes: List[int]  # All block hashes for this request
+    cached_blocks: Set[int]  # Which blocks are already cached
     created_at: float = field(default_factory=time.time)
     
     # Task state
@@ -80,209 +136,385 @@ class Task:
     # For tracking
     prompt_tokens: int = 0
     generated_tokens: int = 0
+    
+    # Index into WorkerState's task arrays. While the task is running its live
+    # latency/stage are kept there; the fields above are updated on completion.
+    slot: int = -1
+
+
+class GPUCachePolicy(ABC):
+    """
+    Replacement policy over a BlockCache's evictable (ref_count == 0) blocks.
+    BlockCache reports block lifecycle events; the policy picks victims.
+    A subclass missing any of these methods can't be instantiated.
+    """
+    
+    @abstractmethod
+    def insert(self, block_hash: int):
+        """A new block was allocated (it starts in use, not evictable)."""
+    
+    @abstractmethod
+    def touch(self, block_hash: int):
+        """A cached block was referenced again; it is in use and not evictable."""
+    
+    @abstractmethod
+    def release(self, block_hash: int):
+        """A block's ref_count dropped to 0; it may now be evicted."""
+    
+    @abstractmethod
+    def remove(self, block_hash: int):
+        """A block left the cache without going through evict_one()."""
+    
+    @abstractmethod
+    def evict_one(self) -> Optional[int]:
+        """Choose and forget an evictable block, or return None if there is none."""
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of blocks currently evictable."""
+
+
+class LRUPolicy(GPUCachePolicy):
+    """Single-queue LRU: evict the least recently released block."""
+    
+    def __init__(self):
+        # Front = next to evict
+        self.queue: "OrderedDict[int, None]" = OrderedDict()
+    
+    def insert(self, block_hash: int):
+        pass  # In use until release()
+    
+    def touch(self, block_hash: int):
+        self.queue.pop(block_hash, None)
+    
+    def release(self, block_hash: int):
+        self.queue[block_hash] = None
+    
+    def remove(self, block_hash: int):
+        self.queue.pop(block_hash, None)
+    
+    def evict_one(self) -> Optional[int]:
+        if not self.queue:
+            return None
+        return self.queue.popitem(last=False)[0]
+    
+    def __len__(self) -> int:
+        return len(self.queue)
+
+
+class TwoQueuePolicy(GPUCachePolicy):
+    """
+    2Q replacement (Johnson & Shasha). Blocks released after a single use wait
+    in a cold FIFO; blocks referenced again while cached, or re-allocated soon
+    after being evicted from cold, go to a hot LRU. Cold blocks are evicted
+    first while the cold queue is over its share, so a burst of one-off
+    prompts can't flush shared prefix blocks.
+    """
+    
+    def __init__(self, max_blocks: int = BLOCKS_PER_GPU):
+        # Front = next to evict
+        self.cold: "OrderedDict[int, None]" = OrderedDict()
+        self.hot: "OrderedDict[int, None]" = OrderedDict()
+        # Cached blocks that have earned the hot queue
+        self._hot_blocks: Set[int] = set()
+        # Hashes recently evicted from cold (no data, just history)
+        self._ghosts: "OrderedDict[int, None]" = OrderedDict()
+        self.cold_target = max(1, max_blocks // 4)
+        self.max_ghosts = max(1, max_blocks // 2)
+    
+    def insert(self, block_hash: int):
+        if block_hash in self._ghosts:
+            del self._ghosts[block_hash]
+            self._hot_blocks.add(block_hash)
+    
+    def touch(self, block_hash: int):
+        self.cold.pop(block_hash, None)
+        self.hot.pop(block_hash, None)
+        self._hot_blocks.add(block_hash)
+    
+    def release(self, block_hash: int):
+        if block_hash in self._hot_blocks:
+            self.hot[block_hash] = None
+        else:
+            self.cold[block_hash] = None
+    
+    def remove(self, block_hash: int):
+        self.cold.pop(block_hash, None)
+        self.hot.pop(block_hash, None)
+        self._hot_blocks.discard(block_hash)
+    
+    def evict_one(self) -> Optional[int]:
+        if self.cold and (len(self.cold) > self.cold_target or not self.hot):
+            block_hash, _ = self.cold.popitem(last=False)
+            self._ghosts[block_hash] = None
+            if len(self._ghosts) > self.max_ghosts:
+                self._ghosts.popitem(last=False)
+            return block_hash
+        if self.hot:
+            block_hash, _ = self.hot.popitem(last=False)
+            self._hot_blocks.discard(block_hash)
+            return block_hash
+        return None
+    
+    def __len__(self) -> int:
+        return len(self.cold) + len(self.hot)
 
 
 class BlockCache:
     """Manages block-based cache with reference counting and eviction."""
     
-    def __init__(self, max_blocks: int = BLOCKS_PER_GPU):
+    def __init__(self, max_blocks: int = BLOCKS_PER_GPU, policy: Optional[GPUCachePolicy] = None):
         self.max_blocks = max_blocks
         # Map: block_hash -> BlockInfo
-        self.blocks: Dict[str, BlockInfo] = {}
-        # Priority queue for evictable blocks: (last_used, block_index, block_hash)
-        # Lower priority = older/more evictable
-        self.evictable_queue: List[Tuple[float, int, str]] = []
-        self.sequence_blocks: Dict[str, List[str]] = {}  # sequence_id -> list of block_hashes
-        # Track all active sequences for sync
-        self.active_sequences: List[List[str]] = []  # List of block sequences
-    
-    def get_cached_blocks(self, block_hashes: List[str]) -> Set[str]:
+        self.blocks: Dict[int, BlockInfo] = {}
+        # Monotonic counter used as a cheap, unique "last used" timestamp
+        self._tick: int = 0
+        # Chooses which evictable (ref_count == 0) block to drop
+        self.policy: GPUCachePolicy = policy if policy is not None else TwoQueuePolicy(max_blocks)
+        # One policy per evictable priority tier; default-priority blocks use self.policy
+        self.tier_policies: Dict[int, GPUCachePolicy] = {1: LRUPolicy(), 2: LRUPolicy(), PRIORITY_DEFAULT: self.policy}
+        self.sequence_blocks: Dict[str, List[int]] = {}  # sequence_id -> list of block_hashes
+        # Track all sequences with cached blocks for sync: sequence_id -> block_hashes
+        self.sequences: Dict[str, List[int]] = {}
+        # Reverse index: block_hash -> sequence_ids in self.sequences containing it
+        self.block_to_seqs: Dict[int, Set[str]] = {}
+        # sequence_id -> number of its distinct blocks still cached
+        self._seq_cached_counts: Dict[str, int] = {}
+        # Identical block lists are tracked once: tuple(block_hashes) -> sequence_id
+        self._seq_ids_by_content: Dict[Tuple[int, ...], str] = {}
+        # PRIORITY_SYSTEM blocks are never evicted, so cap them to leave room for the rest
+        self.max_pinned = int(max_blocks * MAX_PINNED_FRACTION)
+        self.pinned = 0
+    
+    def get_cached_blocks(self, block_hashes: List[int]) -> Set[int]:
         """Check which blocks are already cached."""
         return {h for h in block_hashes if h in self.blocks}
     
-    def allocate_blocks(self, block_hashes: List[str], sequence_id: str) -> Tuple[Set[str], List[str]]:
+    def allocate_blocks(self, block_hashes: List[int], sequence_id: str) -> Tuple[Set[int], List[int]]:
         """
         Allocate blocks for a sequence. Returns (cached_blocks, blocks_to_allocate).
         Updates reference counts for cached blocks.
         """
+        cached, to_allocate, _ = self.plan_and_allocate(block_hashes, sequence_id)
+        return cached, to_allocate
+    
+    def plan_and_allocate(self, block_hashes: List[int], sequence_id: str) -> Tuple[Set[int], List[int], int]:
+        """
+        Allocate blocks for a sequence in a single pass over block_hashes.
+        Returns (cached_blocks, blocks_to_allocate, first_missing_idx), where
+        first_missing_idx is the position of the first uncached block, or -1
+        if every block was already cached.
+        """
         cached = set()
-        to_allocate = []
+        # Uncached hash -> occurrences in block_hashes; a block repeated within
+        # the prompt is allocated once and holds one reference per occurrence
+        to_allocate: Dict[int, int] = {}
+        first_missing_idx = -1
         
         for i, block_hash in enumerate(block_hashes):
             if block_hash in self.blocks:
                 # Block exists, increment ref count
                 block_info = self.blocks[block_hash]
                 block_info.ref_count += 1
-                block_info.last_used = time.time()
+                self._tick += 1
+                block_info.last_used = self._tick
                 block_info.evictable = False
-                # Remove from evictable queue if present
-                self._remove_from_evictable(block_hash)
+                if block_info.priority != PRIORITY_SYSTEM:
+                    self.tier_policies[block_info.priority].touch(block_hash)
                 cached.add(block_hash)
             else:
                 # Need to allocate new block
-                to_allocate.append(block_hash)
+                if first_missing_idx < 0:
+                    first_missing_idx = i
+                to_allocate[block_hash] = to_allocate.get(block_hash, 0) + 1
         
         # Allocate new blocks (may need eviction)
-        for block_hash in to_allocate:
+        for block_hash, refs in to_allocate.items():
             if len(self.blocks) >= self.max_blocks:
                 evicted = self._evict_oldest_block()
-                if evicted:
-                    logger.info(f"🗑️  Evicted block {evicted[:8]}... to make room")
+                if evicted is None:
+                    # Everything left is pinned; the block is computed but not cached
+                    logger.warning(f"⚠️  Cache full of pinned blocks, not caching block {block_hash >> 32:08x}...")
+                    continue
+                logger.info(f"🗑️  Evicted block {evicted >> 32:08x}... to make room")
             
             # Create new block
+            self._tick += 1
             block_info = BlockInfo(
                 block_hash=block_hash,
-                ref_count=1,
-                last_used=time.time(),
+                ref_count=refs,
+                last_used=self._tick,
                 evictable=False,
-                sequence_id=sequence_id,
-                block_index=len(to_allocate) - to_allocate.index(block_hash)
+                sequence_id=sequence_id
             )
             self.blocks[block_hash] = block_info
+            self.policy.insert(block_hash)
+            self._on_block_cached(block_hash)
         
         # Track blocks for this sequence
         self.sequence_blocks[sequence_id] = block_hashes
         
-        # Add to active sequences for sync (if not already present)
-        # Use a copy to avoid reference issues
-        block_hashes_copy = block_hashes.copy()
-        if block_hashes_copy not in self.active_sequences:
-            self.active_sequences.append(block_hashes_copy)
+        # Add to tracked sequences for sync (if not already present)
+        content_key = tuple(block_hashes)
+        if content_key not in self._seq_ids_by_content:
+            self._track_sequence(sequence_id, block_hashes.copy())
             logger.info(f"📦 Added sequence {sequence_id} with {len(block_hashes)} blocks to cache")
         
-        return cached, to_allocate
+        return cached, list(to_allocate), first_missing_idx
     
     def mark_sequence_complete(self, sequence_id: str):
         """Mark all blocks for a sequence as evictable."""
         if sequence_id not in self.sequence_blocks:
             return
         
-        for block_hash in self.sequence_blocks[sequence_id]:
+        # Walk the sequence backwards so its tail blocks are released first
+        # and are evicted before its prefix blocks
+        for block_hash in reversed(self.sequence_blocks[sequence_id]):
             if block_hash in self.blocks:
                 block_info = self.blocks[block_hash]
                 block_info.ref_count -= 1
                 if block_info.ref_count == 0:
                     block_info.evictable = True
-                    # Add to evictable queue
-                    heapq.heappush(
-                        self.evictable_queue,
-                        (block_info.last_used, block_info.block_index, block_hash)
-                    )
+                    if block_info.priority != PRIORITY_SYSTEM:
+                        self.tier_policies[block_info.priority].release(block_hash)
         
-        # Don't remove from active_sequences yet - blocks are still cached
+        # Don't remove from tracked sequences yet - blocks are still cached
         # They'll be removed when actually evicted
         # This allows the router to still see them for prefix matching
         # until they're actually freed from memory
         
         del self.sequence_blocks[sequence_id]
     
+    def pin(self, block_hash: int, priority: int = PRIORITY_SYSTEM):
+        """
+        Raise a cached block's eviction priority. Evictable blocks are drained
+        tier by tier (3, then 2, then 1); PRIORITY_SYSTEM blocks are never evicted.
+        Past max_pinned PRIORITY_SYSTEM blocks, a block gets tier 1 instead.
+        """
+        block_info = self.blocks.get(block_hash)
+        if block_info is None or priority >= block_info.priority:
+            return
+        if priority == PRIORITY_SYSTEM:
+            if self.pinned >= self.max_pinned:
+                logger.info(f"📌 Pin limit ({self.max_pinned} blocks) reached, "
+                            f"keeping block {block_hash >> 32:08x}... at priority 1")
+                priority = EVICTABLE_PRIORITIES[-1]
+                if priority >= block_info.priority:
+                    return
+            else:
+                self.pinned += 1
+        
+        self.tier_policies[block_info.priority].remove(block_hash)
+        if block_info.evictable and priority != PRIORITY_SYSTEM:
+            self.tier_policies[priority].release(block_hash)
+        block_info.priority = priority
+    
     def _evict_oldest_block(self):
-        """Evict the oldest evictable block. If tie, evict latest in sequence."""
-        while self.evictable_queue:
-            last_used, block_index, block_hash = heapq.heappop(self.evictable_queue)
-            
-            if block_hash not in self.blocks:
-                continue  # Already evicted
-            
-            block_info = self.blocks[block_hash]
-            if not block_info.evictable or block_info.ref_count > 0:
-                continue  # No longer evictable or still in use
-            
+        """Evict the block chosen by the lowest-priority tier's policy. Within a sequence, evict latest first."""
+        block_hash = None
+        for priority in EVICTABLE_PRIORITIES:
+            block_hash = self.tier_policies[priority].evict_one()
+            if block_hash is not None:
+                break
+        if block_hash is not None:
             # Evict this block
             del self.blocks[block_hash]
-            
-            # Remove sequences from active_sequences if all their blocks are evicted
-            sequences_to_remove = []
-            for seq in self.active_sequences:
-                if block_hash in seq:
-                    # Check if any blocks from this sequence are still cached
-                    if not any(bh in self.blocks for bh in seq):
-                        sequences_to_remove.append(seq)
-            
-            for seq in sequences_to_remove:
-                if seq in self.active_sequences:
-                    self.active_sequences.remove(seq)
+            self._on_block_evicted(block_hash)
             
             return block_hash
         
-        # No evictable blocks, evict oldest by last_used (shouldn't happen often)
-        if self.blocks:
-            oldest = min(self.blocks.values(), key=lambda b: b.last_used)
+        # No evictable blocks, evict oldest unpinned by last_used (shouldn't happen often)
+        candidates = [b for b in self.blocks.values() if b.priority != PRIORITY_SYSTEM]
+        if candidates:
+            oldest = min(candidates, key=lambda b: b.last_used)
             evicted_hash = oldest.block_hash
             del self.blocks[evicted_hash]
-            
-            # Clean up sequences
-            sequences_to_remove = []
-            for seq in self.active_sequences:
-                if evicted_hash in seq:
-                    if not any(bh in self.blocks for bh in seq):
-                        sequences_to_remove.append(seq)
-            
-            for seq in sequences_to_remove:
-                if seq in self.active_sequences:
-                    self.active_sequences.remove(seq)
+            self.tier_policies[oldest.priority].remove(evicted_hash)
+            self._on_block_evicted(evicted_hash)
             
             return evicted_hash
         
         return None
     
-    def _remove_from_evictable(self, block_hash: str):
-        """Remove a block from evictable queue (it's being used again)."""
-        # Rebuild queue without this block (simple approach)
-        new_queue = [
-            (last_used, idx, h) 
-            for last_used, idx, h in self.evictable_queue 
-            if h != block_hash
-        ]
-        heapq.heapify(new_queue)
-        self.evictable_queue = new_queue
+    def _track_sequence(self, sequence_id: str, block_hashes: List[int]):
+        """Start tracking a sequence for sync until all of its blocks are evicted."""
+        self.sequences[sequence_id] = block_hashes
+        self._seq_ids_by_content[tuple(block_hashes)] = sequence_id
+        distinct = set(block_hashes)
+        for block_hash in distinct:
+            self.block_to_seqs.setdefault(block_hash, set()).add(sequence_id)
+        self._seq_cached_counts[sequence_id] = sum(1 for h in distinct if h in self.blocks)
+        if self._seq_cached_counts[sequence_id] == 0:
+            self._untrack_sequence(sequence_id)
     
-    def get_all_block_hashes(self) -> Set[str]:
+    def _untrack_sequence(self, sequence_id: str):
+        """Stop tracking a sequence and drop it from the reverse index."""
+        block_hashes = self.sequences.pop(sequence_id)
+        del self._seq_cached_counts[sequence_id]
+        del self._seq_ids_by_content[tuple(block_hashes)]
+        for block_hash in set(block_hashes):
+            seq_ids = self.block_to_seqs.get(block_hash)
+            if seq_ids is not None:
+                seq_ids.discard(sequence_id)
+                if not seq_ids:
+                    del self.block_to_seqs[block_hash]
+    
+    def _on_block_cached(self, block_hash: int):
+        """Update per-sequence cached counts after a block enters the cache."""
+        for sequence_id in self.block_to_seqs.get(block_hash, ()):
+            self._seq_cached_counts[sequence_id] += 1
+    
+    def _on_block_evicted(self, block_hash: int):
+        """Update per-sequence cached counts; drop sequences with no cached blocks."""
+        for sequence_id in list(self.block_to_seqs.get(block_hash, ())):
+            self._seq_cached_counts[sequence_id] -= 1
+            if self._seq_cached_counts[sequence_id] == 0:
+                self._untrack_sequence(sequence_id)
+    
+    def get_all_block_hashes(self) -> Set[int]:
         """Get all currently cached block hashes."""
         return set(self.blocks.keys())
     
-    def get_all_block_sequences(self) -> List[List[str]]:
+    def get_all_block_sequences(self) -> List[List[int]]:
         """Get all active block sequences for sync."""
         # Return all sequences that still have blocks in cache
         # This includes evictable blocks (they're still cached until evicted)
+        # Sequences with the same set of blocks are only returned once
         active_seqs = []
-        seen_hashes = set()
-        
-        # Check active_sequences first
-        for seq in self.active_sequences:
-            # Check if any blocks from this sequence are still in cache
-            cached_blocks_in_seq = [bh for bh in seq if bh in self.blocks]
-            if cached_blocks_in_seq:
-                # Use the full sequence (even if some blocks are evicted, we want the order)
-                active_seqs.append(seq.copy())
-                seen_hashes.update(seq)
-        
-        # Also include sequences from sequence_blocks that might not be in active_sequences
-        for sequence_id, block_hashes in self.sequence_blocks.items():
-            # Check if this sequence has any cached blocks
-            cached_blocks_in_seq = [bh for bh in block_hashes if bh in self.blocks]
-            if cached_blocks_in_seq:
-                # Check if we haven't already added this sequence (by comparing block hashes)
-                seq_set = set(block_hashes)
-                if not any(set(s) == seq_set for s in active_seqs):
-                    active_seqs.append(block_hashes.copy())
-                    seen_hashes.update(block_hashes)
+        seen_keys: Set[frozenset] = set()
+        
+        for seq in itertools.chain(self.sequences.values(), self.sequence_blocks.values()):
+            key = frozenset(seq)
+            if key in seen_keys or not any(h in self.blocks for h in seq):
+                continue
+            seen_keys.add(key)
+            # Use the full sequence (even if some blocks are evicted, we want the order)
+            active_seqs.append(seq.copy())
         
         return active_seqs
 
-
 class LightweightModel:
     """Lightweight CPU model for token generation."""
     
-    def __init__(self):
+    def __init__(self, tokenizer=None):
+        """tokenizer: an already-loaded GPT-2 tokenizer to share instead of loading another."""
         self.tokenizer = None
         self.model = None
         if LIGHTWEIGHT_MODEL_AVAILABLE:
             try:
                 # Use a very small model for fast CPU inference
                 model_name = "gpt2"  # Small and fast
-                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+                self.tokenizer = tokenizer if tokenizer is not None else AutoTokenizer.from_pretrained(model_name)
                 self.model = AutoModelForCausalLM.from_pretrained(model_name)
+                self.model.eval()
+                # Only a rough output length is needed, so int8 dynamic
+                # quantization of the Linear layers is plenty accurate
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                # Generation runs on a worker thread; one intra-op thread keeps it
+                # from competing with the event loop for every core
+                torch.set_num_threads(1)
                 if self.tokenizer.pad_token is None:
                     self.tokenizer.pad_token = self.tokenizer.eos_token
                 logger.info("Loaded lightweight model for token generation")
@@ -308,7 +540,7 @@ class LightweightModel:
             
             # Generate (with very limited generation for speed)
             if torch is not None:
-                with torch.no_grad():
+                with torch.inference_mode():
                     outputs = self.model.generate(
                         inputs["input_ids"],
                         max_new_tokens=min(max_tokens, 50),  # Limit for speed
@@ -332,42 +564,88 @@ class LightweightModel:
 class WorkerState:
     """Manages worker state including cache and tasks."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        worker_id: str = WORKER_ID,
+        tokenizer_utils: Optional[TokenizerUtils] = None,
+        lightweight_model: Optional["LightweightModel"] = None,
+    ):
+        """
+        tokenizer_utils and lightweight_model may be passed in to share one
+        loaded copy between workers running in the same process.
+        """
+        self.worker_id = worker_id
+        self.heartbeat_envelope = _worker_envelope(worker_id, "current_load")
+        self.sync_envelope = _worker_envelope(worker_id, "active_hashes")
         self.cache = BlockCache()
         self.tasks: List[Task] = []
-        self.lightweight_model = LightweightModel()
-        self.tokenizer_utils = TokenizerUtils()
+        self.tokenizer_utils = tokenizer_utils if tokenizer_utils is not None else TokenizerUtils()
+        # Both use GPT-2; load its tokenizer once
+        self.lightweight_model = (
+            lightweight_model if lightweight_model is not None
+            else LightweightModel(tokenizer=self.tokenizer_utils.tokenizer)
+        )
         self.request_counter = 0
+        # Exact-match LRU of prompt_key(prompt) -> (prompt, block_hashes, prompt_tokens, reuse_points)
+        self._tok_cache: OrderedDict = OrderedDict()
+        # Prompt head -> key of the most recent cached prompt starting with it
+        self._prefix_heads: Dict[str, object] = {}
+        # Running sum of remaining latency over self.tasks
+        self._total_load_ms: float = 0.0
+        # Hot per-task counters as parallel arrays (SoA), indexed by Task.slot
+        self._latency = np.zeros(TASK_ARRAY_CAPACITY, dtype=np.float64)
+        self._stage = np.full(TASK_ARRAY_CAPACITY, SLOT_FREE, dtype=np.uint8)
+        self._decode_remaining = np.zeros(TASK_ARRAY_CAPACITY, dtype=np.int32)
+        self._task_meta: List[Optional[Task]] = [None] * TASK_ARRAY_CAPACITY
+        self._free_slots: List[int] = list(range(TASK_ARRAY_CAPACITY - 1, -1, -1))
+        # Latency counters are as of this instant; process_tasks_loop sleeps
+        # until the next stage boundary and add_task sets task_added to wake it
+        self._last_tick = time.monotonic()
+        self.task_added = asyncio.Event()
     
-    def add_task(self, prompt: str, max_tokens: int) -> Task:
-        """Add a new inference task."""
+    async def add_task(self, prompt: str, max_tokens: int, system_prompt_blocks: int = 0) -> Task:
+        """
+        Add a new inference task. The first system_prompt_blocks blocks are a
+        shared system prompt and are pinned in the cache.
+        """
+        # Compute block hashes for the prompt
+        block_hashes, prompt_tokens = self._tokenize(prompt)
+        return await self.add_task_precomputed(
+            prompt, block_hashes, prompt_tokens, max_tokens, system_prompt_blocks
+        )
+    
+    async def add_task_precomputed(
+        self,
+        prompt: str,
+        block_hashes: List[int],
+        prompt_tokens: int,
+        max_tokens: int,
+        system_prompt_blocks: int = 0,
+    ) -> Task:
+        """Add a new inference task for a prompt whose block hashes are already known."""
         self.request_counter += 1
         request_id = f"req-{self.request_counter}"
         
-        # Compute block hashes for the prompt
-        block_hashes = self.tokenizer_utils.compute_block_hashes(prompt)
-        prompt_tokens = self.tokenizer_utils.get_num_tokens(prompt)
-        
-        # Check which blocks are cached
-        cached_blocks = self.cache.get_cached_blocks(block_hashes)
+        # Generate tokens to determine decode length. model.generate blocks for
+        # tens of ms, so run it off the event loop before touching cache state.
+        _, num_decode_tokens = await asyncio.to_thread(
+            self.lightweight_model.generate_tokens, prompt, max_tokens
+        )
         
-        # Allocate blocks (updates ref counts)
-        cached_after_alloc, blocks_to_allocate = self.cache.allocate_blocks(block_hashes, request_id)
+        # Check which blocks are cached and allocate the rest (updates ref counts)
+        cached_after_alloc, _, first_missing_idx = self.cache.plan_and_allocate(block_hashes, request_id)
+        for block_hash in block_hashes[:system_prompt_blocks]:
+            self.cache.pin(block_hash, PRIORITY_SYSTEM)
         
         # Determine how many blocks need computation
         # If some blocks are missing, we need to recompute from the first missing block
         blocks_to_compute = 0
-        if blocks_to_allocate:
-            # Find first missing block
-            first_missing_idx = block_hashes.index(blocks_to_allocate[0])
+        if first_missing_idx >= 0:
             blocks_to_compute = len(block_hashes) - first_missing_idx
         else:
             # All cached, minimal prefill
             blocks_to_compute = 0
         
-        # Generate tokens to determine decode length
-        _, num_decode_tokens = self.lightweight_model.generate_tokens(prompt, max_tokens)
-        
         task = Task(
             request_id=request_id,
             prompt=prompt,
@@ -386,133 +664,276 @@ class WorkerState:
             # All cached, minimal prefill
             task.current_latency_ms = PREFILL_BASE_MS * 0.1
         
+        # Counters are only advanced at ticks, so express this task's latency
+        # as of the last tick like everyone else's
+        since_tick_ms = (time.monotonic() - self._last_tick) * 1000
+        slot = self._alloc_slot()
+        task.slot = slot
+        self._latency[slot] = task.current_latency_ms + since_tick_ms
+        self._stage[slot] = STAGE_PREFILL
+        self._decode_remaining[slot] = task.decode_tokens_remaining
+        self._task_meta[slot] = task
+        
         self.tasks.append(task)
+        self._total_load_ms += task.current_latency_ms + since_tick_ms
+        self.task_added.set()
         return task
     
+    def _tokenize(self, prompt: str) -> Tuple[List[int], int]:
+        """
+        Return (block_hashes, prompt_tokens), reusing results for repeated prompts.
+        A prompt that extends a cached one (e.g. the next turn of a conversation)
+        only has its text after the longest shared block boundary tokenized.
+        """
+        key = prompt_key(prompt)
+        hit = self._tok_cache.get(key)
+        # Comparing the stored prompt rules out digest collisions
+        if hit is not None and hit[0] == prompt:
+            self._tok_cache.move_to_end(key)
+            return hit[1], hit[2]
+        
+        head = prompt[:PREFIX_HEAD_CHARS]
+        num_blocks, start = 0, 0
+        reuse_points: List[Tuple[int, int]] = []
+        base_key = self._prefix_heads.get(head) if len(prompt) > PREFIX_HEAD_CHARS else None
+        base_entry = self._tok_cache.get(base_key) if base_key is not None else None
+        if base_entry is not None:
+            shared = len(os.path.commonprefix((base_entry[0], prompt)))
+            for point in base_entry[3]:
+                if point[1] + 1 >= shared:
+                    break
+                num_blocks, start = point
+                reuse_points.append(point)
+        
+        token_ids, token_ends = self.tokenizer_utils.tokenize_with_offsets(prompt[start:])
+        block_hashes = (base_entry[1][:num_blocks] if num_blocks else []) + self.tokenizer_utils.hash_blocks(token_ids)
+        prompt_tokens = num_blocks * BLOCK_SIZE + len(token_ids)
+        
+        # Block ends where the tail can be re-tokenized on its own and give the
+        # same tokens: a single space before a word starts a new byte-level BPE
+        # pre-token, so no token crosses it.
+        for i in range(BLOCK_SIZE - 1, len(token_ids), BLOCK_SIZE):
+            end = start + token_ends[i]
+            if (end + 1 < len(prompt) and prompt[end] == " "
+                    and not prompt[end - 1].isspace() and not prompt[end + 1].isspace()):
+                reuse_points.append((num_blocks + (i + 1) // BLOCK_SIZE, end))
+        
+        self._tok_cache[key] = (prompt, block_hashes, prompt_tokens, reuse_points)
+        self._tok_cache.move_to_end(key)
+        if len(prompt) > PREFIX_HEAD_CHARS:
+            self._prefix_heads[head] = key
+        if len(self._tok_cache) > TOKENIZER_CACHE_SIZE:
+            evicted_key, evicted = self._tok_cache.popitem(last=False)
+            evicted_head = evicted[0][:PREFIX_HEAD_CHARS]
+            if self._prefix_heads.get(evicted_head) == evicted_key:
+                del self._prefix_heads[evicted_head]
+        return block_hashes, prompt_tokens
+    
+    def _alloc_slot(self) -> int:
+        """Reserve a slot in the task arrays, doubling their capacity if full."""
+        if not self._free_slots:
+            old_capacity = len(self._stage)
+            new_capacity = old_capacity * 2
+            self._latency = np.concatenate([self._latency, np.zeros(old_capacity, dtype=np.float64)])
+            self._stage = np.concatenate([self._stage, np.full(old_capacity, SLOT_FREE, dtype=np.uint8)])
+            self._decode_remaining = np.concatenate([self._decode_remaining, np.zeros(old_capacity, dtype=np.int32)])
+            self._task_meta.extend([None] * old_capacity)
+            self._free_slots.extend(range(new_capacity - 1, old_capacity - 1, -1))
+        return self._free_slots.pop()
+    
+    def _free_slot(self, slot: int):
+        """Release a slot in the task arrays."""
+        self._stage[slot] = SLOT_FREE
+        self._task_meta[slot] = None
+        self._free_slots.append(slot)
+    
     def process_tasks(self, delta_time_ms: float = 1.0):
         """Process tasks, advancing their latency counters."""
+        active = self._stage != SLOT_FREE
+        num_active = int(np.count_nonzero(active))
+        if num_active == 0:
+            return []
+        
+        # Every task's latency counter drops by delta_time_ms this tick; stage
+        # transitions and completions below correct the running total
+        self._total_load_ms -= delta_time_ms * num_active
+        self._latency[active] -= delta_time_ms
+        expired = active & (self._latency <= 0)
+        prefill_done = expired & (self._stage == STAGE_PREFILL)
+        decode_done = expired & (self._stage == STAGE_DECODE)
+        
+        if prefill_done.any():
+            # Prefill complete, move to decode
+            # For simplicity, we assume decode tokens are always computed
+            # In reality, if decode tokens are out of cache, treat as prefill
+            self._total_load_ms -= float(self._latency[prefill_done].sum())
+            self._stage[prefill_done] = STAGE_DECODE
+            # Carry the prefill overshoot into decode so long ticks lose no time
+            self._latency[prefill_done] += self._decode_remaining[prefill_done] * DECODE_PER_TOKEN_MS
+            self._total_load_ms += float(self._latency[prefill_done].sum())
+        
+        # Only completed tasks drop back to Python objects
         completed_tasks = []
+        completed_ids = set()
+        for slot in np.flatnonzero(decode_done):
+            task = self._task_meta[slot]
+            task.stage = "decode"
+            task.current_latency_ms = float(self._latency[slot])
+            task.total_latency_ms = (time.time() - task.created_at) * 1000  # Convert to ms
+            task.generated_tokens = task.decode_tokens_remaining
+            # Remove the overshoot (<= 0) this task contributed to the total
+            self._total_load_ms -= task.current_latency_ms
+            completed_tasks.append(task)
+            completed_ids.add(task.request_id)
+            self._free_slot(slot)
+            # Mark sequence as complete (blocks become evictable)
+            self.cache.mark_sequence_complete(task.request_id)
         
-        for task in self.tasks[:]:
-            if task.stage == "prefill":
-                task.current_latency_ms -= delta_time_ms
-                if task.current_latency_ms <= 0:
-                    # Prefill complete, move to decode
-                    task.stage = "decode"
-                    # Calculate decode latency
-                    if task.decode_tokens_remaining > 0:
-                        # Check if decode tokens might be out of cache
-                        # For simplicity, we assume decode tokens are always computed
-                        # In reality, if decode tokens are out of cache, treat as prefill
-                        task.current_latency_ms = task.decode_tokens_remaining * DECODE_PER_TOKEN_MS
-                    else:
-                        task.current_latency_ms = 0
-            
-            elif task.stage == "decode":
-                task.current_latency_ms -= delta_time_ms
-                # Generate tokens incrementally
-                if task.current_latency_ms > 0:
-                    # Simulate token generation progress
-                    tokens_generated = int((task.decode_tokens_remaining * DECODE_PER_TOKEN_MS - task.current_latency_ms) / DECODE_PER_TOKEN_MS)
-                    task.generated_tokens = min(tokens_generated, task.decode_tokens_remaining)
-                
-                if task.current_latency_ms <= 0:
-                    # Task complete
-                    task.total_latency_ms = (time.time() - task.created_at) * 1000  # Convert to ms
-                    task.generated_tokens = task.decode_tokens_remaining
-                    completed_tasks.append(task)
-                    # Mark sequence as complete (blocks become evictable)
-                    self.cache.mark_sequence_complete(task.request_id)
-        
-        # Remove completed tasks
-        for task in completed_tasks:
-            self.tasks.remove(task)
+        # Remove completed tasks in a single compaction pass
+        if completed_ids:
+            self.tasks = [t for t in self.tasks if t.request_id not in completed_ids]
+        
+        # Guard against floating-point drift in the running total
+        if not self.tasks:
+            self._total_load_ms = 0.0
         
         return completed_tasks
     
+    def tick(self) -> List[Task]:
+        """Advance all tasks by the wall time since the last tick."""
+        now = time.monotonic()
+        elapsed_ms = (now - self._last_tick) * 1000
+        self._last_tick = now
+        return self.process_tasks(delta_time_ms=elapsed_ms)
+    
+    def next_deadline_ms(self) -> Optional[float]:
+        """Milliseconds from the last tick until the next task changes stage, or None if idle."""
+        active = self._stage != SLOT_FREE
+        if not active.any():
+            return None
+        return float(self._latency[active].min())
+    
     def get_current_load(self) -> float:
         """Get current load in milliseconds of remaining work."""
-        total_load = 0.0
-        for task in self.tasks:
-            total_load += task.current_latency_ms
-        return total_load
+        # No task changes stage between ticks, so every counter has dropped by
+        # the same wall time since the last one
+        since_tick_ms = (time.monotonic() - self._last_tick) * 1000
+        return max(0.0, self._total_load_ms - since_tick_ms * len(self.tasks))
 
 
-async def heartbeat_loop(worker_state: WorkerState):
+async def heartbeat_loop(worker_state: WorkerState, session: aiohttp.ClientSession):
     """Send periodic heartbeats to router."""
-    async with aiohttp.ClientSession() as session:
-        while True:
-            try:
-                load = worker_state.get_current_load()
-                await session.post(
-                    f"{ROUTER_URL}/internal/heartbeat",
-                    json={"worker_id": WORKER_ID, "current_load": load},
-                )
-            except Exception as e:
-                logger.error(f"Heartbeat error: {e}")
-            
-            await asyncio.sleep(1)
+    while True:
+        try:
+            load = worker_state.get_current_load()
+            async with session.post(
+                HEARTBEAT_URL,
+                data=worker_state.heartbeat_envelope + dump_json(load) + b"}",
+                headers=JSON_HEADERS,
+            ) as resp:
+                await resp.read()
+        except Exception as e:
+            logger.error(f"Heartbeat error: {e}")
+        
+        await asyncio.sleep(1)
 
 
-async def sync_loop(worker_state: WorkerState):
-    """Sync cache state with router."""
-    async with aiohttp.ClientSession() as session:
-        while True:
-            try:
-                # Get all currently cached blocks (not evicted)
-                # This includes evictable blocks - they're still cached until actually evicted
-                all_cached_blocks = list(worker_state.cache.get_all_block_hashes())
-                
-                # Try to preserve order using sequences for better prefix matching
-                sequences = worker_state.cache.get_all_block_sequences()
-                all_blocks = []
-                seen = set()
-                
-                # First, add blocks from sequences in order (for prefix matching)
-                if sequences:
-                    for seq in sequences:
-                        for block_hash in seq:
-                            if block_hash in all_cached_blocks and block_hash not in seen:
-                                all_blocks.append(block_hash)
-                                seen.add(block_hash)
-                
-                # Add any remaining cached blocks
-                for block_hash in all_cached_blocks:
-                    if block_hash not in seen:
-                        all_blocks.append(block_hash)
-                
-                # Fallback: if we somehow have no blocks but cache says we do, use all cached
-                if not all_blocks:
-                    all_blocks = all_cached_blocks
-                
-                await session.post(
-                    f"{ROUTER_URL}/internal/sync",
-                    json={"worker_id": WORKER_ID, "active_hashes": all_blocks},
+async def sync_loop(worker_state: WorkerState, session: aiohttp.ClientSession):
+    """
+    Sync cache state with router. Sends only the hashes added/removed since the
+    last sync, with a full snapshot every FULL_SYNC_EVERY ticks, after an error,
+    or when the router asks for one.
+    """
+    last_synced: Set[int] = set()
+    sync_seq = 0
+    ticks_since_full = FULL_SYNC_EVERY  # Start with a full snapshot
+    while True:
+        try:
+            # Get all currently cached blocks (not evicted)
+            # This includes evictable blocks - they're still cached until actually evicted
+            all_cached_blocks = worker_state.cache.get_all_block_hashes()
+            
+            # Try to preserve order using sequences for better prefix matching
+            sequences = worker_state.cache.get_all_block_sequences()
+            all_blocks = []
+            seen = set()
+            
+            # First, add blocks from sequences in order (for prefix matching)
+            if sequences:
+                for seq in sequences:
+                    for block_hash in seq:
+                        if block_hash in all_cached_blocks and block_hash not in seen:
+                            all_blocks.append(block_hash)
+                            seen.add(block_hash)
+            
+            # Add any remaining cached blocks
+            for block_hash in all_cached_blocks:
+                if block_hash not in seen:
+                    all_blocks.append(block_hash)
+            
+            if ticks_since_full >= FULL_SYNC_EVERY:
+                # Full snapshot: resets the router's baseline to sync_seq
+                ticks_since_full = 0
+                sync_seq += 1
+                async with session.post(
+                    SYNC_URL,
+                    data=worker_state.sync_envelope + dump_json(all_blocks) + b',"seq":' + dump_json(sync_seq) + b"}",
+                    headers=JSON_HEADERS,
                     timeout=aiohttp.ClientTimeout(total=5)
-                )
+                ) as resp:
+                    await resp.read()
+                    resp.raise_for_status()
+                last_synced = all_cached_blocks
                 if all_blocks:
                     logger.info(f"✅ Synced {len(all_blocks)} blocks to router")
                 else:
-                    # Debug why no blocks
-                    total_cached = len(worker_state.cache.get_all_block_hashes())
-                    sequences = worker_state.cache.get_all_block_sequences()
                     logger.warning(
-                        f"⚠️  Sync: 0 blocks to send, but cache has {total_cached} blocks, "
-                        f"{len(sequences)} sequences"
+                        f"⚠️  Sync: 0 blocks to send, cache has {len(sequences)} sequences"
                     )
-            except asyncio.TimeoutError:
-                logger.warning("Sync timeout - router may be busy")
-            except aiohttp.ClientError as e:
-                logger.warning(f"Sync connection error: {e}")
-            except Exception as e:
-                logger.error(f"Sync error: {e}")
-            await asyncio.sleep(5)
+            else:
+                ticks_since_full += 1
+                added = [h for h in all_blocks if h not in last_synced]
+                removed = list(last_synced - all_cached_blocks)
+                if added or removed:
+                    sync_seq += 1
+                    async with session.post(
+                        SYNC_DELTA_URL,
+                        data=dump_json({"worker_id": worker_state.worker_id, "seq": sync_seq, "added": added, "removed": removed}),
+                        headers=JSON_HEADERS,
+                        timeout=aiohttp.ClientTimeout(total=5)
+                    ) as resp:
+                        resp.raise_for_status()
+                        body = await resp.json()
+                    if body.get("status") == "resync":
+                        ticks_since_full = FULL_SYNC_EVERY
+                    else:
+                        last_synced = all_cached_blocks
+                        logger.info(f"✅ Synced +{len(added)} -{len(removed)} blocks to router")
+        except asyncio.TimeoutError:
+            ticks_since_full = FULL_SYNC_EVERY
+            logger.warning("Sync timeout - router may be busy")
+        except aiohttp.ClientError as e:
+            ticks_since_full = FULL_SYNC_EVERY
+            logger.warning(f"Sync connection error: {e}")
+        except Exception as e:
+            ticks_since_full = FULL_SYNC_EVERY
+            logger.error(f"Sync error: {e}")
+        await asyncio.sleep(5)
 
 
 async def process_tasks_loop(worker_state: WorkerState):
     """Main task processing loop."""
     while True:
-        completed = worker_state.process_tasks(delta_time_ms=1.0)
+        # Sleep until the next task finishes a stage, or a new task arrives
+        next_ms = worker_state.next_deadline_ms()
+        timeout = None if next_ms is None else max(0.001, next_ms / 1000.0)
+        try:
+            await asyncio.wait_for(worker_state.task_added.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        worker_state.task_added.clear()
+        
+        completed = worker_state.tick()
         for task in completed:
             logger.info(
                 f"Task {task.request_id} completed: "
@@ -520,7 +941,6 @@ async def process_tasks_loop(worker_state: WorkerState):
                 f"decode_tokens={task.decode_tokens_remaining}, "
                 f"total_latency={task.total_latency_ms*1000:.2f}ms"
             )
-        await asyncio.sleep(0.001)  # Small delay to prevent busy-waiting
 
 
 async def handle_inference_request(request_data: dict) -> dict:
@@ -533,8 +953,12 @@ async def handle_inference_request(request_data: dict) -> dict:
     pass
 
 
-async def fake_request_loop(worker_state: WorkerState):
-    """Generate fake requests for testing."""
+async def fake_request_loop(worker_state: WorkerState, shared_system_prompt: bool = SHARED_SYSTEM_PROMPT):
+    """
+    Generate fake requests for testing. With shared_system_prompt, every
+    template opens with the same system prompt, as chat deployments do, and
+    its blocks are pinned; this changes the workload, so it is off by default.
+    """
     # Use longer prompts to ensure we get multiple blocks (16 tokens per block)
     prompts = [
         "The quick brown fox jumps over the lazy dog. " * 3,  # Repeat to get more tokens
@@ -542,11 +966,29 @@ async def fake_request_loop(worker_state: WorkerState):
         "To be or not to be, that is the question. " * 3,
         "In the beginning was the Word, and the Word was with God. " * 2,
     ]
+    if shared_system_prompt:
+        system_prompt = "You are a helpful assistant. Answer briefly and accurately, and say so when unsure. "
+        prompts = [system_prompt + p for p in prompts]
+    # Tokenize the templates once; requests then cycle through them
+    tokenizer_utils = worker_state.tokenizer_utils
+    templates: List[Tuple[str, List[int], int]] = [
+        (p, tokenizer_utils.compute_block_hashes(p), tokenizer_utils.get_num_tokens(p))
+        for p in prompts
+    ]
+    # The opening blocks all templates share are the system prompt's; they get pinned
+    system_prompt_blocks = 0
+    if shared_system_prompt:
+        for column in zip(*(block_hashes for _, block_hashes, _ in templates)):
+            if len(set(column)) > 1:
+                break
+            system_prompt_blocks += 1
     
-    while True:
+    for prompt, block_hashes, prompt_tokens in itertools.cycle(templates):
         await asyncio.sleep(random.uniform(2.0, 5.0))
-        prompt = random.choice(prompts)
-        task = worker_state.add_task(prompt, max_tokens=random.randint(20, 100))
+        task = await worker_state.add_task_precomputed(
+            prompt, block_hashes, prompt_tokens, max_tokens=random.randint(20, 100),
+            system_prompt_blocks=system_prompt_blocks,
+        )
         logger.info(
             f"Added task {task.request_id}: "
             f"blocks={len(task.block_hashes)}, "
@@ -559,21 +1001,45 @@ async def fake_request_loop(worker_state: WorkerState):
         logger.debug(f"Cache now has {total_blocks} blocks total")
 
 
-async def main():
-    logger.info(f"Starting Mock Worker: {WORKER_ID}")
+async def run_worker(
+    worker_id: str = WORKER_ID,
+    tokenizer_utils: Optional[TokenizerUtils] = None,
+    lightweight_model: Optional[LightweightModel] = None,
+):
+    """
+    Run one worker until cancelled. Several can share an event loop as long as
+    each has its own worker_id; pass tokenizer_utils/lightweight_model to load
+    the model once for all of them.
+    """
+    logger.info(f"Starting Mock Worker: {worker_id}")
     logger.info(f"Cache capacity: {BLOCKS_PER_GPU} blocks ({BLOCKS_PER_GPU * BLOCK_SIZE} tokens)")
     
-    worker_state = WorkerState()
-    
-    # Start background tasks
-    asyncio.create_task(heartbeat_loop(worker_state))
-    asyncio.create_task(sync_loop(worker_state))
-    asyncio.create_task(process_tasks_loop(worker_state))
+    worker_state = WorkerState(worker_id, tokenizer_utils, lightweight_model)
     
-    # TEMP: fake requests for testing
-    asyncio.create_task(fake_request_loop(worker_state))
-    
-    await asyncio.Event().wait()
+    # One keep-alive connection pool to the router shared by heartbeat and sync
+    connector = aiohttp.TCPConnector(
+        limit=8, limit_per_host=4, keepalive_timeout=60, enable_cleanup_closed=True
+    )
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Start background tasks
+        tasks = [
+            asyncio.create_task(heartbeat_loop(worker_state, session)),
+            asyncio.create_task(sync_loop(worker_state, session)),
+            asyncio.create_task(process_tasks_loop(worker_state)),
+            # TEMP: fake requests for testing
+            asyncio.create_task(fake_request_loop(worker_state)),
+        ]
+        try:
+            await asyncio.Event().wait()
+        finally:
+            # Stop this worker's loops before its session closes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def main():
+    await run_worker()
 
 
 if __name__ == "__main__":
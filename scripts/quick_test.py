@@ -10,24 +10,22 @@ import subprocess
 import sys
 import os
 
+from _client import check_router, get_session, close_session, send_completion, install_uvloop
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("QuickTest")
 
-ROUTER_URL = "http://localhost:8000"
+HEALTH_CHECK_TIMEOUT = aiohttp.ClientTimeout(total=1)  # Fail fast if the router is down
 
 
 async def wait_for_router(max_wait=10):
     """Wait for router to be ready."""
     logger.info("Waiting for router to start...")
+    session = await get_session()
     for i in range(max_wait):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{ROUTER_URL}/docs", timeout=aiohttp.ClientTimeout(total=1)) as resp:
-                    if resp.status == 200:
-                        logger.info("✅ Router is ready!")
-                        return True
-        except:
-            pass
+        if await check_router(session, HEALTH_CHECK_TIMEOUT):
+            logger.info("✅ Router is ready!")
+            return True
         await asyncio.sleep(1)
     return False
 
@@ -49,56 +47,44 @@ async def simple_test():
     logger.info("Waiting for worker to register...")
     await asyncio.sleep(3)
     
-    async with aiohttp.ClientSession() as session:
-        # Test 1: Send a request
-        logger.info("\n📤 Test 1: Sending request (should be MISS)...")
-        prompt = "The quick brown fox jumps over the lazy dog."
-        
-        try:
-            async with session.post(
-                f"{ROUTER_URL}/v1/completions",
-                json={"prompt": prompt, "max_tokens": 50},
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    logger.info(f"✅ Response received:")
-                    logger.info(f"   Worker: {data.get('assigned_worker')}")
-                    logger.info(f"   Status: {data.get('cache_status')}")
-                    logger.info(f"   Blocks: {len(data.get('block_hashes', []))}")
-                    logger.info(f"   Match: {data.get('match_length', 0)} blocks")
-                else:
-                    logger.error(f"❌ Router returned status {resp.status}")
-        except asyncio.TimeoutError:
-            logger.error("❌ Request timed out")
-        except Exception as e:
-            logger.error(f"❌ Error: {e}")
-        
-        # Test 2: Send same request again (might be HIT after sync)
-        logger.info("\n📤 Test 2: Sending same request again...")
-        await asyncio.sleep(2)  # Wait for sync
-        
-        try:
-            async with session.post(
-                f"{ROUTER_URL}/v1/completions",
-                json={"prompt": prompt, "max_tokens": 50},
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    logger.info(f"✅ Response received:")
-                    logger.info(f"   Worker: {data.get('assigned_worker')}")
-                    logger.info(f"   Status: {data.get('cache_status')}")
-                    logger.info(f"   Match: {data.get('match_length', 0)} blocks")
-                    if data.get('match_length', 0) > 0:
-                        logger.info("   🎯 Found prefix match!")
-        except Exception as e:
-            logger.error(f"❌ Error: {e}")
-        
-        # Test 3: Check worker heartbeat
-        logger.info("\n📤 Test 3: Checking worker status...")
-        # This is just informational - we can't directly query workers
-        logger.info("   Check mock_worker.py logs for task processing")
+    session = await get_session()
+    # Test 1: Send a request
+    logger.info("\n📤 Test 1: Sending request (should be MISS)...")
+    prompt = "The quick brown fox jumps over the lazy dog."
+    
+    try:
+        data = await send_completion(session, prompt)
+        logger.info(f"✅ Response received:")
+        logger.info(f"   Worker: {data.get('assigned_worker')}")
+        logger.info(f"   Status: {data.get('cache_status')}")
+        logger.info(f"   Blocks: {len(data.get('block_hashes', []))}")
+        logger.info(f"   Match: {data.get('match_length', 0)} blocks")
+    except aiohttp.ClientResponseError as e:
+        logger.error(f"❌ Router returned status {e.status}")
+    except asyncio.TimeoutError:
+        logger.error("❌ Request timed out")
+    except Exception as e:
+        logger.error(f"❌ Error: {e}")
+    
+    # Test 2: Send same request again (might be HIT after sync)
+    logger.info("\n📤 Test 2: Sending same request again...")
+    await asyncio.sleep(2)  # Wait for sync
+    
+    try:
+        data = await send_completion(session, prompt)
+        logger.info(f"✅ Response received:")
+        logger.info(f"   Worker: {data.get('assigned_worker')}")
+        logger.info(f"   Status: {data.get('cache_status')}")
+        logger.info(f"   Match: {data.get('match_length', 0)} blocks")
+        if data.get('match_length', 0) > 0:
+            logger.info("   🎯 Found prefix match!")
+    except Exception as e:
+        logger.error(f"❌ Error: {e}")
+    
+    # Test 3: Check worker heartbeat
+    logger.info("\n📤 Test 3: Checking worker status...")
+    # This is just informational - we can't directly query workers
+    logger.info("   Check mock_worker.py logs for task processing")
     
     logger.info("\n" + "=" * 60)
     logger.info("Quick test completed!")
@@ -108,6 +94,13 @@ async def simple_test():
     logger.info("\nFor detailed testing guide, see TESTING.md")
 
 
+async def main():
+    try:
+        await simple_test()
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
     logger.info("""
     ╔══════════════════════════════════════════════════════════════╗
@@ -123,5 +116,6 @@ if __name__ == "__main__":
     Then run this script to test the integration.
     """)
     
-    asyncio.run(simple_test())
+    install_uvloop()
+    asyncio.run(main())
 
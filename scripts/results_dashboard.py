@@ -5,18 +5,91 @@ Displays real-time and historical metrics for the block-based cache router syste
 import asyncio
 import aiohttp
 import time
-import json
+from time import perf_counter_ns
 from datetime import datetime
-from collections import defaultdict, deque
-from typing import Dict, List
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Union
 import os
 import sys
+import numpy as np
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-ROUTER_URL = "http://localhost:8000"
+from _client import (
+    STATS_URL, get_session, close_session, dump_json, load_json, send_completion,
+    write_json_file, write_ndjson_file, ainput, install_uvloop,
+)
+
+MAX_RECORDED_REQUESTS = 10_000  # Request records kept for recent activity/percentiles
+MAX_WORKER_LATENCIES = 1024  # Per-worker latencies kept for the rolling average
+CLEAR_SCREEN = "\x1b[2J\x1b[H"  # ANSI: clear screen and move cursor home
+STATUS_NAMES = ("MISS", "HIT", "UNKNOWN")  # Index is the code stored in MetricsRing.status
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+
+class MetricsRing:
+    """
+    Fixed-capacity ring of request records stored column-wise in numpy arrays.
+    Once full, each append overwrites the oldest record.
+    """
+    
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.n = 0
+        self.pos = 0
+        self.ts = np.empty(cap, np.float64)
+        self.lat = np.empty(cap, np.float64)  # NaN when the record has no latency
+        self.match = np.empty(cap, np.int32)
+        self.blocks = np.empty(cap, np.int32)
+        self.status = np.empty(cap, np.uint8)
+        self.worker_id = np.empty(cap, np.int32)
+        self._worker_ids: Dict[str, int] = {}  # Interned worker names
+        self._worker_names: List[str] = []
+    
+    def __len__(self) -> int:
+        return self.n
+    
+    def append(self, request: Dict):
+        """Store one request record, overwriting the oldest once full."""
+        worker = request.get("worker", "UNKNOWN")
+        wid = self._worker_ids.get(worker)
+        if wid is None:
+            wid = self._worker_ids[worker] = len(self._worker_names)
+            self._worker_names.append(worker)
+        
+        i = self.pos
+        self.ts[i] = request.get("timestamp", time.time())
+        self.lat[i] = request.get("latency_ms", np.nan)
+        self.match[i] = request.get("match_length", 0)
+        self.blocks[i] = request.get("blocks", 0)
+        self.status[i] = STATUS_CODES.get(request.get("cache_status"), STATUS_CODES["UNKNOWN"])
+        self.worker_id[i] = wid
+        self.pos = (i + 1) % self.cap
+        self.n = min(self.n + 1, self.cap)
+    
+    def latencies(self) -> np.ndarray:
+        """Retained latencies in storage order (fine for order-free stats)."""
+        lat = self.lat[:self.n]
+        return lat[~np.isnan(lat)]
+    
+    def records(self, last: Optional[int] = None) -> Iterator[Dict]:
+        """Yield retained records (or only the `last` newest) as dicts, oldest first."""
+        count = self.n if last is None else max(0, min(last, self.n))
+        start = self.pos - count
+        for i in range(start, self.pos):
+            i %= self.cap
+            record = {
+                "timestamp": float(self.ts[i]),
+                "cache_status": STATUS_NAMES[self.status[i]],
+                "match_length": int(self.match[i]),
+                "blocks": int(self.blocks[i]),
+                "worker": self._worker_names[self.worker_id[i]],
+            }
+            if not np.isnan(self.lat[i]):
+                record["latency_ms"] = float(self.lat[i])
+            yield record
 
 
 class Dashboard:
@@ -24,55 +97,61 @@ class Dashboard:
     
     def __init__(self):
         self.metrics_history = deque(maxlen=100)  # Keep last 100 data points
-        self.requests = []
+        self.requests = MetricsRing(MAX_RECORDED_REQUESTS)
         self.workers = {}
-        self.start_time = time.time()
+        self.start_time = perf_counter_ns()  # Monotonic, for uptime
+        # Running totals over every recorded request (not just those still in self.requests)
+        self._total = 0
+        self._hits = 0
+        self._misses = 0
+        self._lat_sum = 0.0
+        self._lat_count = 0
+        self._lat_min = float("inf")
+        self._lat_max = 0.0
+        self._match_sum = 0
+        self._blocks_sum = 0
     
     async def collect_metrics(self):
-        """Collect metrics from router and workers."""
-        async with aiohttp.ClientSession() as session:
-            # Send a test request to get current state
-            try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": "Test request for metrics", "max_tokens": 10},
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return {
-                            "timestamp": time.time(),
-                            "cache_status": data.get("cache_status", "UNKNOWN"),
-                            "match_length": data.get("match_length", 0),
-                            "blocks": len(data.get("block_hashes", [])),
-                            "worker": data.get("assigned_worker", "UNKNOWN"),
-                        }
-            except:
-                pass
+        """Fetch the router's routing counters from /internal/stats (no test traffic)."""
+        session = await get_session()
+        try:
+            async with session.get(
+                STATS_URL
+            ) as resp:
+                if resp.status == 200:
+                    snapshot = {"timestamp": time.time(), **load_json(await resp.read())}
+                    self.metrics_history.append(snapshot)
+                    return snapshot
+        except:
+            pass
         return None
     
+    def uptime_seconds(self) -> float:
+        """Seconds since the dashboard was created."""
+        return (perf_counter_ns() - self.start_time) / 1e9
+    
     def display_header(self):
         """Display dashboard header."""
         print("\n" + "=" * 100)
         print(" " * 30 + "BLOCK-BASED CACHE ROUTER - RESULTS DASHBOARD")
         print("=" * 100)
         print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Uptime: {time.time() - self.start_time:.1f} seconds")
+        print(f"Uptime: {self.uptime_seconds():.1f} seconds")
         print("=" * 100)
     
     def display_cache_stats(self):
         """Display cache statistics."""
-        if not self.requests:
+        if not self._total:
             print("\n📊 Cache Statistics: No data collected yet")
             return
         
-        hits = sum(1 for r in self.requests if r.get("cache_status") == "HIT")
-        misses = sum(1 for r in self.requests if r.get("cache_status") == "MISS")
-        total = len(self.requests)
+        hits = self._hits
+        misses = self._misses
+        total = self._total
         
-        hit_rate = (hits / total * 100) if total > 0 else 0
-        avg_match = sum(r.get("match_length", 0) for r in self.requests) / total if total > 0 else 0
-        avg_blocks = sum(r.get("blocks", 0) for r in self.requests) / total if total > 0 else 0
+        hit_rate = hits / total * 100
+        avg_match = self._match_sum / total
+        avg_blocks = self._blocks_sum / total
         
         print("\n💾 Cache Statistics:")
         print(f"   Total Requests:     {total}")
@@ -83,21 +162,24 @@ class Dashboard:
     
     def display_latency_stats(self):
         """Display latency statistics."""
-        latencies = [r["latency_ms"] for r in self.requests if "latency_ms" in r]
-        
-        if not latencies:
+        if not self._lat_count:
             print("\n⏱️  Latency Statistics: No data collected yet")
             return
         
-        latencies.sort()
+        # Percentiles cover the requests still in the window; np.partition
+        # places just the three order statistics instead of sorting everything
+        latencies = self.requests.latencies()
+        n = len(latencies)
+        ranks = [n // 2, int(n * 0.95), int(n * 0.99)]
+        p50, p95, p99 = np.partition(latencies, ranks)[ranks]
         print("\n⏱️  Latency Statistics:")
-        print(f"   Average:  {sum(latencies)/len(latencies):.2f} ms")
-        print(f"   Median:   {latencies[len(latencies)//2]:.2f} ms")
-        print(f"   Min:      {min(latencies):.2f} ms")
-        print(f"   Max:      {max(latencies):.2f} ms")
-        if len(latencies) > 10:
-            print(f"   p95:      {latencies[int(len(latencies)*0.95)]:.2f} ms")
-            print(f"   p99:      {latencies[int(len(latencies)*0.99)]:.2f} ms")
+        print(f"   Average:  {self._lat_sum / self._lat_count:.2f} ms")
+        print(f"   Median:   {p50:.2f} ms")
+        print(f"   Min:      {self._lat_min:.2f} ms")
+        print(f"   Max:      {self._lat_max:.2f} ms")
+        if n > 10:
+            print(f"   p95:      {p95:.2f} ms")
+            print(f"   p99:      {p99:.2f} ms")
     
     def display_recent_activity(self):
         """Display recent request activity."""
@@ -109,7 +191,7 @@ class Dashboard:
         print("   Status | Match | Blocks | Latency  | Worker")
         print("   " + "-" * 60)
         
-        for req in self.requests[-10:]:
+        for req in self._recent(10):
             status = req.get("cache_status", "UNKNOWN")
             icon = "✅ HIT " if status == "HIT" else "❌ MISS"
             match = req.get("match_length", 0)
@@ -139,25 +221,121 @@ class Dashboard:
         
         for worker_id, stats in self.workers.items():
             requests = stats.get('requests', 0)
-            total_requests = len(self.requests)
+            total_requests = self._total
             percentage = (requests / total_requests * 100) if total_requests > 0 else 0
             print(f"   {worker_id}:")
             print(f"      Requests: {requests} ({percentage:.1f}% of total)")
-            print(f"      Avg Latency: {stats.get('avg_latency', 0):.2f} ms")
-            print(f"      Cache Hits: {sum(1 for r in self.requests if r.get('worker') == worker_id and r.get('cache_status') == 'HIT')}")
-            print(f"      Cache Misses: {sum(1 for r in self.requests if r.get('worker') == worker_id and r.get('cache_status') == 'MISS')}")
+            print(f"      Avg Latency: {self._worker_avg_latency(stats):.2f} ms")
+            print(f"      Cache Hits: {stats.get('hits', 0)}")
+            print(f"      Cache Misses: {stats.get('misses', 0)}")
+    
+    def display_router_stats(self):
+        """Display the latest router-side counters from /internal/stats."""
+        if not self.metrics_history:
+            print("\n🧭 Router Statistics: Not fetched yet")
+            return
+        
+        stats = self.metrics_history[-1]
+        total = stats.get("total_requests", 0)
+        hit_rate = stats.get("hits", 0) / total * 100 if total else 0
+        print("\n🧭 Router Statistics (all traffic):")
+        print(f"   Total Requests:     {total}")
+        print(f"   Cache Hits:         {stats.get('hits', 0)} ({hit_rate:.1f}%)")
+        print(f"   Cache Misses:       {stats.get('misses', 0)}")
+        print(f"   Avg Match Length:   {stats.get('avg_match', 0):.1f} blocks")
+        print(f"   p95 Routing Time:   {stats.get('p95_latency', 0):.2f} ms")
+        for worker_id, count in stats.get("worker_counts", {}).items():
+            print(f"   {worker_id}: {count} requests")
     
     def display_summary(self):
         """Display full dashboard."""
         self.display_header()
+        self.display_router_stats()
         self.display_cache_stats()
         self.display_latency_stats()
         self.display_recent_activity()
         self.display_worker_stats()
         print("\n" + "=" * 100)
     
-    async def run_continuous(self, interval: float = 5.0):
-        """Run continuous monitoring."""
+    async def _probe(self, session: aiohttp.ClientSession, payload: Union[str, bytes]):
+        """Send one test request (prompt or pre-encoded body); return its record, or None if it failed."""
+        try:
+            data = await send_completion(session, payload)
+        except Exception:
+            return None
+        return {
+            "timestamp": time.time(),
+            "cache_status": data.get("cache_status", "UNKNOWN"),
+            "match_length": data.get("match_length", 0),
+            "blocks": len(data.get("block_hashes", [])),
+            "worker": data.get("assigned_worker", "UNKNOWN"),
+            "latency_ms": data["_latency_ms"],
+        }
+    
+    def _record(self, request: Dict):
+        """Add a request record and update the running totals and per-worker stats in O(1)."""
+        self.requests.append(request)
+        
+        status = request.get("cache_status")
+        self._total += 1
+        self._hits += status == "HIT"
+        self._misses += status == "MISS"
+        self._match_sum += request.get("match_length", 0)
+        self._blocks_sum += request.get("blocks", 0)
+        
+        worker_id = request["worker"]
+        if worker_id not in self.workers:
+            self.workers[worker_id] = {
+                "requests": 0, "hits": 0, "misses": 0,
+                "lat_ring": np.empty(MAX_WORKER_LATENCIES, dtype=np.float64),
+                "lat_pos": 0, "lat_full": False,
+            }
+        stats = self.workers[worker_id]
+        stats["requests"] += 1
+        stats["hits"] += status == "HIT"
+        stats["misses"] += status == "MISS"
+        
+        latency = request.get("latency_ms")
+        if latency is None:
+            return
+        self._lat_sum += latency
+        self._lat_count += 1
+        self._lat_min = min(self._lat_min, latency)
+        self._lat_max = max(self._lat_max, latency)
+        
+        pos = stats["lat_pos"]
+        stats["lat_ring"][pos] = latency
+        pos += 1
+        if pos == MAX_WORKER_LATENCIES:
+            pos = 0
+            stats["lat_full"] = True
+        stats["lat_pos"] = pos
+    
+    @staticmethod
+    def _worker_latencies(stats: Dict) -> np.ndarray:
+        """Return a worker's retained latencies, oldest first."""
+        ring, pos = stats["lat_ring"], stats["lat_pos"]
+        if stats["lat_full"]:
+            return np.concatenate((ring[pos:], ring[:pos]))
+        return ring[:pos]
+    
+    @staticmethod
+    def _worker_avg_latency(stats: Dict) -> float:
+        """Mean of a worker's retained latencies (order doesn't matter, so no copy)."""
+        ring = stats["lat_ring"] if stats["lat_full"] else stats["lat_ring"][:stats["lat_pos"]]
+        return float(ring.mean()) if len(ring) else 0.0
+    
+    def _recent(self, n: int) -> List[Dict]:
+        """Return the last n request records, oldest first."""
+        return list(self.requests.records(last=n))
+    
+    async def run_continuous(self, interval: float = 5.0, generate_load: bool = False,
+                             rate: float = 0.6, concurrency: int = 8):
+        """
+        Run continuous monitoring, polling /internal/stats every `interval` seconds.
+        With generate_load, test requests are also issued at a fixed `rate` (req/s)
+        with at most `concurrency` in flight.
+        """
         print("Starting continuous monitoring (press Ctrl+C to stop)...")
         
         test_prompts = [
@@ -165,59 +343,45 @@ class Dashboard:
             "Once upon a time in a galaxy far far away. " * 2,
             "To be or not to be, that is the question. " * 2,
         ]
+        test_payloads = [dump_json({"prompt": p, "max_tokens": 50}) for p in test_prompts]
         
         import random
-        request_count = 0
         export_done = False
+        session = await get_session()
+        sem = asyncio.Semaphore(concurrency)
+        period = 1.0 / rate
         
-        try:
+        async def do_one(payload: bytes):
+            try:
+                request = await self._probe(session, payload)
+                if request is not None:
+                    self._record(request)
+            finally:
+                sem.release()
+        
+        if os.name == 'nt':
+            os.system('')  # Enables ANSI escape handling in the Windows console
+        
+        async def display_loop():
             while True:
-                # Send a test request
-                prompt = random.choice(test_prompts)
-                async with aiohttp.ClientSession() as session:
-                    start = time.time()
-                    try:
-                        async with session.post(
-                            f"{ROUTER_URL}/v1/completions",
-                            json={"prompt": prompt, "max_tokens": 50},
-                            timeout=aiohttp.ClientTimeout(total=10)
-                        ) as resp:
-                            if resp.status == 200:
-                                data = await resp.json()
-                                latency = (time.time() - start) * 1000
-                                
-                                request = {
-                                    "timestamp": time.time(),
-                                    "cache_status": data.get("cache_status", "UNKNOWN"),
-                                    "match_length": data.get("match_length", 0),
-                                    "blocks": len(data.get("block_hashes", [])),
-                                    "worker": data.get("assigned_worker", "UNKNOWN"),
-                                    "latency_ms": latency,
-                                }
-                                
-                                self.requests.append(request)
-                                request_count += 1
-                                
-                                # Update worker stats
-                                worker_id = request["worker"]
-                                if worker_id not in self.workers:
-                                    self.workers[worker_id] = {"requests": 0, "latencies": []}
-                                self.workers[worker_id]["requests"] += 1
-                                self.workers[worker_id]["latencies"].append(latency)
-                                self.workers[worker_id]["avg_latency"] = sum(
-                                    self.workers[worker_id]["latencies"]
-                                ) / len(self.workers[worker_id]["latencies"])
-                    except Exception as e:
-                        pass
-                
-                # Display dashboard every N requests or on interval
-                if request_count % 3 == 0:
-                    import os
-                    os.system('cls' if os.name == 'nt' else 'clear')  # Clear screen
-                    self.display_summary()
-                    print(f"\n🔄 Auto-refreshing every {interval}s... (Requests: {request_count})")
-                
                 await asyncio.sleep(interval)
+                await self.collect_metrics()
+                sys.stdout.write(CLEAR_SCREEN)
+                sys.stdout.flush()
+                self.display_summary()
+                print(f"\n🔄 Auto-refreshing every {interval}s... (Requests: {self._total})")
+        
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(display_loop())
+                next_tick = time.perf_counter()
+                while generate_load:
+                    # Blocks while `concurrency` requests are already in flight
+                    await sem.acquire()
+                    tg.create_task(do_one(random.choice(test_payloads)))
+                    # Don't burst to catch up if the router fell behind the schedule
+                    next_tick = max(next_tick + period, time.perf_counter())
+                    await asyncio.sleep(next_tick - time.perf_counter())
         
         except (KeyboardInterrupt, asyncio.CancelledError):
             if not export_done:
@@ -243,34 +407,44 @@ class Dashboard:
                     pass
     
     def export_results(self, filename: str = "dashboard_results.json"):
-        """Export results to JSON."""
+        """Export summary to JSON and every retained request to a sibling .ndjson file."""
         data = {
             "timestamp": datetime.now().isoformat(),
-            "uptime_seconds": time.time() - self.start_time,
-            "total_requests": len(self.requests),
+            "uptime_seconds": self.uptime_seconds(),
+            "total_requests": self._total,
             "cache_stats": {
-                "hits": sum(1 for r in self.requests if r.get("cache_status") == "HIT"),
-                "misses": sum(1 for r in self.requests if r.get("cache_status") == "MISS"),
-                "hit_rate_percent": (sum(1 for r in self.requests if r.get("cache_status") == "HIT") / len(self.requests) * 100) if self.requests else 0,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate_percent": (self._hits / self._total * 100) if self._total else 0,
             },
             "latency_stats": {
-                "avg": sum(r["latency_ms"] for r in self.requests if "latency_ms" in r) / len(self.requests) if self.requests else 0,
-                "min": min((r["latency_ms"] for r in self.requests if "latency_ms" in r), default=0),
-                "max": max((r["latency_ms"] for r in self.requests if "latency_ms" in r), default=0),
+                "avg": self._lat_sum / self._lat_count if self._lat_count else 0,
+                "min": self._lat_min if self._lat_count else 0,
+                "max": self._lat_max,
             },
-            "workers": self.workers,
-            "recent_requests": self.requests[-20:],
-            "all_requests": self.requests,  # Include all requests for analysis
+            "workers": {
+                worker_id: {
+                    "requests": stats["requests"],
+                    "hits": stats["hits"],
+                    "misses": stats["misses"],
+                    "avg_latency": self._worker_avg_latency(stats),
+                    "latencies": self._worker_latencies(stats).tolist(),
+                }
+                for worker_id, stats in self.workers.items()
+            },
+            "recent_requests": self._recent(20),
+            "router_stats": self.metrics_history[-1] if self.metrics_history else None,
         }
         
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
+        write_json_file(filename, data)
+        requests_file = os.path.splitext(filename)[0] + ".ndjson"
+        write_ndjson_file(requests_file, self.requests.records())  # One line per retained request
         
-        print(f"\n💾 Results exported to {filename}")
+        print(f"\n💾 Results exported to {filename} (requests in {requests_file})")
         return filename
 
 
-async def main():
+async def main(generate_load: bool = False):
     """Main entry point."""
     dashboard = Dashboard()
     
@@ -282,23 +456,27 @@ async def main():
 
 Choose mode:
   [1] Continuous monitoring (auto-refresh) - Exports on Ctrl+C
-  [2] Single snapshot - Collects 5 requests and exports immediately
+  [2] Single snapshot - Fetches router stats and exports immediately
   [3] Interactive mode - Exports on quit
 
 💡 Results are saved to: dashboard_results.json (in project root)
 
 Enter choice (1-3): """, end="")
         
-        choice = input().strip()
+        choice = (await ainput()).strip()
         
         if choice == "1":
-            await dashboard.run_continuous(interval=5.0)
+            await dashboard.run_continuous(interval=5.0, generate_load=generate_load)
         elif choice == "2":
-            # Send a few requests then display
             print("\nCollecting data...")
-            for _ in range(5):
-                await dashboard.collect_metrics()
-                await asyncio.sleep(1)
+            if generate_load:
+                session = await get_session()
+                payload = dump_json({"prompt": "Test request for metrics", "max_tokens": 10})
+                for _ in range(5):
+                    request = await dashboard._probe(session, payload)
+                    if request is not None:
+                        dashboard._record(request)
+            await dashboard.collect_metrics()
             dashboard.display_summary()
             # Export results
             filename = dashboard.export_results()
@@ -308,7 +486,7 @@ Enter choice (1-3): """, end="")
             # Interactive mode
             while True:
                 try:
-                    cmd = input("\n> ").strip().lower()
+                    cmd = (await ainput("\n> ")).strip().lower()
                     if cmd == "q" or cmd == "quit":
                         break
                     elif cmd == "d" or cmd == "display":
@@ -318,26 +496,14 @@ Enter choice (1-3): """, end="")
                     elif cmd.startswith("req "):
                         prompt = cmd[4:]
                         # Send request
-                        async with aiohttp.ClientSession() as session:
-                            start = time.time()
-                            async with session.post(
-                                f"{ROUTER_URL}/v1/completions",
-                                json={"prompt": prompt, "max_tokens": 50},
-                            ) as resp:
-                                if resp.status == 200:
-                                    data = await resp.json()
-                                    latency = (time.time() - start) * 1000
-                                    request = {
-                                        "cache_status": data.get("cache_status"),
-                                        "match_length": data.get("match_length", 0),
-                                        "blocks": len(data.get("block_hashes", [])),
-                                        "worker": data.get("assigned_worker"),
-                                        "latency_ms": latency,
-                                    }
-                                    dashboard.requests.append(request)
-                                    print(f"✅ {request['cache_status']} | "
-                                          f"Match: {request['match_length']} blocks | "
-                                          f"Latency: {latency:.2f}ms")
+                        request = await dashboard._probe(await get_session(), prompt)
+                        if request is None:
+                            print("❌ Request failed")
+                        else:
+                            dashboard._record(request)
+                            print(f"✅ {request['cache_status']} | "
+                                  f"Match: {request['match_length']} blocks | "
+                                  f"Latency: {request['latency_ms']:.2f}ms")
                     else:
                         print("Commands: [d]isplay, [e]xport, req <prompt>, [q]uit")
                 except KeyboardInterrupt:
@@ -355,11 +521,23 @@ Enter choice (1-3): """, end="")
                 print(f"💾 Results saved to: {filename}")
             except Exception as e:
                 print(f"⚠️  Error exporting: {e}")
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Block-based cache router results dashboard")
+    parser.add_argument(
+        "--generate-load",
+        action="store_true",
+        help="Also send test completions (otherwise only router stats are polled)"
+    )
+    args = parser.parse_args()
+    
+    install_uvloop()
     try:
-        asyncio.run(main())
+        asyncio.run(main(generate_load=args.generate_load))
     except KeyboardInterrupt:
         print("\n\nExiting...")
 
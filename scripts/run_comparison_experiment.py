@@ -3,21 +3,26 @@ Complete Comparison Experiment
 Runs all three routing strategies and compares results
 """
 import asyncio
-import aiohttp
 import logging
+import random
 import time
-import json
 import subprocess
 import sys
 import os
+import numpy as np
 from typing import Dict, List
-from collections import defaultdict
+import math
+from collections import Counter, deque
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-ROUTER_URL = "http://localhost:8000"
+from _client import get_session, close_session, dump_json, send_completion, write_json_file, ainput, install_uvloop
+
+CONCURRENCY = 16  # Max in-flight requests during the main experiment phase
+LATENCY_WINDOW = 8192  # Most recent latencies kept for percentile estimates
+PROGRESS_INTERVAL = 1.0  # Seconds between progress log lines during the run
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("ComparisonExperiment")
@@ -34,12 +39,16 @@ async def run_strategy_experiment(strategy: str, num_requests: int = 100, warmup
         "total_requests": num_requests,
         "cache_hits": 0,
         "cache_misses": 0,
-        "latencies": [],
-        "hit_latencies": [],
-        "miss_latencies": [],
-        "worker_distribution": defaultdict(int),
-        "match_lengths": [],
+        "worker_distribution": Counter(),
     }
+    # Running totals, updated as each response arrives
+    lat_sum = lat_sq_sum = 0.0
+    lat_count = 0
+    lat_min = math.inf
+    lat_max = 0.0
+    hit_sum = miss_sum = 0.0
+    match_sum = 0
+    recent_latencies = deque(maxlen=LATENCY_WINDOW)
     
     # RAG-like prompts with shared contexts
     shared_contexts = [
@@ -54,83 +63,104 @@ async def run_strategy_experiment(strategy: str, num_requests: int = 100, warmup
         "What are the applications?",
         "Explain the methodology.",
     ]
+    # Every shared-context request body, encoded once
+    shared_payloads = [
+        dump_json({"prompt": context + query, "max_tokens": 50})
+        for context in shared_contexts
+        for query in user_queries
+    ]
     
-    async with aiohttp.ClientSession() as session:
-        # Warmup phase (to populate cache)
-        logger.info(f"Warmup phase ({warmup} requests)...")
-        for i in range(warmup):
-            prompt = random.choice(shared_contexts) + random.choice(user_queries)
-            try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": prompt, "max_tokens": 50},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    await resp.json()
-            except:
-                pass
-            await asyncio.sleep(0.1)
+    session = await get_session()
+    # Local bindings for the request loops (saves an attribute lookup per call)
+    _choice = random.choice
+    _rand = random.random
+    _send = send_completion
+    _sleep = asyncio.sleep
+    
+    # Warmup phase (to populate cache)
+    logger.info(f"Warmup phase ({warmup} requests)...")
+    for i in range(warmup):
+        try:
+            await _send(session, _choice(shared_payloads), routing_only=True)
+        except:
+            pass
+        await _sleep(0.1)
+    
+    logger.info(f"Main experiment phase ({num_requests} requests)...")
+    # Main experiment: requests run concurrently, at most CONCURRENCY in flight
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    completed = 0
+    
+    async def one_request(i: int):
+        nonlocal completed, lat_sum, lat_sq_sum, lat_count, lat_min, lat_max, hit_sum, miss_sum, match_sum
+        # Mix: 70% shared prefix (simulating RAG), 30% unique
+        if _rand() < 0.7:
+            payload = _choice(shared_payloads)
+        else:
+            prompt = f"Unique document {i}. " * 5 + _choice(user_queries)
+            payload = dump_json({"prompt": prompt, "max_tokens": 50})
         
-        logger.info(f"Main experiment phase ({num_requests} requests)...")
-        # Main experiment
-        for i in range(num_requests):
-            # Mix: 70% shared prefix (simulating RAG), 30% unique
-            if random.random() < 0.7:
-                prompt = random.choice(shared_contexts) + random.choice(user_queries)
-            else:
-                prompt = f"Unique document {i}. " * 5 + random.choice(user_queries)
-            
-            start = time.time()
+        async with semaphore:
             try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": prompt, "max_tokens": 50},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        latency = (time.time() - start) * 1000
-                        
-                        cache_status = data.get("cache_status", "UNKNOWN")
-                        match_length = data.get("match_length", 0)
-                        worker = data.get("assigned_worker", "UNKNOWN")
-                        
-                        results["latencies"].append(latency)
-                        results["match_lengths"].append(match_length)
-                        results["worker_distribution"][worker] += 1
-                        
-                        if cache_status == "HIT":
-                            results["cache_hits"] += 1
-                            results["hit_latencies"].append(latency)
-                        else:
-                            results["cache_misses"] += 1
-                            results["miss_latencies"].append(latency)
-                        
-                        if (i + 1) % 25 == 0:
-                            logger.info(f"  Progress: {i+1}/{num_requests} requests")
+                data = await _send(session, payload, routing_only=True)
             except Exception as e:
                 logger.warning(f"Request {i} failed: {e}")
-            
-            await asyncio.sleep(0.1)
+                return
+        latency = data["_latency_ms"]
+        
+        lat_sum += latency
+        lat_sq_sum += latency * latency
+        lat_count += 1
+        lat_min = min(lat_min, latency)
+        lat_max = max(lat_max, latency)
+        recent_latencies.append(latency)
+        match_sum += data.get("match_length", 0)
+        results["worker_distribution"][data.get("assigned_worker", "UNKNOWN")] += 1
+        
+        if data.get("cache_status", "UNKNOWN") == "HIT":
+            results["cache_hits"] += 1
+            hit_sum += latency
+        else:
+            results["cache_misses"] += 1
+            miss_sum += latency
+        
+        completed += 1
+    
+    async def report_progress():
+        # Logs from its own task so request coroutines never format or write progress
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            logger.info(f"  Progress: {completed}/{num_requests} requests")
+    
+    reporter = asyncio.create_task(report_progress())
+    try:
+        await asyncio.gather(*(one_request(i) for i in range(num_requests)))
+    finally:
+        reporter.cancel()
     
     # Calculate statistics
-    if results["latencies"]:
-        results["avg_latency"] = sum(results["latencies"]) / len(results["latencies"])
-        results["min_latency"] = min(results["latencies"])
-        results["max_latency"] = max(results["latencies"])
-        sorted_lat = sorted(results["latencies"])
-        results["p50_latency"] = sorted_lat[len(sorted_lat)//2]
-        if len(sorted_lat) > 10:
-            results["p95_latency"] = sorted_lat[int(len(sorted_lat)*0.95)]
-            results["p99_latency"] = sorted_lat[int(len(sorted_lat)*0.99)]
-    
-    if results["hit_latencies"]:
-        results["avg_hit_latency"] = sum(results["hit_latencies"]) / len(results["hit_latencies"])
-    if results["miss_latencies"]:
-        results["avg_miss_latency"] = sum(results["miss_latencies"]) / len(results["miss_latencies"])
+    if lat_count:
+        avg = lat_sum / lat_count
+        results["avg_latency"] = avg
+        results["min_latency"] = lat_min
+        results["max_latency"] = lat_max
+        results["stddev_latency"] = math.sqrt(max(0.0, lat_sq_sum / lat_count - avg * avg))
+        # Select the percentile ranks with np.partition rather than a full sort
+        n = len(recent_latencies)
+        ranks = [n // 2, int(n * 0.95), int(n * 0.99)]
+        p50, p95, p99 = np.partition(np.fromiter(recent_latencies, dtype=np.float64, count=n), ranks)[ranks]
+        results["p50_latency"] = float(p50)
+        if n > 10:
+            results["p95_latency"] = float(p95)
+            results["p99_latency"] = float(p99)
+    
+    if results["cache_hits"]:
+        results["avg_hit_latency"] = hit_sum / results["cache_hits"]
+    if results["cache_misses"]:
+        results["avg_miss_latency"] = miss_sum / results["cache_misses"]
     
     results["hit_rate"] = (results["cache_hits"] / num_requests * 100) if num_requests > 0 else 0
-    results["avg_match_length"] = sum(results["match_lengths"]) / len(results["match_lengths"]) if results["match_lengths"] else 0
+    results["avg_match_length"] = match_sum / lat_count if lat_count else 0
     
     return results
 
@@ -156,14 +186,14 @@ Example:
   ROUTING_STRATEGY=least_loaded python -m router.main
     """)
     
-    input("Press Enter when router is running with cache_aware strategy...")
+    await ainput("Press Enter when router is running with cache_aware strategy...")
     
     strategies = ["cache_aware", "round_robin", "least_loaded"]
     all_results = {}
     
     for strategy in strategies:
         logger.info(f"\n⚠️  Make sure router is running with: ROUTING_STRATEGY={strategy}")
-        input(f"Press Enter to run {strategy} experiment...")
+        await ainput(f"Press Enter to run {strategy} experiment...")
         
         results = await run_strategy_experiment(strategy, num_requests=100, warmup=20)
         all_results[strategy] = results
@@ -177,8 +207,7 @@ Example:
             logger.info(f"   Avg MISS Latency: {results['avg_miss_latency']:.2f} ms")
     
     # Save all results
-    with open("comparison_results.json", "w") as f:
-        json.dump(all_results, f, indent=2)
+    write_json_file("comparison_results.json", all_results)
     
     # Display comparison table
     logger.info("\n" + "="*70)
@@ -196,7 +225,14 @@ Example:
     logger.info("\n" + "="*70)
 
 
+async def main():
+    try:
+        await run_all_strategies()
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
-    import random
-    asyncio.run(run_all_strategies())
+    install_uvloop()
+    asyncio.run(main())
 
@@ -1,17 +1,46 @@
 """
 Helper script to start multiple mock workers for testing.
-Each worker runs in a separate process.
+By default all workers run as asyncio tasks in this process, sharing one copy
+of the tokenizer and model. Pass --multiprocess to run each worker in its own
+process instead.
 """
+import asyncio
+import signal
 import subprocess
 import sys
 import os
-import time
 
-def start_workers(num_workers: int = 3):
-    """Start multiple worker processes."""
+async def run_workers_in_process(num_workers: int = 3):
+    """Run num_workers mock workers as tasks on this event loop until cancelled."""
+    from mock_worker import WORKER_ID, LightweightModel, TokenizerUtils, run_worker
+    
+    print(f"Starting {num_workers} workers in one process...")
+    # Load the tokenizer and model once; every worker shares them
+    tokenizer_utils = TokenizerUtils()
+    lightweight_model = LightweightModel(tokenizer=tokenizer_utils.tokenizer)
+    
+    tasks = [
+        asyncio.create_task(run_worker(f"{WORKER_ID}-{i+1}", tokenizer_utils, lightweight_model))
+        for i in range(num_workers)
+    ]
+    print(f"\n✅ All {num_workers} workers started!")
+    print("Run the dashboard to see results from all workers.")
+    print("\nPress Ctrl+C to stop all workers...")
+    await asyncio.gather(*tasks)
+
+
+async def start_workers(num_workers: int = 3):
+    """Start multiple worker processes and wait on them until Ctrl+C or they all exit."""
     print(f"Starting {num_workers} workers...")
     print("Press Ctrl+C to stop all workers\n")
     
+    loop = asyncio.get_running_loop()
+    stop_requested = asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop_requested.set)
+    except NotImplementedError:
+        pass  # Windows: Ctrl+C cancels this coroutine instead
+    
     processes = []
     
     try:
@@ -20,43 +49,51 @@ def start_workers(num_workers: int = 3):
             # On Windows, use start to open new windows
             if sys.platform == "win32":
                 # Windows: start in new console window
-                process = subprocess.Popen(
-                    [sys.executable, "scripts/mock_worker.py"],
+                process = await asyncio.create_subprocess_exec(
+                    sys.executable, "scripts/mock_worker.py",
                     cwd=os.path.dirname(os.path.dirname(__file__)),
                     creationflags=subprocess.CREATE_NEW_CONSOLE
                 )
             else:
                 # Linux/Mac: run in background
-                process = subprocess.Popen(
-                    [sys.executable, "scripts/mock_worker.py"],
+                process = await asyncio.create_subprocess_exec(
+                    sys.executable, "scripts/mock_worker.py",
                     cwd=os.path.dirname(os.path.dirname(__file__))
                 )
             
             processes.append(process)
             print(f"✅ Started worker {i+1}/{num_workers} (PID: {process.pid})")
-            time.sleep(1)  # Stagger startup
+            await asyncio.sleep(1)  # Stagger startup
         
         print(f"\n✅ All {num_workers} workers started!")
         print("Workers are running in separate windows/processes.")
         print("Run the dashboard to see results from all workers.")
         print("\nPress Ctrl+C to stop all workers...")
         
-        # Wait for user interrupt
-        while True:
-            time.sleep(1)
-            # Check if any process died
-            for i, proc in enumerate(processes):
-                if proc.poll() is not None:
-                    print(f"⚠️  Worker {i+1} (PID: {proc.pid}) has stopped")
+        # Sleep until a worker exits or the user interrupts; no polling
+        stop_task = asyncio.create_task(stop_requested.wait())
+        exits = {asyncio.create_task(proc.wait()): i for i, proc in enumerate(processes)}
+        while exits:
+            done, _ = await asyncio.wait([stop_task, *exits], return_when=asyncio.FIRST_COMPLETED)
+            if stop_task in done:
+                break
+            for exited in done:
+                i = exits.pop(exited)
+                print(f"⚠️  Worker {i+1} (PID: {processes[i].pid}) has stopped")
+        stop_task.cancel()
+        for exited in exits:
+            exited.cancel()
     
-    except KeyboardInterrupt:
+    finally:
         print("\n\nStopping all workers...")
         for i, proc in enumerate(processes):
-            try:
-                proc.terminate()
-                print(f"Stopped worker {i+1} (PID: {proc.pid})")
-            except:
-                pass
+            if proc.returncode is None:
+                try:
+                    proc.terminate()
+                    print(f"Stopped worker {i+1} (PID: {proc.pid})")
+                except ProcessLookupError:
+                    pass
+        await asyncio.gather(*[proc.wait() for proc in processes])
         print("All workers stopped.")
 
 
@@ -69,7 +106,19 @@ if __name__ == "__main__":
         default=3,
         help="Number of workers to start (default: 3)"
     )
+    parser.add_argument(
+        "--multiprocess",
+        action="store_true",
+        help="Run each worker in its own process instead of as tasks in this one"
+    )
     args = parser.parse_args()
     
-    start_workers(args.num_workers)
+    try:
+        if args.multiprocess:
+            asyncio.run(start_workers(args.num_workers))
+        else:
+            asyncio.run(run_workers_in_process(args.num_workers))
+    except KeyboardInterrupt:
+        if not args.multiprocess:
+            print("\n\nAll workers stopped.")
 
@@ -5,21 +5,28 @@ This script will guide you through testing each strategy one by one.
 import asyncio
 import aiohttp
 import logging
-import json
-import time
 from typing import Dict, List
-from collections import defaultdict
+from collections import Counter
 import os
 import sys
+import numpy as np
 
-ROUTER_URL = "http://localhost:8000"
+from _client import POOL_LIMIT, POOL_LIMIT_PER_HOST, check_router, get_session, close_session, dump_json, send_completion, ainput, install_uvloop, write_json_file
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("StrategyTest")
 
+PROGRESS_INTERVAL = 1.0  # Seconds between progress log lines during a test
 
-async def test_strategy(strategy_name: str, num_requests: int = 50, warmup: int = 10):
-    """Test a specific routing strategy and collect metrics."""
+
+async def test_strategy(session: aiohttp.ClientSession, strategy_name: str,
+                        num_requests: int = 50, warmup: int = 10,
+                        concurrency: int = 8, pacing: float = 0.0):
+    """
+    Test a specific routing strategy and collect metrics.
+    Up to `concurrency` requests are in flight at once; `pacing` adds a delay (s)
+    after each request before its slot is released.
+    """
     logger.info(f"\n{'='*70}")
     logger.info(f"Testing {strategy_name.upper()} Strategy")
     logger.info(f"{'='*70}\n")
@@ -27,14 +34,13 @@ async def test_strategy(strategy_name: str, num_requests: int = 50, warmup: int
     results = {
         "strategy": strategy_name,
         "total_requests": num_requests,
-        "cache_hits": 0,
-        "cache_misses": 0,
-        "latencies": [],
-        "hit_latencies": [],
-        "miss_latencies": [],
-        "worker_distribution": defaultdict(int),
-        "match_lengths": [],
+        "workers": [],  # assigned_worker per response, tallied after the run
     }
+    # Per-request samples, written by request index; ok marks requests that got a response
+    lat = np.empty(num_requests, dtype=np.float64)
+    match = np.zeros(num_requests, dtype=np.int64)
+    hit_mask = np.zeros(num_requests, dtype=np.bool_)
+    ok = np.zeros(num_requests, dtype=np.bool_)
     
     # RAG-like prompts with shared contexts (to test cache hits)
     shared_contexts = [
@@ -50,102 +56,111 @@ async def test_strategy(strategy_name: str, num_requests: int = 50, warmup: int
         "Explain the methodology.",
     ]
     
-    async with aiohttp.ClientSession() as session:
-        # Warmup phase (to populate cache for cache-aware strategy)
-        logger.info(f"Warmup phase ({warmup} requests)...")
-        for i in range(warmup):
-            prompt = shared_contexts[i % len(shared_contexts)] + user_queries[i % len(user_queries)]
-            try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": prompt, "max_tokens": 30},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    await resp.json()
-            except:
-                pass
-            await asyncio.sleep(0.1)
-        
-        logger.info(f"Main test phase ({num_requests} requests)...")
-        # Main test phase
-        for i in range(num_requests):
-            # Mix: 70% shared prefix (for cache hits), 30% unique
-            if i % 3 != 0:  # 2 out of 3 use shared context
-                prompt = shared_contexts[i % len(shared_contexts)] + user_queries[i % len(user_queries)]
-            else:
-                prompt = f"Unique document {i}. " * 5 + user_queries[i % len(user_queries)]
-            
-            start = time.time()
+    # Build every prompt and encode each distinct request body once, up front
+    warmup_prompts = [
+        shared_contexts[i % len(shared_contexts)] + user_queries[i % len(user_queries)]
+        for i in range(warmup)
+    ]
+    prompts = [
+        # Mix: 70% shared prefix (for cache hits), 30% unique
+        shared_contexts[i % len(shared_contexts)] + user_queries[i % len(user_queries)]
+        if i % 3 != 0  # 2 out of 3 use shared context
+        else f"Unique document {i}. " * 5 + user_queries[i % len(user_queries)]
+        for i in range(num_requests)
+    ]
+    encoded = {p: dump_json({"prompt": p, "max_tokens": 30}) for p in dict.fromkeys(warmup_prompts + prompts)}
+    warmup_payloads = [encoded[p] for p in warmup_prompts]
+    payloads = [encoded[p] for p in prompts]
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def send(payload: bytes):
+        async with semaphore:
             try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": prompt, "max_tokens": 30},
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        latency = (time.time() - start) * 1000
-                        
-                        cache_status = data.get("cache_status", "UNKNOWN")
-                        match_length = data.get("match_length", 0)
-                        worker = data.get("assigned_worker", "UNKNOWN")
-                        
-                        results["latencies"].append(latency)
-                        results["match_lengths"].append(match_length)
-                        results["worker_distribution"][worker] += 1
-                        
-                        if cache_status == "HIT":
-                            results["cache_hits"] += 1
-                            results["hit_latencies"].append(latency)
-                        else:
-                            results["cache_misses"] += 1
-                            results["miss_latencies"].append(latency)
-                        
-                        if (i + 1) % 10 == 0:
-                            logger.info(f"  Progress: {i+1}/{num_requests} requests")
-                    else:
-                        logger.warning(f"Request {i} failed: {resp.status}")
-            except Exception as e:
-                logger.warning(f"Request {i} error: {e}")
-            
-            await asyncio.sleep(0.1)
+                return await send_completion(session, payload, routing_only=True)
+            finally:
+                if pacing:
+                    await asyncio.sleep(pacing)
+    
+    # Warmup phase (to populate cache for cache-aware strategy)
+    logger.info(f"Warmup phase ({warmup} requests)...")
+    await asyncio.gather(*(send(payload) for payload in warmup_payloads), return_exceptions=True)
+    
+    logger.info(f"Main test phase ({num_requests} requests, {concurrency} concurrent)...")
+    
+    async def one(i: int):
+        try:
+            return i, await send(payloads[i])
+        except aiohttp.ClientResponseError as e:
+            logger.warning(f"Request {i} failed: {e.status}")
+        except Exception as e:
+            logger.warning(f"Request {i} error: {e}")
+        return i, None
+    
+    # Main test phase: fold results in as each request completes (single loop thread, no lock)
+    completed = 0
+    
+    async def report_progress():
+        # Logs from its own task so the result loop never formats or writes progress
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            logger.info(f"  Progress: {completed}/{num_requests} requests")
+    
+    reporter = asyncio.create_task(report_progress())
+    try:
+        for next_done in asyncio.as_completed([one(i) for i in range(num_requests)]):
+            i, data = await next_done
+            completed += 1
+            if data is None:
+                continue
+            ok[i] = True
+            lat[i] = data["_latency_ms"]
+            match[i] = data.get("match_length", 0)
+            hit_mask[i] = data.get("cache_status", "UNKNOWN") == "HIT"
+            results["workers"].append(data.get("assigned_worker", "UNKNOWN"))
+    finally:
+        reporter.cancel()
     
     # Calculate statistics
-    if results["latencies"]:
-        results["avg_latency"] = sum(results["latencies"]) / len(results["latencies"])
-        results["min_latency"] = min(results["latencies"])
-        results["max_latency"] = max(results["latencies"])
-        sorted_lat = sorted(results["latencies"])
-        results["p50_latency"] = sorted_lat[len(sorted_lat)//2]
-        if len(sorted_lat) > 10:
-            results["p95_latency"] = sorted_lat[int(len(sorted_lat)*0.95)]
-            results["p99_latency"] = sorted_lat[int(len(sorted_lat)*0.99)]
+    hit_lat = lat[ok & hit_mask]
+    miss_lat = lat[ok & ~hit_mask]
+    match_lengths = match[ok]
+    lat = lat[ok]
+    results["cache_hits"] = int(hit_lat.size)
+    results["cache_misses"] = int(miss_lat.size)
+    if lat.size:
+        n = len(lat)
+        # One np.partition places min, p50, p95, p99 and max together
+        ranks = [0, n // 2, int(n * 0.95), int(n * 0.99), n - 1]
+        lo, p50, p95, p99, hi = np.partition(lat, ranks)[ranks]
+        results["avg_latency"] = float(lat.mean())
+        results["min_latency"] = float(lo)
+        results["max_latency"] = float(hi)
+        results["p50_latency"] = float(p50)
+        if n > 10:
+            results["p95_latency"] = float(p95)
+            results["p99_latency"] = float(p99)
     
-    if results["hit_latencies"]:
-        results["avg_hit_latency"] = sum(results["hit_latencies"]) / len(results["hit_latencies"])
-    if results["miss_latencies"]:
-        results["avg_miss_latency"] = sum(results["miss_latencies"]) / len(results["miss_latencies"])
+    if hit_lat.size:
+        results["avg_hit_latency"] = float(hit_lat.mean())
+    if miss_lat.size:
+        results["avg_miss_latency"] = float(miss_lat.mean())
     
     results["hit_rate"] = (results["cache_hits"] / num_requests * 100) if num_requests > 0 else 0
-    results["avg_match_length"] = sum(results["match_lengths"]) / len(results["match_lengths"]) if results["match_lengths"] else 0
+    results["avg_match_length"] = float(match_lengths.mean()) if match_lengths.size else 0
     
-    # Convert defaultdict to dict for JSON
-    results["worker_distribution"] = dict(results["worker_distribution"])
+    # Plain lists and dict for JSON, busiest worker first
+    results["latencies"] = lat.tolist()
+    results["hit_latencies"] = hit_lat.tolist()
+    results["miss_latencies"] = miss_lat.tolist()
+    results["match_lengths"] = match_lengths.tolist()
+    results["worker_distribution"] = dict(Counter(results.pop("workers")).most_common())
     
     return results
 
 
-async def check_router_running():
-    """Check if router is running."""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ROUTER_URL}/docs", timeout=aiohttp.ClientTimeout(total=2)) as resp:
-                return resp.status == 200
-    except:
-        return False
-
-
-async def main():
+async def run_strategy_tests(concurrency: int = 8, pacing: float = 0.0,
+                             pool_limit: int = POOL_LIMIT, pool_limit_per_host: int = POOL_LIMIT_PER_HOST):
     """Main test runner."""
     logger.info("""
 ╔══════════════════════════════════════════════════════════════════════════════╗
@@ -173,6 +188,7 @@ The script will guide you through each step.
     ]
     
     all_results = {}
+    session = await get_session(pool_limit, pool_limit_per_host)  # Shared by every strategy's requests
     
     for strategy_key, strategy_name in strategies:
         logger.info(f"\n{'='*70}")
@@ -190,10 +206,10 @@ The script will guide you through each step.
         logger.info(f"   5. Come back here and press Enter")
         logger.info("")
         
-        input(f"Press Enter when router is running with {strategy_name} and workers are started...")
+        await ainput(f"Press Enter when router is running with {strategy_name} and workers are started...")
         
         # Check if router is running
-        if not await check_router_running():
+        if not await check_router(session):
             logger.error("❌ Router is not running or not accessible!")
             logger.error("   Make sure router is running on http://localhost:8000")
             logger.error("   Skipping this strategy...\n")
@@ -206,7 +222,10 @@ The script will guide you through each step.
         await asyncio.sleep(3)
         
         # Run test
-        results = await test_strategy(strategy_key, num_requests=50, warmup=10)
+        results = await test_strategy(
+            session, strategy_key, num_requests=50, warmup=10,
+            concurrency=concurrency, pacing=pacing
+        )
         all_results[strategy_key] = results
         
         # Display results
@@ -234,12 +253,11 @@ The script will guide you through each step.
             logger.info("\n" + "="*70)
             logger.info("Next: Stop the router (Ctrl+C) and start with next strategy")
             logger.info("="*70)
-            input("\nPress Enter when ready for next strategy (or Ctrl+C to exit)...")
+            await ainput("\nPress Enter when ready for next strategy (or Ctrl+C to exit)...")
     
     # Save all results
     output_file = "strategy_comparison_results.json"
-    with open(output_file, "w") as f:
-        json.dump(all_results, f, indent=2)
+    write_json_file(output_file, all_results)
     
     # Display comparison
     logger.info("\n" + "="*70)
@@ -257,9 +275,52 @@ The script will guide you through each step.
     logger.info("="*70)
 
 
+async def main(concurrency: int = 8, pacing: float = 0.0,
+               pool_limit: int = POOL_LIMIT, pool_limit_per_host: int = POOL_LIMIT_PER_HOST):
+    try:
+        await run_strategy_tests(
+            concurrency=concurrency, pacing=pacing,
+            pool_limit=pool_limit, pool_limit_per_host=pool_limit_per_host
+        )
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare routing strategies")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum requests in flight per test phase (default: 8)"
+    )
+    parser.add_argument(
+        "--pacing",
+        type=float,
+        default=0.0,
+        help="Delay in seconds after each request before sending another (default: 0)"
+    )
+    parser.add_argument(
+        "--pool-limit",
+        type=int,
+        default=POOL_LIMIT,
+        help=f"Max keep-alive connections in the client pool (default: {POOL_LIMIT})"
+    )
+    parser.add_argument(
+        "--pool-limit-per-host",
+        type=int,
+        default=POOL_LIMIT_PER_HOST,
+        help=f"Max keep-alive connections to the router (default: {POOL_LIMIT_PER_HOST})"
+    )
+    args = parser.parse_args()
+    
+    install_uvloop()
     try:
-        asyncio.run(main())
+        asyncio.run(main(
+            concurrency=args.concurrency, pacing=args.pacing,
+            pool_limit=args.pool_limit, pool_limit_per_host=args.pool_limit_per_host
+        ))
     except KeyboardInterrupt:
         logger.info("\n\nTest interrupted by user. Partial results may be saved.")
         logger.info("You can run the script again to continue testing.")
@@ -8,12 +8,20 @@ import logging
 import time
 import os
 import sys
+from functools import lru_cache
+
+import numpy as np
+from yarl import URL
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from router.tokenizer_utils import TokenizerUtils, BLOCK_SIZE
+from _client import (
+    ROUTER_URL, COMPLETIONS_URL, HEARTBEAT_URL, SYNC_URL, SYNC_DELTA_URL, EVICTION_URL, BATCH_URL, JSON_HEADERS,
+    check_router, get_session, close_session, dump_json, load_json, install_uvloop,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,7 +29,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BlockBasedTest")
 
-ROUTER_URL = "http://localhost:8000"
+tokenizer_utils = TokenizerUtils()  # Loaded once and shared by every test
+
+
+@lru_cache(maxsize=256)
+def _block_hashes(prompt: str) -> tuple:
+    """Block hashes for prompt, memoized since tests reuse the same prompts."""
+    return tuple(tokenizer_utils.compute_block_hashes(prompt))
+
+
+def common_prefix_len(a, b) -> int:
+    """Number of leading block hashes a and b share, compared as numpy arrays."""
+    m = min(len(a), len(b))
+    ne = np.flatnonzero(np.asarray(a[:m], dtype=np.uint64) != np.asarray(b[:m], dtype=np.uint64))
+    return int(ne[0]) if ne.size else m
+
+# Individual endpoints for each /internal/batch op, used when the router has no batch endpoint
+CONTROL_ENDPOINTS = {
+    "heartbeat": HEARTBEAT_URL,
+    "sync": SYNC_URL,
+    "eviction": EVICTION_URL,
+}
+
+
+async def post_control_batch(session: aiohttp.ClientSession, ops: list):
+    """
+    Send (op, payload) control-plane calls to the router in one round trip, in order.
+    Falls back to one POST per call for routers without /internal/batch.
+    """
+    async with session.post(
+        BATCH_URL,
+        json=[{"op": op, "payload": payload} for op, payload in ops]
+    ) as resp:
+        await resp.read()
+        if resp.status != 404:
+            resp.raise_for_status()
+            return
+    for op, payload in ops:
+        async with session.post(CONTROL_ENDPOINTS[op], json=payload) as resp:
+            await resp.read()
+
+
+async def post_control(session: aiohttp.ClientSession, url: URL, payload: dict):
+    """POST a control-plane call whose response body isn't needed, releasing the connection."""
+    async with session.post(url, json=payload) as resp:
+        await resp.release()
 
 
 async def test_block_hashing():
@@ -30,13 +82,12 @@ async def test_block_hashing():
     logger.info("TEST 1: Block Hashing")
     logger.info("=" * 60)
     
-    tokenizer = TokenizerUtils()
     prompt = "The quick brown fox jumps over the lazy dog. " * 5  # Long prompt to get multiple blocks
     
-    token_ids = tokenizer.tokenize(prompt)
+    token_ids = tokenizer_utils.tokenize(prompt)
     num_tokens = len(token_ids)
-    num_blocks = tokenizer.get_num_blocks(prompt)
-    block_hashes = tokenizer.compute_block_hashes(prompt)
+    num_blocks = tokenizer_utils.get_num_blocks(prompt)
+    block_hashes = list(_block_hashes(prompt))
     
     logger.info(f"Prompt tokens: {num_tokens}")
     logger.info(f"Number of blocks: {num_blocks}")
@@ -49,85 +100,78 @@ async def test_block_hashing():
     logger.info("✅ Block hashing test passed\n")
 
 
-async def test_router_routing():
+async def test_router_routing(session: aiohttp.ClientSession):
     """Test router's block-based routing with longest prefix match."""
     logger.info("=" * 60)
     logger.info("TEST 2: Router Block-Based Routing")
     logger.info("=" * 60)
     
-    tokenizer = TokenizerUtils()
-    
     # Create prompts with shared prefixes
     base_prompt = "The quick brown fox jumps over the lazy dog. "
     prompt1 = base_prompt + "This is request one."
     prompt2 = base_prompt + "This is request two."
     prompt3 = "A completely different prompt that doesn't match."
     
-    block_hashes1 = tokenizer.compute_block_hashes(prompt1)
-    block_hashes2 = tokenizer.compute_block_hashes(prompt2)
-    block_hashes3 = tokenizer.compute_block_hashes(prompt3)
+    block_hashes1 = list(_block_hashes(prompt1))
+    block_hashes2 = list(_block_hashes(prompt2))
+    block_hashes3 = list(_block_hashes(prompt3))
     
     logger.info(f"Prompt 1 blocks: {len(block_hashes1)}")
     logger.info(f"Prompt 2 blocks: {len(block_hashes2)}")
     logger.info(f"Prompt 3 blocks: {len(block_hashes3)}")
     
     # Check if prompts 1 and 2 share prefix blocks
-    shared_blocks = 0
-    for i, (b1, b2) in enumerate(zip(block_hashes1, block_hashes2)):
-        if b1 == b2:
-            shared_blocks += 1
-        else:
-            break
+    shared_blocks = common_prefix_len(block_hashes1, block_hashes2)
     
     logger.info(f"Shared prefix blocks between prompt1 and prompt2: {shared_blocks}")
     
-    async with aiohttp.ClientSession() as session:
-        # Register a worker
-        worker_id = "test-worker-1"
-        await session.post(
-            f"{ROUTER_URL}/internal/heartbeat",
-            json={"worker_id": worker_id, "current_load": 0}
-        )
-        logger.info(f"Registered worker: {worker_id}")
-        
-        # Send first request
-        logger.info("\nSending request 1 (should be MISS)...")
-        async with session.post(
-            f"{ROUTER_URL}/v1/completions",
-            json={"prompt": prompt1, "max_tokens": 50}
-        ) as resp:
-            data = await resp.json()
-            logger.info(f"Response: {data}")
-            assert data["cache_status"] == "MISS", "First request should be MISS"
-            assert data["assigned_worker"] == worker_id, "Should route to registered worker"
-        
-        # Wait a bit for sync
-        await asyncio.sleep(1)
-        
-        # Send second request with shared prefix
-        logger.info("\nSending request 2 with shared prefix (should find prefix match)...")
-        async with session.post(
-            f"{ROUTER_URL}/v1/completions",
-            json={"prompt": prompt2, "max_tokens": 50}
-        ) as resp:
-            data = await resp.json()
-            logger.info(f"Response: {data}")
-            # Should find some prefix match if blocks are shared
-            logger.info(f"Match length: {data.get('match_length', 0)} blocks")
-        
-        # Send third request with different prompt
-        logger.info("\nSending request 3 with different prompt (should be MISS)...")
-        async with session.post(
-            f"{ROUTER_URL}/v1/completions",
-            json={"prompt": prompt3, "max_tokens": 50}
-        ) as resp:
-            data = await resp.json()
-            logger.info(f"Response: {data}")
+    # Register a worker
+    worker_id = "test-worker-1"
+    async with session.post(
+        HEARTBEAT_URL,
+        json={"worker_id": worker_id, "current_load": 0}
+    ) as resp:
+        await resp.read()
+    logger.info(f"Registered worker: {worker_id}")
+    
+    # Send first request
+    logger.info("\nSending request 1 (should be MISS)...")
+    async with session.post(
+        COMPLETIONS_URL,
+        json={"prompt": prompt1, "max_tokens": 50}
+    ) as resp:
+        data = await resp.json(loads=load_json)
+        logger.info(f"Response: {data}")
+        assert data["cache_status"] == "MISS", "First request should be MISS"
+        assert data["assigned_worker"] == worker_id, "Should route to registered worker"
+    
+    # Wait a bit for sync
+    await asyncio.sleep(1)
+    
+    # Send second request with shared prefix
+    logger.info("\nSending request 2 with shared prefix (should find prefix match)...")
+    async with session.post(
+        COMPLETIONS_URL,
+        json={"prompt": prompt2, "max_tokens": 50}
+    ) as resp:
+        data = await resp.json(loads=load_json)
+        logger.info(f"Response: {data}")
+        # Should find some prefix match if blocks are shared
+        logger.info(f"Match length: {data.get('match_length', 0)} blocks")
+    
+    # Send third request with different prompt
+    logger.info("\nSending request 3 with different prompt (should be MISS)...")
+    async with session.post(
+        COMPLETIONS_URL,
+        json={"prompt": prompt3, "max_tokens": 50}
+    ) as resp:
+        data = await resp.json(loads=load_json)
+        logger.info(f"Response: {data}")
     
     logger.info("✅ Router routing test passed\n")
 
 
-async def test_mock_worker_integration():
+async def test_mock_worker_integration(session: aiohttp.ClientSession):
     """Test integration with mock_worker."""
     logger.info("=" * 60)
     logger.info("TEST 3: Mock Worker Integration")
@@ -137,85 +181,122 @@ async def test_mock_worker_integration():
     
     await asyncio.sleep(2)  # Give worker time to register
     
-    async with aiohttp.ClientSession() as session:
-        # Check if worker is registered by sending a request
-        logger.info("Sending test request to router...")
-        prompt = "The quick brown fox jumps over the lazy dog."
-        
-        try:
-            async with session.post(
-                f"{ROUTER_URL}/v1/completions",
-                json={"prompt": prompt, "max_tokens": 50},
-                timeout=aiohttp.ClientTimeout(total=5)
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    logger.info(f"Router response: {data}")
-                    logger.info("✅ Mock worker is responding!")
-                else:
-                    logger.warning(f"Router returned status {resp.status}")
-        except asyncio.TimeoutError:
-            logger.warning("⚠️  Router not responding. Make sure router is running.")
-        except Exception as e:
-            logger.warning(f"⚠️  Error connecting to router: {e}")
+    # Check if worker is registered by sending a request
+    logger.info("Sending test request to router...")
+    prompt = "The quick brown fox jumps over the lazy dog."
+    
+    try:
+        async with session.post(
+            COMPLETIONS_URL,
+            json={"prompt": prompt, "max_tokens": 50},
+            timeout=aiohttp.ClientTimeout(total=5)
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json(loads=load_json)
+                logger.info(f"Router response: {data}")
+                logger.info("✅ Mock worker is responding!")
+            else:
+                logger.warning(f"Router returned status {resp.status}")
+    except asyncio.TimeoutError:
+        logger.warning("⚠️  Router not responding. Make sure router is running.")
+    except Exception as e:
+        logger.warning(f"⚠️  Error connecting to router: {e}")
     
     logger.info("✅ Integration test completed\n")
 
 
-async def test_cache_eviction():
+async def test_cache_eviction(session: aiohttp.ClientSession):
     """Test cache eviction reporting."""
     logger.info("=" * 60)
     logger.info("TEST 4: Cache Eviction")
     logger.info("=" * 60)
     
-    tokenizer = TokenizerUtils()
     prompt = "The quick brown fox jumps over the lazy dog. " * 3
-    block_hashes = tokenizer.compute_block_hashes(prompt)
-    
-    async with aiohttp.ClientSession() as session:
-        worker_id = "test-worker-evict"
-        
-        # Register worker
-        await session.post(
-            f"{ROUTER_URL}/internal/heartbeat",
-            json={"worker_id": worker_id, "current_load": 0}
-        )
-        
-        # Sync blocks to router
-        await session.post(
-            f"{ROUTER_URL}/internal/sync",
-            json={"worker_id": worker_id, "active_hashes": block_hashes}
-        )
-        logger.info(f"Synced {len(block_hashes)} blocks to router")
-        
-        # Send request (should be HIT)
-        async with session.post(
-            f"{ROUTER_URL}/v1/completions",
-            json={"prompt": prompt, "max_tokens": 50}
-        ) as resp:
-            data = await resp.json()
-            logger.info(f"Before eviction: {data.get('cache_status')}")
-        
-        # Report eviction
-        if block_hashes:
-            await session.post(
-                f"{ROUTER_URL}/internal/eviction",
-                json={"worker_id": worker_id, "evicted_hashes": [block_hashes[0]]}
-            )
-            logger.info(f"Reported eviction of block: {block_hashes[0][:8]}...")
-        
-        # Send request again (should be MISS or partial match)
-        await asyncio.sleep(0.5)
-        async with session.post(
-            f"{ROUTER_URL}/v1/completions",
-            json={"prompt": prompt, "max_tokens": 50}
-        ) as resp:
-            data = await resp.json()
-            logger.info(f"After eviction: {data.get('cache_status')}, match_length: {data.get('match_length', 0)}")
+    block_hashes = list(_block_hashes(prompt))
+    payload = dump_json({"prompt": prompt, "max_tokens": 50})  # Sent before and after the eviction
+    
+    worker_id = "test-worker-evict"
+    pending: list[asyncio.Task] = []  # Control-plane POSTs not yet known to have landed
+    
+    # Register worker and sync its blocks to the router in one round trip
+    pending.append(asyncio.create_task(post_control_batch(session, [
+        ("heartbeat", {"worker_id": worker_id, "current_load": 0}),
+        ("sync", {"worker_id": worker_id, "active_hashes": block_hashes}),
+    ])))
+    
+    # Send request (should be HIT) once the router has the synced blocks
+    await asyncio.gather(*pending)
+    pending.clear()
+    logger.info(f"Synced {len(block_hashes)} blocks to router")
+    async with session.post(
+        COMPLETIONS_URL,
+        data=payload,
+        headers=JSON_HEADERS
+    ) as resp:
+        data = await resp.json(loads=load_json)
+        logger.info(f"Before eviction: {data.get('cache_status')}")
+    
+    # Report eviction
+    if block_hashes:
+        pending.append(asyncio.create_task(post_control(
+            session, EVICTION_URL,
+            {"worker_id": worker_id, "evicted_hashes": [block_hashes[0]]}
+        )))
+        logger.info(f"Reporting eviction of block: {block_hashes[0] >> 32:08x}...")
+    
+    # Send request again (should be MISS or partial match); the eviction report
+    # travels during the wait and must have landed before the request goes out
+    await asyncio.sleep(0.5)
+    await asyncio.gather(*pending)
+    pending.clear()
+    async with session.post(
+        COMPLETIONS_URL,
+        data=payload,
+        headers=JSON_HEADERS
+    ) as resp:
+        data = await resp.json(loads=load_json)
+        logger.info(f"After eviction: {data.get('cache_status')}, match_length: {data.get('match_length', 0)}")
     
     logger.info("✅ Cache eviction test passed\n")
 
 
+async def test_delta_sync_removal(session: aiohttp.ClientSession):
+    """Test that blocks removed by a delta sync stop matching."""
+    logger.info("=" * 60)
+    logger.info("TEST 4b: Delta Sync Removal")
+    logger.info("=" * 60)
+    
+    prompt = "Pack my box with five dozen liquor jugs, then seal it tight. " * 3
+    block_hashes = list(_block_hashes(prompt))
+    payload = dump_json({"prompt": prompt, "max_tokens": 50})
+    worker_id = "test-worker-delta"
+    
+    # Full sync with a seq baseline, so the delta below applies on top of it
+    await post_control_batch(session, [
+        ("heartbeat", {"worker_id": worker_id, "current_load": 0}),
+        ("sync", {"worker_id": worker_id, "active_hashes": block_hashes, "seq": 0}),
+    ])
+    async with session.post(COMPLETIONS_URL, data=payload, headers=JSON_HEADERS) as resp:
+        data = await resp.json(loads=load_json)
+        logger.info(f"Before delta: {data.get('cache_status')}, match_length: {data.get('match_length', 0)}")
+    
+    async with session.post(SYNC_DELTA_URL, json={
+        "worker_id": worker_id, "seq": 1, "added": [], "removed": block_hashes,
+    }) as resp:
+        status = (await resp.json(loads=load_json)).get("status")
+    logger.info(f"Delta removing {len(block_hashes)} blocks: {status}")
+    
+    async with session.post(COMPLETIONS_URL, data=payload, headers=JSON_HEADERS) as resp:
+        data = await resp.json(loads=load_json)
+        match_length = data.get("match_length", 0)
+        logger.info(f"After delta: {data.get('cache_status')}, match_length: {match_length}")
+    
+    if status == "ok" and match_length == 0:
+        logger.info("✅ Delta sync removal test passed\n")
+    else:
+        logger.error("❌ Delta sync removal test failed: removed blocks still match\n")
+
+
 async def test_latency_simulation():
     """Test that latency is being calculated correctly."""
     logger.info("=" * 60)
@@ -236,14 +317,10 @@ async def run_all_tests():
     logger.info("BLOCK-BASED CACHE ROUTING TEST SUITE")
     logger.info("=" * 60 + "\n")
     
+    session = await get_session()
+    
     # Check if router is running
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ROUTER_URL}/docs", timeout=aiohttp.ClientTimeout(total=2)) as resp:
-                if resp.status != 200:
-                    logger.error("Router is not responding correctly")
-                    return
-    except Exception as e:
+    if not await check_router(session):
         logger.error(f"Cannot connect to router at {ROUTER_URL}")
         logger.error("Make sure router is running: python -m router.main")
         return
@@ -252,16 +329,25 @@ async def run_all_tests():
     
     # Run tests
     await test_block_hashing()
-    await test_router_routing()
-    await test_cache_eviction()
+    await test_router_routing(session)
+    await test_cache_eviction(session)
+    await test_delta_sync_removal(session)
     await test_latency_simulation()
-    await test_mock_worker_integration()
+    await test_mock_worker_integration(session)
     
     logger.info("=" * 60)
     logger.info("ALL TESTS COMPLETED")
     logger.info("=" * 60)
 
 
+async def main():
+    try:
+        await run_all_tests()
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
-    asyncio.run(run_all_tests())
+    install_uvloop()
+    asyncio.run(main())
 
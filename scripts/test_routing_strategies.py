@@ -6,45 +6,50 @@ import aiohttp
 import logging
 import sys
 import os
+from collections import Counter
 
-ROUTER_URL = "http://localhost:8000"
+from _client import COMPLETIONS_URL, JSON_HEADERS, check_router, get_session, close_session, dump_json, load_json, ainput, install_uvloop
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("RoutingTest")
 
 
-async def test_routing_strategy(strategy_name: str, num_requests: int = 10):
+async def test_routing_strategy(session: aiohttp.ClientSession, strategy_name: str, num_requests: int = 10):
     """Test a specific routing strategy."""
     logger.info(f"\n{'='*60}")
     logger.info(f"Testing {strategy_name.upper()} Routing")
     logger.info(f"{'='*60}\n")
     
-    worker_distribution = {}
+    workers = []  # assigned_worker per response, tallied after the loop
+    # Request bodies encoded once, before the loop
+    payloads = [
+        dump_json({"prompt": f"Test prompt {i}. " * 5, "max_tokens": 20})  # Long enough to create blocks
+        for i in range(num_requests)
+    ]
     
-    async with aiohttp.ClientSession() as session:
-        for i in range(num_requests):
-            prompt = f"Test prompt {i}. " * 5  # Long enough to create blocks
-            
-            try:
-                async with session.post(
-                    f"{ROUTER_URL}/v1/completions",
-                    json={"prompt": prompt, "max_tokens": 20},
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        worker = data.get("assigned_worker", "UNKNOWN")
-                        cache_status = data.get("cache_status", "UNKNOWN")
-                        
-                        worker_distribution[worker] = worker_distribution.get(worker, 0) + 1
-                        
-                        logger.info(f"Request {i+1}: Worker={worker}, Cache={cache_status}")
-                    else:
-                        logger.error(f"Request {i+1} failed: {resp.status}")
-            except Exception as e:
-                logger.error(f"Request {i+1} error: {e}")
-            
-            await asyncio.sleep(0.2)  # Small delay
+    for i, payload in enumerate(payloads):
+        try:
+            async with session.post(
+                COMPLETIONS_URL,
+                data=payload,
+                headers=JSON_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json(loads=load_json)
+                    worker = data.get("assigned_worker", "UNKNOWN")
+                    cache_status = data.get("cache_status", "UNKNOWN")
+                    workers.append(worker)
+                    
+                    logger.info(f"Request {i+1}: Worker={worker}, Cache={cache_status}")
+                else:
+                    logger.error(f"Request {i+1} failed: {resp.status}")
+        except Exception as e:
+            logger.error(f"Request {i+1} error: {e}")
+        
+        await asyncio.sleep(0.2)  # Small delay
+    
+    worker_distribution = dict(Counter(workers))
     
     # Display results
     logger.info(f"\n{'='*60}")
@@ -58,7 +63,7 @@ async def test_routing_strategy(strategy_name: str, num_requests: int = 10):
     return worker_distribution
 
 
-async def main():
+async def run_routing_test():
     """Run tests for all routing strategies."""
     logger.info("""
 ╔══════════════════════════════════════════════════════════════════════════════╗
@@ -79,15 +84,11 @@ To test different strategies:
 Or test one strategy at a time.
     """)
     
+    session = await get_session()
+    
     # Check if router is running
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ROUTER_URL}/docs", timeout=aiohttp.ClientTimeout(total=2)) as resp:
-                if resp.status != 200:
-                    logger.error("Router is not responding. Make sure it's running on port 8000.")
-                    return
-    except Exception as e:
-        logger.error(f"Cannot connect to router: {e}")
+    if not await check_router(session):
+        logger.error("Router is not responding. Make sure it's running on port 8000.")
         logger.error("Make sure router is running: python -m router.main")
         return
     
@@ -97,10 +98,10 @@ Or test one strategy at a time.
     logger.info(f"\nCurrent ROUTING_STRATEGY environment variable: {current_strategy}")
     logger.info("(If router was started without this, it defaults to 'cache_aware')")
     
-    input("\nPress Enter to start testing (make sure router is running with desired strategy)...")
+    await ainput("\nPress Enter to start testing (make sure router is running with desired strategy)...")
     
     # Test current strategy
-    await test_routing_strategy(current_strategy, num_requests=10)
+    await test_routing_strategy(session, current_strategy, num_requests=10)
     
     logger.info("\n" + "="*60)
     logger.info("Test complete!")
@@ -112,6 +113,14 @@ Or test one strategy at a time.
     logger.info("="*60)
 
 
+async def main():
+    try:
+        await run_routing_test()
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
 
@@ -10,52 +10,90 @@ import time
 import logging
 import os
 import sys
+from collections import Counter
+
+from yarl import URL
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from router.tokenizer_utils import TokenizerUtils
+from _client import (
+    COMPLETIONS_URL, HEARTBEAT_URL, SYNC_URL, JSON_HEADERS,
+    get_session, close_session, dump_json, load_json, install_uvloop,
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("SimplifiedTest")
 
-ROUTER_URL = "http://localhost:8000"
 WORKER_ID = "worker-test"
 
-async def run_test():
+async def post(session: aiohttp.ClientSession, url: URL, payload: dict) -> dict:
+    """POST payload and return the parsed response, so the connection goes back to the pool."""
+    async with session.post(url, data=dump_json(payload), headers=JSON_HEADERS) as resp:
+        return load_json(await resp.read())
+
+async def post_concurrently(session: aiohttp.ClientSession, url: URL, payload: dict, n: int) -> list:
+    """Send n copies of the same POST at once over the shared session."""
+    return await asyncio.gather(*(post(session, url, payload) for _ in range(n)))
+
+async def run_test(concurrency: int = 1):
     tokenizer = TokenizerUtils()
     prompt = "The quick brown fox jumps over the lazy dog."
     prefix_hash = tokenizer.compute_prefix_hash(prompt, 10)
     
-    async with aiohttp.ClientSession() as session:
-        # Step 1: Register worker
-        await session.post(f"{ROUTER_URL}/internal/heartbeat", json={"worker_id": WORKER_ID, "current_load": 5})
-        logger.info(f"[1] Registered {WORKER_ID}")
-        
-        # Step 2: Cache prefix (router will speculatively cache it)
-        await session.post(f"{ROUTER_URL}/v1/completions", json={"prompt": prompt, "prefix_len": 10})
-        logger.info(f"[2] Sent request, router cached {prefix_hash[:8]}...")
-        
-        # Step 3: Verify HIT
-        async with session.post(f"{ROUTER_URL}/v1/completions", json={"prompt": prompt, "prefix_len": 10}) as resp:
-            data = await resp.json()
-            logger.info(f"[3] First check: {data.get('cache_status')} (expected: HIT)")
-        
-        # Step 4: Simulate crash - tell router we have NO hashes
-        await session.post(f"{ROUTER_URL}/internal/sync", json={"worker_id": WORKER_ID, "active_hashes": []})
-        logger.info(f"[4] Sent SYNC with empty hashes (simulating eviction)")
-        
-        # Step 5: Verify MISS (recovery happened)
-        async with session.post(f"{ROUTER_URL}/v1/completions", json={"prompt": prompt, "prefix_len": 10}) as resp:
-            data = await resp.json()
-            status = data.get('cache_status')
-            logger.info(f"[5] After sync: {status} (expected: MISS)")
-            
-            if status == "MISS":
-                logger.info("\n✅ SUCCESS: Sync cleared stale cache! Recovery works!")
-                return True
-            else:
-                logger.error("\n❌ FAIL: Sync did not clear cache")
-                return False
+    # Every step reuses the shared pooled session's keep-alive connection
+    session = await get_session()
+    
+    request = {"prompt": prompt, "prefix_len": 10}
+    
+    # Steps 1 and 2 stay sequential: the router only caches the prefix
+    # speculatively if the worker is registered when the request arrives
+    # Step 1: Register worker
+    await post(session, HEARTBEAT_URL, {"worker_id": WORKER_ID, "current_load": 5})
+    logger.info(f"[1] Registered {WORKER_ID}")
+    
+    # Step 2: Cache prefix (router will speculatively cache it)
+    await post(session, COMPLETIONS_URL, request)
+    logger.info(f"[2] Sent request, router cached {prefix_hash >> 32:08x}...")
+    
+    # Step 3: Verify HIT (all checks in flight at once)
+    results = await post_concurrently(session, COMPLETIONS_URL, request, concurrency)
+    statuses = Counter(data.get('cache_status') for data in results)
+    logger.info(f"[3] First check: {dict(statuses)} (expected: HIT)")
+    
+    # Step 4: Simulate crash - tell router we have NO hashes (barrier before the MISS check)
+    await post(session, SYNC_URL, {"worker_id": WORKER_ID, "active_hashes": []})
+    logger.info(f"[4] Sent SYNC with empty hashes (simulating eviction)")
+    
+    # Step 5: Verify MISS (recovery happened). Only the first check to land can
+    # see the empty cache; it re-caches the prefix for the ones behind it
+    results = await post_concurrently(session, COMPLETIONS_URL, request, concurrency)
+    statuses = Counter(data.get('cache_status') for data in results)
+    logger.info(f"[5] After sync: {dict(statuses)} (expected: MISS)")
+    
+    if statuses["MISS"]:
+        logger.info("\n✅ SUCCESS: Sync cleared stale cache! Recovery works!")
+        return True
+    else:
+        logger.error("\n❌ FAIL: Sync did not clear cache")
+        return False
+
+async def main(concurrency: int = 1):
+    try:
+        return await run_test(concurrency)
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
-    result = asyncio.run(run_test())
+    import argparse
+    parser = argparse.ArgumentParser(description="Stale cache recovery smoke test")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Completion checks sent at once in the HIT and MISS steps (default: 1)"
+    )
+    args = parser.parse_args()
+    
+    install_uvloop()
+    result = asyncio.run(main(args.concurrency))
     exit(0 if result else 1)
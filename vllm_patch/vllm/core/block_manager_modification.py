@@ -20,14 +20,27 @@ INTEGRATION STEPS:
 3. Initialize the EvictionReporter in your vLLM engine startup:
    ```python
    from vllm_patch.vllm.engine.eviction_reporter import EvictionReporter
+   from vllm_patch.vllm.engine.router_client import WorkerRouterClient
    
-   # In LLMEngine.__init__ or similar
-   self.eviction_reporter = EvictionReporter(
+   # In LLMEngine.__init__ or similar; one connection pool for everything sent to the router
+   self.router_client = WorkerRouterClient(
        router_url=os.getenv("ROUTER_URL", "http://localhost:8000"),
        worker_id=os.getenv("WORKER_ID", "worker-1")
    )
+   self.eviction_reporter = EvictionReporter(self.router_client)
    await self.eviction_reporter.start()
+   
+   # Heartbeats and syncs go through the same client
+   await self.router_client.heartbeat(current_load, self.eviction_reporter.drain_pending())
+   
+   # On shutdown
+   await self.eviction_reporter.stop()
+   await self.router_client.aclose()
    ```
+   The reporter runs on the engine's event loop, so install uvloop
+   (requirements-dev.txt) for it. vLLM's API server runs under uvicorn, which
+   picks uvloop up by itself; an engine started with asyncio.run() should
+   call `uvloop.install()` first.
 
 4. Modify the free_block() method as shown below
 
@@ -40,7 +53,7 @@ This prevents false eviction reports for blocks still in use by other logical bl
 from vllm.engine.eviction_reporter import EvictionReporter
 
 # Global or singleton instance of the reporter (needs to be initialized during engine startup)
-# eviction_reporter = EvictionReporter(router_url="http://localhost:8000", worker_id="worker-1")
+# eviction_reporter = EvictionReporter(WorkerRouterClient("http://localhost:8000", worker_id="worker-1"))
 
 class BlockManagerModification:
     """
@@ -81,7 +94,8 @@ class BlockManagerModification:
                 # vLLM tracks this via block.content_hash or similar metadata
                 
                 if hasattr(block, 'content_hash') and block.content_hash:
-                    # Report eviction to router
+                    # Report eviction to router (content_hash is an int; the
+                    # reporter stores it as an unsigned 64-bit value)
                     # Assuming we have access to the global eviction_reporter
                     # self.eviction_reporter.add_evicted_hash(block.content_hash)
                     pass
@@ -117,5 +131,23 @@ class CachedBlockAllocator(BlockAllocatorBase):
             
             # Original logic
             self.free_blocks.append(block)
+
+class BlockSpaceManager:
+    def free(self, seq: Sequence) -> None:
+        block_table = self.block_tables.pop(seq.seq_id)
+        
+        # NEW: blocks from `root` on are referenced only by this sequence, so
+        # one (hash, depth) report lets the router cut the whole tail at once.
+        # The allocator still reports each block: the cut only applies when the
+        # router's recorded sequence has the same block at that depth.
+        root = len(block_table)
+        while root > 0 and block_table[root - 1].ref_count == 1:
+            root -= 1
+        if self.eviction_reporter is not None and root < len(block_table) and block_table[root].content_hash:
+            self.eviction_reporter.add_evicted_prefix(block_table[root].content_hash, root)
+        
+        for block in block_table:
+            # Original logic
+            self.gpu_allocator.free(block)
 """
 
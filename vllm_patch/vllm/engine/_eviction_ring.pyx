@@ -0,0 +1,61 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled hand-off ring for EvictionReporter.add_evicted_hash().
+
+push() is a C store plus an index bump, called with the GIL held, so it can't
+interleave with drain() on the reporter's loop. eviction_reporter.py falls
+back to an identical pure-Python ring when this extension isn't built.
+
+Build in place with:
+    cythonize -3 -i vllm_patch/vllm/engine/_eviction_ring.pyx
+"""
+
+from libc.stdint cimport uint64_t
+from libc.stdlib cimport calloc, free
+
+
+cdef class Ring:
+    cdef uint64_t* buf
+    cdef unsigned long long size, mask, head, tail
+    cdef bint wake_scheduled
+
+    def __cinit__(self, unsigned long long size):
+        if size == 0 or size & (size - 1):
+            raise ValueError("Ring size must be a power of two")
+        self.buf = <uint64_t*> calloc(size, sizeof(uint64_t))
+        if self.buf == NULL:
+            raise MemoryError()
+        self.size = size
+        self.mask = size - 1
+        self.head = 0
+        self.tail = 0
+        self.wake_scheduled = False
+
+    def __dealloc__(self):
+        free(self.buf)
+
+    def __len__(self):
+        return self.head - self.tail
+
+    cpdef bint push(self, uint64_t prefix_hash):
+        """Store a hash; True if it's the first since the last drain(), i.e. the consumer needs waking."""
+        self.buf[self.head & self.mask] = prefix_hash
+        self.head += 1
+        if self.wake_scheduled:
+            return False
+        self.wake_scheduled = True
+        return True
+
+    def drain(self):
+        """Return (hashes pushed since the last drain, number lost to overflow)."""
+        cdef unsigned long long head = self.head
+        cdef unsigned long long tail = self.tail
+        cdef unsigned long long overflowed = 0
+        cdef unsigned long long i
+        self.wake_scheduled = False
+        if head - tail > self.size:
+            overflowed = head - tail - self.size
+            tail = head - self.size
+        hashes = [self.buf[i & self.mask] for i in range(tail, head)]
+        self.tail = head
+        return hashes, overflowed
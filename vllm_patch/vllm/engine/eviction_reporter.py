@@ -1,58 +1,521 @@
 import asyncio
-import aiohttp
+import httpx
 import logging
-from typing import List, Deque
+import math
+import sys
+import threading
+import time
+from array import array
 from collections import deque
+from itertools import islice
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .router_client import WorkerRouterClient
+
+try:
+    from ._eviction_ring import Ring  # Cython build of _PyRing, see _eviction_ring.pyx
+except ImportError:
+    Ring = None
 
 logger = logging.getLogger("vllm.engine.eviction_reporter")
 
+HASH_MASK = (1 << 64) - 1  # Block hashes are unsigned 64-bit ints
+MAX_BATCH = 512  # Most hashes sent in one POST
+MAX_INFLIGHT = 4  # Batch POSTs sent concurrently when the queue holds several batches
+MAX_QUEUE = 100_000  # Pending hashes kept before the oldest are dropped
+MIN_REPORT_INTERVAL = 0.005  # Coalescing window bounds (s); see EvictionReporter._adapt_interval
+MAX_REPORT_INTERVAL = 0.2
+MAX_RETRIES = 6  # Retries per batch before it is put back in the pending set
+RETRY_BASE_DELAY = 0.05  # Backoff doubles from here (s) ...
+RETRY_MAX_DELAY = 5.0  # ... up to this
+RING_SIZE = 1 << 18  # Slots in the hand-off ring between the scheduler thread and the loop (power of two)
+STREAM_FLUSH_INTERVAL = 0.005  # Coalescing window (s) while the eviction stream is open
+STREAM_RETRY_AFTER = 5.0  # Seconds before trying to reopen a closed eviction stream
+STREAM_MAX_AGE = 10.0  # Seconds one upload stays open; uvicorn waits for open requests on shutdown
+BLOOM_MIN_HASHES = 4096  # Pending hashes from which a round goes out as one Bloom filter
+BLOOM_ERROR_RATE = 0.01  # Target false-positive rate; the router evicts false positives too
+HEARTBEAT_FALLBACK_AFTER = 1.0  # Once heartbeats carry evictions, POST them directly only if none drained for this long (s)
+
+
+def _pack_hashes(hashes: List[int]) -> bytes:
+    """Encode hashes as little-endian uint64s, the body /internal/eviction/packed expects."""
+    packed = array("Q", hashes)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _build_bloom(hashes: List[int], error_rate: float = BLOOM_ERROR_RATE) -> Tuple[bytes, int]:
+    """
+    Return (filter, k): a Bloom filter of the hashes in the layout the router's
+    /internal/eviction/bloom expects. Bit i is bit i % 8 of byte i // 8, and
+    a hash sets bits (lo + j * hi) % m for j < k, lo and hi being its 32-bit halves.
+    The hashes are already uniform, so they are split instead of rehashed.
+    """
+    n = len(hashes)
+    m = max(64, math.ceil(-n * math.log(error_rate) / math.log(2) ** 2))
+    m = (m + 7) // 8 * 8
+    k = max(1, round(m / n * math.log(2)))
+    values = np.fromiter(hashes, dtype=np.uint64, count=n)
+    lo = values & np.uint64(0xFFFFFFFF)
+    hi = values >> np.uint64(32)
+    bits = np.zeros(m, dtype=bool)
+    for j in range(k):
+        bits[(lo + np.uint64(j) * hi) % np.uint64(m)] = True
+    return np.packbits(bits, bitorder="little").tobytes(), k
+
+
+class _PyRing:
+    """
+    Single-producer ring of uint64 hashes, the fallback for the compiled Ring.
+    The consumer copies [_tail, _head) out; overflow overwrites the oldest slots.
+    """
+
+    def __init__(self, size: int):
+        self._buf = array("Q", bytes(8 * size))
+        self._size = size
+        self._mask = size - 1
+        self._head = 0
+        self._tail = 0
+        self._wake_scheduled = False
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def push(self, prefix_hash: int) -> bool:
+        """Store a hash; True if it's the first since the last drain(), i.e. the consumer needs waking."""
+        self._buf[self._head & self._mask] = prefix_hash
+        self._head += 1
+        if self._wake_scheduled:
+            return False
+        self._wake_scheduled = True
+        return True
+
+    def drain(self) -> Tuple[List[int], int]:
+        """Return (hashes pushed since the last drain, number lost to overflow)."""
+        self._wake_scheduled = False  # Before reading _head, so later pushes wake us again
+        head = self._head
+        tail = self._tail
+        overflowed = 0
+        if head - tail > self._size:
+            overflowed = head - tail - self._size
+            tail = head - self._size
+        # At most two contiguous slices (the second when the range wraps), copied in C
+        start, end = tail & self._mask, head & self._mask
+        if head == tail:
+            hashes = []
+        elif start < end:
+            hashes = self._buf[start:end].tolist()
+        else:
+            hashes = self._buf[start:].tolist() + self._buf[:end].tolist()
+        self._tail = head
+        return hashes, overflowed
+
+
 class EvictionReporter:
-    def __init__(self, router_url: str, worker_id: str, report_interval: float = 0.1):
-        self.router_url = router_url
-        self.worker_id = worker_id
-        self.report_interval = report_interval
-        self.eviction_queue: Deque[str] = deque()
-        self._running = False
+    def __init__(self, client: WorkerRouterClient, report_interval: float = MIN_REPORT_INTERVAL,
+                 max_batch: int = MAX_BATCH, max_inflight: int = MAX_INFLIGHT, max_queue: int = MAX_QUEUE,
+                 stream: bool = True):
+        """
+        Reports go through client, the worker's shared connection to the router;
+        the caller closes it after stop(). The report loop sleeps until a hash is queued, waits report_interval to
+        coalesce more, then sends everything queued as up to max_inflight
+        concurrent POSTs of at most max_batch hashes. report_interval is only the
+        starting window; it adapts to the eviction rate after every send.
+        With stream, batches go down one long-lived upload to the router's
+        /internal/eviction/stream instead, falling back to POSTs without it.
+        A round of BLOOM_MIN_HASHES or more (a mass eviction) is sent as one
+        Bloom filter instead of a list of hashes, and add_evicted_prefix()
+        lets the router cut a whole sequence tail with a single (hash, depth) pair.
+        """
+        self.client = client
+        self.report_interval = min(max(report_interval, MIN_REPORT_INTERVAL), MAX_REPORT_INTERVAL)
+        self.max_batch = max_batch
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        # Written by add_evicted_hash(); the loop drains it into _pending
+        self._ring = Ring(RING_SIZE) if Ring is not None else _PyRing(RING_SIZE)
+        # Insertion-ordered set: a block freed twice before the next send is reported once
+        self._pending: Dict[int, None] = {}
+        # (prefix_hash, depth) pairs from add_evicted_prefix(); deque appends are thread-safe
+        self._prefixes: deque = deque(maxlen=max_queue)
+        self._prefixes_dropped = 0  # Pairs pushed out by add_evicted_prefix(); only it writes this
+        self._prefixes_dropped_seen = 0
+        self._wakeup = asyncio.Event()
+        self.dropped = 0  # Hashes discarded because the queue was full
+        self._heartbeat_drained_at: Optional[float] = None  # Last drain_pending() call
+        self._stop_event = asyncio.Event()
         self._task = None
+        self._tasks: Optional[asyncio.TaskGroup] = None  # Owns the report loop's stream uploads
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self.stream = stream
+        self.bloom = True  # Cleared if the router has no /internal/eviction/bloom
+        self.prefix_eviction = True  # Cleared if the router has no /internal/eviction/prefix
+        self._stream_batches: Optional[asyncio.Queue] = None  # Feeds the open upload; None when closed
+        self._stream_retry_at = 0.0
+        # POSTed batches carry (epoch, seq) so the router can drop a retried or
+        # overtaken report instead of evicting a block that has been cached again
+        self._epoch = time.time_ns()
+        self._seq = 0
+
+    def add_evicted_hash(self, prefix_hash: int):
+        """
+        Add a hash to be reported. Called from the block allocator's free path,
+        so this is just a ring slot write; the loop is only woken for the first
+        hash since it last collected. Safe from one producer thread at a time.
+        Negative hashes (vLLM's content_hash comes from hash()) wrap to 64 bits.
+        """
+        if self._ring.push(prefix_hash & HASH_MASK):
+            self._wake_loop()
+
+    def add_evicted_prefix(self, prefix_hash: int, depth: int):
+        """
+        Report that every cached block from position depth of a sequence on
+        is gone, prefix_hash being the block at depth (e.g. a finished
+        conversation's blocks from its first unshared one). If the router's
+        record of the worker's sequence has prefix_hash at depth it is cut there
+        straight away. Block hashes aren't chained, so that record may be
+        another sequence's; the tail's blocks must still be reported with
+        add_evicted_hash(). Same threading rules as add_evicted_hash().
+        """
+        if not self.prefix_eviction:
+            return  # The router can't cut; the per-block reports cover the tail
+        if len(self._prefixes) == self.max_queue:
+            self._prefixes_dropped += 1  # The append pushes the oldest pair out
+        self._prefixes.append((prefix_hash & HASH_MASK, depth))
+        self._wake_loop()
+
+    def _wake_loop(self):
+        if self._loop is None:
+            return  # start() checks for anything recorded before it
+        if threading.get_ident() == self._loop_thread:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
 
-    def add_evicted_hash(self, prefix_hash: str):
-        """Add a hash to the queue to be reported."""
-        self.eviction_queue.append(prefix_hash)
+    def _collect_ring(self):
+        """Move hashes written since the last collection into the pending set."""
+        hashes, overflowed = self._ring.drain()
+        prefixes_dropped = self._prefixes_dropped
+        self.dropped += overflowed + prefixes_dropped - self._prefixes_dropped_seen
+        self._prefixes_dropped_seen = prefixes_dropped
+        # Re-adding a hash that's already pending keeps its original position
+        self._pending.update(dict.fromkeys(hashes))
+        self._trim_pending()
+
+    def _trim_pending(self):
+        """Drop the oldest pending hashes past max_queue; the worker's next full sync corrects the router."""
+        excess = len(self._pending) - self.max_queue
+        if excess > 0:
+            # Rebuild in one pass: deleting the first key one at a time rescans
+            # the dict's freed slots on every call
+            self._pending = dict.fromkeys(islice(self._pending, excess, None))
+            self.dropped += excess
 
     async def start(self):
-        self._running = True
-        self._task = asyncio.create_task(self._report_loop())
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if len(self._ring) or self._prefixes:
+            self._wakeup.set()  # Evictions recorded before start()
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
         logger.info("EvictionReporter started.")
 
     async def stop(self):
-        self._running = False
+        """Wake the report loop, let it flush everything recorded so far, and wait for it to finish."""
+        self._stop_event.set()
+        self._wakeup.set()
         if self._task:
             await self._task
+            self._task = None
+        self._loop = None
+        self._loop_thread = None
         logger.info("EvictionReporter stopped.")
 
-    async def _report_loop(self):
-        async with aiohttp.ClientSession() as session:
-            while self._running:
-                await asyncio.sleep(self.report_interval)
-                
-                if not self.eviction_queue:
-                    continue
+    def _drain_batches(self) -> List[List[int]]:
+        """Take the oldest pending hashes, split into up to max_inflight batches of max_batch."""
+        hashes = list(islice(self._pending, self.max_batch * self.max_inflight))
+        if len(hashes) == len(self._pending):
+            self._pending.clear()
+        else:
+            for prefix_hash in hashes:
+                del self._pending[prefix_hash]
+        return [hashes[i:i + self.max_batch] for i in range(0, len(hashes), self.max_batch)]
+
+    def drain_pending(self, max_n: int = MAX_BATCH) -> List[int]:
+        """
+        Take up to max_n of the oldest pending hashes for the caller to send as
+        the heartbeat's evicted_hashes. Once a heartbeat drains the reporter,
+        its own POSTs only kick in if heartbeats stall for HEARTBEAT_FALLBACK_AFTER.
+        Call from the reporter's event loop.
+        """
+        self._heartbeat_drained_at = time.monotonic()
+        self._collect_ring()
+        hashes = list(islice(self._pending, max_n))
+        for prefix_hash in hashes:
+            del self._pending[prefix_hash]
+        if not self._pending and not self._prefixes:
+            self._wakeup.clear()  # Prefix evictions still need the loop to send them
+        return hashes
+
+    def _requeue(self, batch: List[int]):
+        """Put unacknowledged hashes back ahead of newer ones, dropping the oldest past max_queue."""
+        pending = dict.fromkeys(batch)
+        pending.update(self._pending)
+        self._pending = pending
+        self._trim_pending()
+        self._wakeup.set()
 
-                # Drain the queue
-                batch = []
-                while self.eviction_queue:
-                    batch.append(self.eviction_queue.popleft())
+    def _adapt_interval(self, batches: List[List[int]]):
+        """
+        Shrink the coalescing window while batches come out full, so a backlog
+        drains quickly, and grow it while they are small, so sparse evictions
+        share a POST instead of sending one each.
+        """
+        fill = sum(len(b) for b in batches) / (self.max_batch * self.max_inflight)
+        if len(batches[-1]) >= self.max_batch:
+            self.report_interval = max(MIN_REPORT_INTERVAL, self.report_interval / 2)
+        elif fill < 0.25:
+            self.report_interval = min(MAX_REPORT_INTERVAL, self.report_interval * 1.5)
 
-                if not batch:
+    async def _run(self):
+        """The reporter's lifetime: report until stop(), then flush and close the stream."""
+        async with asyncio.TaskGroup() as tasks:
+            self._tasks = tasks
+            if self.stream:
+                await self._open_stream()
+            await self._report_loop()
+            await self._flush()
+            if self._stream_batches is not None:
+                self._stream_batches.put_nowait(None)  # End the upload once it has sent what's queued
+        # The group has waited for the upload; anything it handed back couldn't be sent
+        self._tasks = None
+        if self._pending:
+            # Router unreachable; the worker's next full sync after restart corrects it
+            logger.warning(f"EvictionReporter stopping with {len(self._pending)} unreported hashes")
+
+    async def _flush(self):
+        """Send everything recorded so far, giving up after a round the router doesn't acknowledge."""
+        self._collect_ring()
+        if self._prefixes and not await self._send_prefixes():
+            return
+        if self.bloom and len(self._pending) >= BLOOM_MIN_HASHES:
+            if not await self._send_bloom():
+                return
+        while self._pending:
+            if not all(await self._send_batches(self._drain_batches())):
+                break
+
+    async def _sleep_unless_stopped(self, delay: float) -> bool:
+        """Sleep for delay seconds, returning True early if stop() is called."""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), delay)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _report_loop(self):
+        while not self._stop_event.is_set():
+            # Sleep until there is something to report
+            await self._wakeup.wait()
+            streaming = self._stream_batches is not None
+            if await self._sleep_unless_stopped(STREAM_FLUSH_INTERVAL if streaming else self.report_interval):
+                break
+            if self._heartbeat_drained_at is not None and not self._prefixes:
+                # Heartbeats are carrying the evictions; only step in if they stall
+                idle = time.monotonic() - self._heartbeat_drained_at
+                if idle < HEARTBEAT_FALLBACK_AFTER:
+                    if await self._sleep_unless_stopped(HEARTBEAT_FALLBACK_AFTER - idle):
+                        break
                     continue
+            self._wakeup.clear()
+            self._collect_ring()
+            if self._prefixes:
+                await self._send_prefixes()
+            if self.bloom and len(self._pending) >= BLOOM_MIN_HASHES:
+                await self._send_bloom()
+                continue
+            batches = self._drain_batches()
+            if not batches:
+                continue  # A heartbeat took them while we slept
+            if self._pending:
+                self._wakeup.set()  # More than one round's worth queued; go again straight away
+            self._adapt_interval(batches)
+            if self.stream and self._stream_batches is None and time.monotonic() >= self._stream_retry_at:
+                await self._open_stream()
+            await self._send_batches(batches)
 
+    async def _open_stream(self):
+        """Probe the router for /internal/eviction/stream and, if it has one, start the upload."""
+        self._stream_retry_at = time.monotonic() + STREAM_RETRY_AFTER
+        try:
+            resp = await self.client.stream_evictions(b"")
+        except httpx.TransportError:
+            return  # Router down; POSTs retry, and we probe again later
+        if resp.status_code != 200:
+            logger.info("Router has no eviction stream; reporting evictions with POSTs")
+            self.stream = False
+            return
+        batches: asyncio.Queue = asyncio.Queue()
+        self._stream_batches = batches
+        self._tasks.create_task(self._run_stream(batches))
+
+    async def _run_stream(self, batches: asyncio.Queue):
+        """
+        Upload batches as one chunked request body until _run() ends it, the
+        connection drops or STREAM_MAX_AGE passes; the loop then reopens it.
+        """
+        async def body():
+            deadline = time.monotonic() + STREAM_MAX_AGE
+            while True:
                 try:
-                    payload = {
-                        "worker_id": self.worker_id,
-                        "evicted_hashes": batch
-                    }
-                    async with session.post(f"{self.router_url}/internal/eviction", json=payload) as resp:
-                        if resp.status != 200:
-                            logger.error(f"Failed to report evictions: {resp.status}")
-                except Exception as e:
-                    logger.error(f"Error reporting evictions: {e}")
+                    batch = await asyncio.wait_for(batches.get(), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    return
+                if batch is None:
+                    return
+                yield _pack_hashes(batch)
+
+        try:
+            resp = await self.client.stream_evictions(body())
+            if resp.status_code != 200:
+                logger.warning(f"Eviction stream closed: {resp.status_code}")
+        except Exception as e:
+            logger.warning(f"Eviction stream closed: {e}")
+        finally:
+            if self._stream_batches is batches:
+                self._stream_batches = None
+            # Batches the upload never took go back to the pending set. Ones
+            # already written to a connection that then dropped are lost; the
+            # worker's next full sync corrects the router.
+            while not batches.empty():
+                batch = batches.get_nowait()
+                if batch:
+                    self._requeue(batch)
+
+    async def _send_batches(self, batches: List[List[int]]) -> List[bool]:
+        return await asyncio.gather(*(self._send_batch(batch) for batch in batches))
+
+    async def _send_batch(self, batch: List[int]) -> bool:
+        """
+        POST one batch, retrying as _post() does. Returns False if the router
+        never acknowledged it, in which case the hashes are back in the pending
+        set for the next round.
+        """
+        self._log_dropped()
+        if self._stream_batches is not None:
+            self._stream_batches.put_nowait(batch)
+            return True
+        try:
+            status = await self._post(self.client.report_evictions, _pack_hashes(batch), len(batch))
+        except asyncio.CancelledError:
+            self._requeue(batch)  # Cancelled from outside; keep the batch for the next flush
+            raise
+        except Exception as e:
+            logger.error(f"Error reporting evictions: {e}")
+            return True
+        if status is None:
+            self._requeue(batch)
+            return False
+        if status != 200:
+            # The router rejected the report itself; resending it won't help
+            logger.error(f"Failed to report evictions: {status}")
+        return True
+
+    async def _send_bloom(self) -> bool:
+        """
+        Send every pending hash as one Bloom filter. Returns False if the router
+        never acknowledged it; the hashes are then back in the pending set, and
+        go out as regular batches if the router has no bloom endpoint.
+        """
+        self._log_dropped()
+        hashes = list(self._pending)
+        self._pending.clear()
+        try:
+            bloom, k = _build_bloom(hashes)
+            status = await self._post(self.client.report_bloom, bloom, len(hashes), k=k, count=len(hashes))
+        except asyncio.CancelledError:
+            self._requeue(hashes)
+            raise
+        except Exception as e:
+            logger.error(f"Error reporting evictions: {e}")
+            return True
+        if status == 404:
+            logger.info("Router has no bloom eviction endpoint; sending mass evictions as batches")
+            self.bloom = False
+            self._requeue(hashes)
+            return True
+        if status is None:
+            self._requeue(hashes)
+            return False
+        if status != 200:
+            logger.error(f"Failed to report evictions: {status}")
+        return True
+
+    async def _send_prefixes(self) -> bool:
+        """
+        POST every pending prefix eviction. Returns False if the router never
+        acknowledged them; they are then queued again. If the router has no
+        prefix endpoint they are discarded: the tails' per-block reports
+        (see add_evicted_prefix) already cover every hash in them.
+        """
+        prefixes = [self._prefixes.popleft() for _ in range(len(self._prefixes))]
+        if not self.prefix_eviction:
+            return True
+        try:
+            status = await self._post(self.client.report_prefix_evictions,
+                                      _pack_hashes([v for pair in prefixes for v in pair]), len(prefixes))
+        except asyncio.CancelledError:
+            self._requeue_prefixes(prefixes)
+            raise
+        except Exception as e:
+            logger.error(f"Error reporting prefix evictions: {e}")
+            return True
+        if status is None:
+            self._requeue_prefixes(prefixes)
+            self._wakeup.set()
+            return False
+        if status == 404:
+            logger.info("Router has no prefix eviction endpoint; relying on per-block eviction reports")
+            self.prefix_eviction = False
+        elif status != 200:
+            logger.error(f"Failed to report prefix evictions: {status}")
+        return True
+
+    def _requeue_prefixes(self, prefixes: List[Tuple[int, int]]):
+        """Put unacknowledged pairs back ahead of newer ones; past max_queue the newest are dropped."""
+        self.dropped += max(0, len(self._prefixes) + len(prefixes) - self.max_queue)
+        self._prefixes.extendleft(reversed(prefixes))
+
+    def _log_dropped(self):
+        if self.dropped:
+            logger.warning(f"Eviction queue full: dropped {self.dropped} oldest reports")
+            self.dropped = 0
+
+    async def _post(self, send: Callable[..., Awaitable[httpx.Response]], body: bytes, num_hashes: int,
+                    **params: int) -> Optional[int]:
+        """
+        Send a report of num_hashes hashes with send(body, **params), retrying connection errors, timeouts, 5xx
+        and 429 with exponential backoff. Returns the final status code, or None
+        if the router never acknowledged the report.
+        """
+        self._seq += 1
+        # Retries resend the same seq, so the router applies the report at most once
+        params.update(epoch=self._epoch, seq=self._seq)
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY))
+            try:
+                resp = await send(body, **params)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            if resp.status_code < 500 and resp.status_code != 429:
+                return resp.status_code
+            error = f"HTTP {resp.status_code}"
+        logger.warning(f"Error reporting evictions ({error}) after {MAX_RETRIES} retries; "
+                       f"keeping {num_hashes} hashes queued")
+        return None
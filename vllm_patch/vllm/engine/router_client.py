@@ -0,0 +1,81 @@
+import logging
+from typing import AsyncIterable, Dict, List, Optional, Union
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx's optional HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger("vllm.engine.router_client")
+
+PACKED_HEADERS = {"Content-Type": "application/octet-stream"}
+
+
+class WorkerRouterClient:
+    def __init__(self, router_url: str, worker_id: str, worker_url: Optional[str] = None):
+        """
+        One keep-alive pool to the router for everything a worker sends it:
+        heartbeats, syncs and the EvictionReporter's eviction reports. HTTP/2
+        is only negotiated over TLS (ALPN); plain http:// routers get HTTP/1.1.
+        worker_url, if given, goes out with every heartbeat (proxy mode).
+        """
+        self.router_url = router_url
+        self.worker_id = worker_id
+        self.worker_url = worker_url
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            base_url=router_url,
+            timeout=httpx.Timeout(2.0, connect=0.5),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=75),
+        )
+
+    async def aclose(self):
+        """Close the connection pool; call once, after the EvictionReporter has stopped."""
+        await self._client.aclose()
+        logger.info("WorkerRouterClient closed.")
+
+    async def heartbeat(self, current_load: int, evicted_hashes: Optional[List[int]] = None) -> httpx.Response:
+        """Report the worker's load, piggybacking evicted_hashes (e.g. EvictionReporter.drain_pending())."""
+        payload = {"worker_id": self.worker_id, "current_load": current_load}
+        if self.worker_url:
+            payload["worker_url"] = self.worker_url
+        if evicted_hashes:
+            payload["evicted_hashes"] = evicted_hashes
+        return await self._client.post("/internal/heartbeat", json=payload)
+
+    async def sync(self, active_hashes: List[int], seq: Optional[int] = None) -> httpx.Response:
+        """Replace the router's view of this worker's cache with active_hashes, in prefix order."""
+        payload = {"worker_id": self.worker_id, "active_hashes": active_hashes}
+        if seq is not None:
+            payload["seq"] = seq
+        return await self._client.post("/internal/sync", json=payload)
+
+    async def report_evictions(self, packed: bytes, **params: int) -> httpx.Response:
+        """POST little-endian uint64 hashes to /internal/eviction/packed; params go in the query string."""
+        return await self._post_packed("/internal/eviction/packed", packed, params)
+
+    async def report_bloom(self, bloom: bytes, **params: int) -> httpx.Response:
+        """POST a Bloom filter of evicted hashes to /internal/eviction/bloom."""
+        return await self._post_packed("/internal/eviction/bloom", bloom, params)
+
+    async def report_prefix_evictions(self, packed: bytes, **params: int) -> httpx.Response:
+        """POST little-endian uint64 (prefix_hash, depth) pairs to /internal/eviction/prefix."""
+        return await self._post_packed("/internal/eviction/prefix", packed, params)
+
+    async def stream_evictions(self, body: Union[bytes, AsyncIterable[bytes]]) -> httpx.Response:
+        """
+        Upload packed hashes to /internal/eviction/stream as one chunked body;
+        returns once body is exhausted. An empty body probes for the endpoint.
+        """
+        return await self._post_packed("/internal/eviction/stream", body, {})
+
+    async def _post_packed(self, path: str, content, params: Dict[str, int]) -> httpx.Response:
+        return await self._client.post(
+            path,
+            params={"worker_id": self.worker_id, **params},
+            content=content,
+            headers=PACKED_HEADERS,
+        )